@@ -0,0 +1,100 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from kubeobject.discovery import crd_cache
+from kubeobject.patch import apply_merge_patch
+
+
+class FakeCustomObjectsApi:
+    """An in-process `CustomObjectsApi`. Request bodies are serialized to
+    JSON, and objects read are deserialized from it, as the real client does,
+    so the cost of the payload size is part of the measurements."""
+
+    def __init__(self, api_client=None):
+        self.store = {}
+
+    def get_namespaced_custom_object(self, group, version, namespace, plural, name):
+        return json.loads(json.dumps(self.store[(namespace, plural, name)]))
+
+    def create_namespaced_custom_object(self, group, version, namespace, plural, body):
+        obj = json.loads(json.dumps(body))
+        obj["metadata"]["resourceVersion"] = "1"
+
+        self.store[(namespace, plural, obj["metadata"]["name"])] = obj
+        return obj
+
+    def patch_namespaced_custom_object(self, group, version, namespace, plural, name, body):
+        key = (namespace, plural, name)
+        obj = apply_merge_patch(self.store[key], json.loads(json.dumps(body)))
+        version = int(obj["metadata"]["resourceVersion"]) + 1
+        obj["metadata"] = dict(obj["metadata"], resourceVersion=str(version))
+
+        self.store[key] = obj
+        return obj
+
+
+def fake_crds(count: int):
+    return [
+        SimpleNamespace(
+            spec=SimpleNamespace(
+                group="group{}.example.com".format(i),
+                version="v1",
+                names=SimpleNamespace(kind="Kind{}".format(i), plural="kinds{}".format(i)),
+            )
+        )
+        for i in range(count)
+    ]
+
+
+class FakeApiextensionsApi:
+    crds = fake_crds(200)
+
+    def __init__(self, api_client=None):
+        pass
+
+    def list_custom_resource_definition(self):
+        return SimpleNamespace(items=self.crds)
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    api = FakeCustomObjectsApi()
+    monkeypatch.setattr(
+        "kubeobject.customobject.client.CustomObjectsApi", lambda api_client=None: api
+    )
+    monkeypatch.setattr(
+        "kubeobject.kubeobject.CustomObjectsApi", lambda api_client=None: api
+    )
+
+    return api
+
+
+@pytest.fixture
+def fake_discovery(monkeypatch):
+    monkeypatch.setattr(
+        "kubeobject.discovery.client.ApiextensionsV1beta1Api", FakeApiextensionsApi
+    )
+    crd_cache.invalidate()
+    yield
+    crd_cache.invalidate()
+
+
+def sized_object(size: int) -> dict:
+    """Returns a Custom Resource of roughly `size` bytes as JSON."""
+    entry = {"name": "member", "votes": 1, "priority": 1.0, "tags": {"dc": "east"}}
+    entry_size = len(json.dumps(entry)) + 2
+
+    return {
+        "apiVersion": "dummy.com/v1",
+        "kind": "Dummy",
+        "metadata": {"name": "my-dummy", "namespace": "default"},
+        "spec": {
+            "version": "1.0",
+            "members": [
+                dict(entry, name="member-{}".format(i), tags=dict(entry["tags"]))
+                for i in range(size // entry_size)
+            ],
+        },
+    }
@@ -0,0 +1,131 @@
+"""Measures the memory used by large numbers of objects, in bytes per object.
+
+    python -m benchmarks.memory --count 10000
+
+Objects are bound to a realistic Custom Resource, parsed from JSON once per
+object, as it happens when every object is read with its own request.
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from kubeobject import CustomObject, KubeObject
+
+SAMPLE = {
+    "apiVersion": "mongodb.com/v1",
+    "kind": "MongoDB",
+    "metadata": {
+        "name": "my-replica-set",
+        "namespace": "mongodb",
+        "uid": "d3a6f1a4-6a9a-4b0e-9f53-1bd1c8f2e9a1",
+        "resourceVersion": "1234567",
+        "generation": 3,
+        "creationTimestamp": "2021-03-01T10:00:00Z",
+        "labels": {
+            "app.kubernetes.io/name": "mongodb",
+            "app.kubernetes.io/managed-by": "mongodb-enterprise-operator",
+            "team": "data-platform",
+        },
+        "annotations": {"mongodb.com/last-applied": "{}"},
+    },
+    "spec": {
+        "type": "ReplicaSet",
+        "members": 3,
+        "version": "4.4.4-ent",
+        "credentials": "my-credentials",
+        "opsManager": {"configMapRef": {"name": "my-project"}},
+        "podSpec": {"cpu": "1", "memory": "2Gi", "persistence": {"single": {"storage": "16G"}}},
+        "additionalMongodConfig": {"net": {"maxIncomingConnections": 1000}},
+    },
+    "status": {
+        "phase": "Running",
+        "version": "4.4.4-ent",
+        "members": 3,
+        "link": "https://cloud.mongodb.com/v2/5f7a8b9c#deployment/topology",
+        "lastTransition": "2021-03-01T10:05:00Z",
+        "observedGeneration": 3,
+    },
+}
+
+
+def sample(i: int) -> str:
+    obj = json.loads(json.dumps(SAMPLE))
+    obj["metadata"]["name"] = "my-replica-set-{}".format(i)
+
+    return json.dumps(obj)
+
+
+def measure(build, count: int) -> float:
+    """Returns the bytes allocated per object by `build(i, payload)`."""
+    payloads = [sample(i) for i in range(count)]
+
+    # Warm up module-level caches, like the shared clients.
+    build(-1, payloads[0])
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    objs = [build(i, payload) for i, payload in enumerate(payloads)]
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(objs) == count
+    return (after - before) / count
+
+
+def build_custom_object(klass):
+    def build(i, payload):
+        obj = klass("my-replica-set-{}".format(i), "mongodb")
+        obj._bind(json.loads(payload))
+        return obj
+
+    return build
+
+
+def build_kube_object(klass):
+    def build(i, payload):
+        obj = klass("mongodb.com", "v1", "mongodbs")
+        obj._bind(json.loads(payload))
+        return obj
+
+    return build
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    MongoDB = CustomObject.define(
+        "MongoDB", kind="MongoDB", plural="mongodbs", group="mongodb.com", version="v1"
+    )
+    CompactMongoDB = CustomObject.define(
+        "CompactMongoDB",
+        kind="MongoDB",
+        plural="mongodbs",
+        group="mongodb.com",
+        version="v1",
+    )
+    CompactMongoDB.compact = True
+
+    class CompactKubeObject(KubeObject):
+        compact = True
+
+    cases = [
+        ("CustomObject", build_custom_object(MongoDB)),
+        ("CustomObject (compact)", build_custom_object(CompactMongoDB)),
+        ("KubeObject", build_kube_object(KubeObject)),
+        ("KubeObject (compact)", build_kube_object(CompactKubeObject)),
+    ]
+
+    print("{} objects".format(args.count))
+    for name, build in cases:
+        print("{:<24} {:>8.0f} bytes/object".format(name, measure(build, args.count)))
+
+
+if __name__ == "__main__":
+    main()
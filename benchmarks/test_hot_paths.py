@@ -0,0 +1,129 @@
+"""Microbenchmarks of the hot paths of kubeobject, against in-process fake
+APIs. Run them with:
+
+    pytest benchmarks --benchmark-autosave
+
+Results are saved in `.benchmarks/`; compare a run against the last saved one
+with `--benchmark-compare`, and fail on regressions with, for instance,
+`--benchmark-compare-fail=median:10%`.
+"""
+from datetime import timedelta
+
+import pytest
+import yaml
+
+from benchmarks.conftest import sized_object
+from kubeobject import CustomObject, KubeObject
+from kubeobject.testing import FakeApiServer
+
+
+@pytest.fixture
+def dummy_class(fake_api):
+    return CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+
+def test_construct_custom_object(benchmark, fake_api):
+    benchmark(
+        CustomObject,
+        "my-dummy",
+        "default",
+        kind="Dummy",
+        plural="dummies",
+        group="dummy.com",
+        version="v1",
+    )
+
+
+def test_construct_custom_object_with_crd_discovery(benchmark, fake_api, fake_discovery):
+    # The plural is looked for in the (cached) CRDs, as in `from_yaml`
+    obj = benchmark(
+        CustomObject,
+        "my-dummy",
+        "default",
+        kind="Kind150",
+        group="group150.example.com",
+        version="v1",
+    )
+
+    assert obj.plural == "kinds150"
+
+
+@pytest.mark.parametrize("auto_reload", [False, True], ids=["cached", "auto_reload"])
+def test_custom_object_getitem(benchmark, dummy_class, auto_reload):
+    obj = dummy_class("my-dummy", "default")
+    obj["spec"] = {"attr": "value"}
+    obj.create()
+
+    obj.auto_reload = auto_reload
+    # Reload on every read
+    obj.auto_reload_period = timedelta(0)
+
+    assert benchmark(lambda: obj["spec"]["attr"]) == "value"
+
+
+def test_kubeobject_getattr(benchmark, fake_api):
+    obj = KubeObject("dummy.com", "v1", "dummies")
+    obj.metadata = {"name": "my-dummy", "namespace": "default"}
+    obj.spec = {"nested": {"deeper": {"attr": "value"}}}
+    obj.create()
+
+    assert benchmark(lambda: obj.spec.nested.deeper.attr) == "value"
+
+
+@pytest.mark.parametrize("size", [1_000, 1_000_000], ids=["1KB", "1MB"])
+def test_from_yaml(benchmark, tmp_path, dummy_class, size):
+    path = tmp_path / "dummy.yaml"
+    path.write_text(yaml.safe_dump(sized_object(size)))
+
+    obj = benchmark(dummy_class.from_yaml, str(path))
+
+    assert obj.name == "my-dummy"
+
+
+@pytest.mark.parametrize("size", [10_000, 1_000_000], ids=["10KB", "1MB"])
+def test_update(benchmark, dummy_class, size):
+    obj = dummy_class("my-dummy", "default")
+    obj.backing_obj = sized_object(size)
+    obj.create()
+
+    versions = iter(range(10 ** 9))
+
+    def update():
+        obj["spec"]["version"] = str(next(versions))
+        obj.update()
+
+    benchmark(update)
+
+
+@pytest.fixture(scope="module")
+def api_server():
+    with FakeApiServer() as server:
+        yield server
+
+
+@pytest.mark.parametrize("fast_io", [False, True], ids=["client", "fast_io"])
+@pytest.mark.parametrize("size", [10_000, 1_000_000], ids=["10KB", "1MB"])
+def test_load_over_http(benchmark, api_server, size, fast_io):
+    # Through a real HTTP connection, to include the (de)serialization of
+    # the generated client, or its bypass with `fast_io`.
+    Dummy = CustomObject.define(
+        "Dummy",
+        kind="Dummy",
+        plural="dummies",
+        group="dummy.com",
+        version="v1",
+        api_client=api_server.api_client(),
+    )
+    Dummy.fast_io = fast_io
+
+    name = "dummy-{}-{}".format(size, fast_io)
+    obj = Dummy(name, "default")
+    obj.backing_obj = sized_object(size)
+    obj.backing_obj["metadata"]["name"] = name
+    obj.create()
+
+    obj = benchmark(Dummy(name, "default").load)
+
+    assert obj.name == name
@@ -0,0 +1,595 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from kubernetes_asyncio import client as async_client
+
+from kubeobject.conflict import conflict_backoff, is_conflict, with_precondition
+from kubeobject.customobject import (
+    HTTP_STATUS_NOT_FOUND,
+    CustomObject,
+    _status_patch,
+    _without_status,
+)
+from kubeobject.exceptions import ObjectNotBoundException
+from kubeobject.instrumentation import api_call
+from kubeobject.kubeobject import KubeObject
+from kubeobject.metadata import list_metadata_request, object_metadata_request
+from kubeobject.patch import apply_fields
+
+_api_clients = weakref.WeakKeyDictionary()
+
+# `kubernetes_asyncio` sends dicts as JSON patches unless told otherwise.
+MERGE_PATCH = "application/merge-patch+json"
+
+
+def default_api_client() -> async_client.ApiClient:
+    """Returns an `ApiClient` shared by every asynchronous object running on
+    the current event loop, so they all use the same connection pool. It is
+    closed by `close_default_api_client()`."""
+    loop = asyncio.get_running_loop()
+
+    api_client = _api_clients.get(loop)
+    if api_client is None:
+        api_client = async_client.ApiClient()
+        _api_clients[loop] = api_client
+
+    return api_client
+
+
+async def close_default_api_client():
+    """Closes the `ApiClient` shared on the current event loop, if any. Await
+    it before the loop is closed, unless every object was given an
+    `api_client` of its own, which is then closed by its owner."""
+    api_client = _api_clients.pop(asyncio.get_running_loop(), None)
+    if api_client is not None:
+        await api_client.close()
+
+
+class AsyncCustomObject(CustomObject):
+    """AsyncCustomObject is a `CustomObject` where every operation against the
+    Kubernetes API is a coroutine, so many objects can be loaded, created or
+    updated concurrently from a single event loop.
+
+    Instances need to be created from a running event loop. As reading an
+    attribute can't be awaited, `auto_reload` and `auto_save` have no effect,
+    `reload()` and `update()` need to be awaited explicitly instead.
+
+    The `kind`, `plural`, `group` and `version` of the objects are required,
+    as looking for the missing ones in the API would block the event loop.
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        namespace: str,
+        kind: Optional[str] = None,
+        plural: Optional[str] = None,
+        group: Optional[str] = None,
+        version: Optional[str] = None,
+        api_client: Optional[async_client.ApiClient] = None,
+    ):
+        _require_crd_names(kind=kind, plural=plural, group=group, version=version)
+        CustomObject.__init__(
+            self,
+            name,
+            namespace,
+            kind=kind,
+            plural=plural,
+            group=group,
+            version=version,
+        )
+
+        self.api_client = api_client
+        self.api = async_client.CustomObjectsApi(
+            api_client=api_client or default_api_client()
+        )
+
+    _define_init = __init__
+
+    async def load(self) -> AsyncCustomObject:
+        """Loads this object from the API."""
+        with api_call("get", self.kind):
+            obj = await self.api.get_namespaced_custom_object(
+                self.group, self.version, self.namespace, self.plural, self.name
+            )
+
+        self._bind_if_changed(obj)
+        return self
+
+    async def exists(self) -> bool:
+        """Returns True if this object exists in Kubernetes, see
+        `CustomObject.exists()`."""
+        try:
+            await self.load_metadata()
+        except async_client.ApiException as e:
+            if e.status == HTTP_STATUS_NOT_FOUND:
+                return False
+            raise
+
+        return True
+
+    async def load_metadata(self) -> Dict:
+        """Returns the `metadata` of this object, as it is in Kubernetes, see
+        `CustomObject.load_metadata()`."""
+        request = object_metadata_request(
+            self.group, self.version, self.namespace, self.plural, self.name
+        )
+        with api_call("get_metadata", self.kind):
+            obj = await _call_api(self.api.api_client, request)
+
+        return obj["metadata"]
+
+    async def create(self) -> AsyncCustomObject:
+        """Creates this object in Kubernetes."""
+        with api_call("create", self.kind):
+            obj = await self.api.create_namespaced_custom_object(
+                self.group, self.version, self.namespace, self.plural, self.backing_obj
+            )
+
+        self._bind(obj)
+        return self
+
+    async def update(self, retry_on_conflict: int = 0) -> AsyncCustomObject:
+        """Updates the object in Kubernetes, see `CustomObject.update()`."""
+
+        async def patch(body):
+            with api_call("patch", self.kind):
+                return await self.api.patch_namespaced_custom_object(
+                    self.group,
+                    self.version,
+                    self.namespace,
+                    self.plural,
+                    self.name,
+                    body,
+                    _content_type=MERGE_PATCH,
+                )
+
+        async def read():
+            with api_call("get", self.kind):
+                return await self.api.get_namespaced_custom_object(
+                    self.group, self.version, self.namespace, self.plural, self.name
+                )
+
+        obj = await _update_with_retries(self, patch, read, retry_on_conflict)
+
+        self._bind(obj)
+        return self
+
+    async def reload_status(self) -> AsyncCustomObject:
+        """Reloads the status of this object, see
+        `CustomObject.reload_status()`."""
+        with api_call("get_status", self.kind):
+            obj = await self.api.get_namespaced_custom_object_status(
+                self.group, self.version, self.namespace, self.plural, self.name
+            )
+
+        self._bind_status(obj)
+        return self
+
+    async def update_status(self) -> AsyncCustomObject:
+        """Updates the status of this object in Kubernetes, see
+        `CustomObject.update_status()`."""
+        changes = self._local_changes()
+
+        with api_call("patch_status", self.kind):
+            obj = await self.api.patch_namespaced_custom_object_status(
+                self.group,
+                self.version,
+                self.namespace,
+                self.plural,
+                self.name,
+                _status_patch(changes),
+                _content_type=MERGE_PATCH,
+            )
+
+        self._rebase(obj, _without_status(changes))
+        return self
+
+    async def apply(
+        self, field_manager: str = "kubeobject", force: bool = False
+    ) -> AsyncCustomObject:
+        """Creates or updates this object with a single server-side apply
+        request, see `CustomObject.apply()`."""
+        body = dict(
+            self.backing_obj,
+            apiVersion="{}/{}".format(self.group, self.version),
+            kind=self.kind,
+        )
+
+        with api_call("apply", self.kind):
+            obj = await _server_side_apply(
+                self.api,
+                self.group,
+                self.version,
+                self.namespace,
+                self.plural,
+                self.name,
+                body,
+                field_manager,
+                force,
+            )
+
+        self._bind(obj)
+        return self
+
+    async def delete(self):
+        """Deletes the object from Kubernetes."""
+        body = async_client.V1DeleteOptions()
+
+        with api_call("delete", self.kind):
+            await self.api.delete_namespaced_custom_object(
+                self.group, self.version, self.namespace, self.plural, self.name, body=body
+            )
+
+        self._register_updated()
+
+    async def reload(self) -> AsyncCustomObject:
+        """Reloads the object from the Kubernetes API."""
+        return await self.load()
+
+    @classmethod
+    async def load_many(
+        cls,
+        namespace: Optional[str] = None,
+        names: Optional[Iterable[str]] = None,
+        label_selector: Optional[str] = None,
+    ) -> List[AsyncCustomObject]:
+        """Loads every object of this class from `namespace`, or from all
+        namespaces, see `CustomObject.load_many()`."""
+        response = await cls._list(namespace, label_selector=label_selector)
+
+        return cls._from_items(response["items"], names)
+
+    @classmethod
+    async def iter_all(
+        cls,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        page_size: int = 500,
+    ) -> AsyncIterator[AsyncCustomObject]:
+        """Yields every object of this class in `namespace`, or in all
+        namespaces, `page_size` at a time; see `CustomObject.iter_all()`.
+        Iterate over it with `async for`."""
+        _continue = None
+        while True:
+            response = await cls._list(
+                namespace,
+                label_selector=label_selector,
+                limit=page_size,
+                _continue=_continue,
+            )
+
+            for item in response["items"]:
+                yield cls._from_item(item)
+
+            _continue = response.get("metadata", {}).get("continue")
+            if not _continue:
+                return
+
+    @classmethod
+    async def list_metadata(
+        cls,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        page_size: int = 500,
+    ) -> List[Dict]:
+        """Returns the `metadata` of every object of this class, see
+        `CustomObject.list_metadata()`."""
+        crd = cls._defined_names()
+        api_client = cls._async_api_client()
+
+        metadata = []
+        _continue = None
+        while True:
+            request = list_metadata_request(
+                crd["group"],
+                crd["version"],
+                namespace,
+                crd["plural"],
+                label_selector=label_selector,
+                limit=page_size,
+                _continue=_continue,
+            )
+            with api_call("list_metadata", crd["kind"]):
+                response = await _call_api(api_client, request)
+
+            metadata.extend(item["metadata"] for item in response["items"])
+
+            _continue = response.get("metadata", {}).get("continue")
+            if not _continue:
+                return metadata
+
+    @classmethod
+    async def _list(cls, namespace: Optional[str], **kwargs) -> Dict:
+        crd = cls._defined_names()
+        api = async_client.CustomObjectsApi(api_client=cls._async_api_client())
+
+        with api_call("list", crd["kind"]):
+            if namespace is None:
+                return await api.list_cluster_custom_object(
+                    crd["group"], crd["version"], crd["plural"], **kwargs
+                )
+
+            return await api.list_namespaced_custom_object(
+                crd["group"], crd["version"], namespace, crd["plural"], **kwargs
+            )
+
+    @classmethod
+    def _defined_names(cls) -> Dict[str, str]:
+        """Returns the CRD names passed to `define()`, which can't be looked
+        for in the API, see `__init__()`."""
+        if not cls._is_defined():
+            raise ValueError(
+                "This operation is only supported in classes created with `define()`."
+            )
+
+        _require_crd_names(**cls._crd_names)
+        return cls._crd_names
+
+    @classmethod
+    def _async_api_client(cls) -> async_client.ApiClient:
+        """Returns the `ApiClient` passed to `define()`, or the one shared on
+        the current event loop."""
+        return cls._crd_api_client or default_api_client()
+
+    async def wait_for(
+        self, fn: Callable[[AsyncCustomObject], bool], timeout: Optional[float] = None
+    ) -> bool:
+        """Reloads this object every `auto_reload_period` until `fn(self)` is
+        True. Raises `asyncio.TimeoutError` if `timeout` seconds pass first."""
+        return await asyncio.wait_for(_wait_for(self, fn), timeout)
+
+    def _reload_if_needed(self, key=None):
+        """Reads never reload an AsyncCustomObject, see `reload()`."""
+
+    def __setitem__(self, key, val):
+        self.backing_obj[key] = val
+
+
+class AsyncKubeObject(KubeObject):
+    """AsyncKubeObject is a `KubeObject` where every operation against the
+    Kubernetes API is a coroutine.
+
+    Instances need to be created from a running event loop, and, as for
+    `AsyncCustomObject`, `auto_reload` has no effect.
+
+    """
+
+    def init_attributes(self):
+        super().init_attributes()
+
+        self.__dict__["api"] = async_client.CustomObjectsApi(
+            api_client=default_api_client()
+        )
+
+    async def read(self, name: str, namespace: str) -> AsyncKubeObject:
+        with api_call("get", self.crd["plural"]):
+            obj = await self.api.get_namespaced_custom_object(
+                name=name, namespace=namespace, **self.crd
+            )
+
+        self._bind_if_changed(obj)
+        return self
+
+    async def reload(self) -> AsyncKubeObject:
+        if not self.bound:
+            raise ObjectNotBoundException
+
+        return await self.read(self.name, self.namespace)
+
+    async def update(self, retry_on_conflict: int = 0) -> AsyncKubeObject:
+        if not self.bound:
+            raise ObjectNotBoundException
+
+        async def patch(body):
+            with api_call("patch", self.crd["plural"]):
+                return await self.api.patch_namespaced_custom_object(
+                    name=self.name,
+                    namespace=self.namespace,
+                    **self.crd,
+                    body=body,
+                    _content_type=MERGE_PATCH,
+                )
+
+        async def read():
+            with api_call("get", self.crd["plural"]):
+                return await self.api.get_namespaced_custom_object(
+                    name=self.name, namespace=self.namespace, **self.crd
+                )
+
+        obj = await _update_with_retries(self, patch, read, retry_on_conflict)
+
+        self._bind(obj)
+        return self
+
+    async def reload_status(self) -> AsyncKubeObject:
+        """Reads the status of this object again, see
+        `KubeObject.reload_status()`."""
+        if not self.bound:
+            raise ObjectNotBoundException
+
+        with api_call("get_status", self.crd["plural"]):
+            obj = await self.api.get_namespaced_custom_object_status(
+                name=self.name, namespace=self.namespace, **self.crd
+            )
+
+        self._bind_status(obj)
+        return self
+
+    async def update_status(self) -> AsyncKubeObject:
+        """Updates the status of this object, see
+        `KubeObject.update_status()`."""
+        if not self.bound:
+            raise ObjectNotBoundException
+
+        changes = self._local_changes()
+
+        with api_call("patch_status", self.crd["plural"]):
+            obj = await self.api.patch_namespaced_custom_object_status(
+                name=self.name,
+                namespace=self.namespace,
+                **self.crd,
+                body=_status_patch(changes),
+                _content_type=MERGE_PATCH,
+            )
+
+        self._rebase(obj, _without_status(changes))
+        return self
+
+    async def apply(
+        self,
+        field_manager: str = "kubeobject",
+        force: bool = False,
+        namespace: Optional[str] = None,
+    ) -> AsyncKubeObject:
+        """Creates or updates this object with a single server-side apply
+        request, see `KubeObject.apply()`."""
+        backing_obj = self.__dict__[KubeObject.BACKING_OBJ]
+
+        if namespace is not None:
+            self.namespace = namespace
+        if self.namespace is None:
+            self.namespace = backing_obj.metadata.get("namespace")
+        if self.name is None:
+            self.name = backing_obj.metadata.get("name")
+
+        body = backing_obj.to_dict()
+        body["apiVersion"] = "{group}/{version}".format(**self.crd)
+
+        with api_call("apply", self.crd["plural"]):
+            obj = await _server_side_apply(
+                self.api,
+                self.crd["group"],
+                self.crd["version"],
+                self.namespace,
+                self.crd["plural"],
+                self.name,
+                body,
+                field_manager,
+                force,
+            )
+
+        self._bind(obj)
+        return self
+
+    async def delete(self):
+        if not self.bound:
+            raise ObjectNotBoundException
+
+        with api_call("delete", self.crd["plural"]):
+            await self.api.delete_namespaced_custom_object(
+                name=self.name,
+                namespace=self.namespace,
+                body={},
+                **self.crd,
+            )
+
+        self._register_update()
+        self.bound = False
+
+    async def create(self, namespace: Optional[str] = None) -> AsyncKubeObject:
+        if namespace is not None:
+            self.namespace = namespace
+
+        with api_call("create", self.crd["plural"]):
+            obj = await self.api.create_namespaced_custom_object(
+                namespace=self.namespace,
+                **self.crd,
+                body=self.__dict__[KubeObject.BACKING_OBJ].to_dict(),
+            )
+
+        self._bind(obj)
+        return self
+
+    async def wait_for(
+        self, fn: Callable[[AsyncKubeObject], bool], timeout: Optional[float] = None
+    ) -> bool:
+        """Reloads this object every `auto_reload_period` until `fn(self)` is
+        True. Raises `asyncio.TimeoutError` if `timeout` seconds pass first."""
+        return await asyncio.wait_for(_wait_for(self, fn), timeout)
+
+    def _reload_if_needed(self, key=None):
+        """Reads never reload an AsyncKubeObject, see `reload()`."""
+
+
+def _require_crd_names(**names: Optional[str]):
+    missing = [name for name, value in names.items() if value is None]
+    if missing:
+        raise ValueError(
+            "Asynchronous objects need their CRD names, missing: {}".format(
+                ", ".join(missing)
+            )
+        )
+
+
+async def _wait_for(obj, fn) -> bool:
+    while True:
+        await obj.reload()
+        if fn(obj):
+            return True
+
+        await asyncio.sleep(obj.auto_reload_period.total_seconds())
+
+
+async def _update_with_retries(obj, patch, read, retry_on_conflict: int):
+    """Asynchronous version of `kubeobject.conflict.update_with_retries`."""
+    changes = obj._local_changes()
+    if retry_on_conflict <= 0:
+        return await patch(changes)
+
+    attempt = 0
+    while True:
+        try:
+            return await patch(with_precondition(changes, obj._synced_obj))
+        except async_client.ApiException as e:
+            if not is_conflict(e) or attempt >= retry_on_conflict:
+                raise
+
+        attempt += 1
+        await asyncio.sleep(conflict_backoff(attempt))
+
+        obj._rebase(await read(), changes)
+        changes = obj._local_changes()
+
+
+async def _call_api(api_client: async_client.ApiClient, request: Dict) -> Dict:
+    """Sends a request built by `kubeobject.metadata`."""
+    return await api_client.call_api(**request, response_types_map={200: "object"})
+
+
+async def _server_side_apply(
+    api, group, version, namespace, plural, name, body, field_manager, force
+):
+    """Asynchronous version of `kubeobject.patch.server_side_apply`. Objects
+    created by an apply request are returned with a 201, which the generated
+    `patch_namespaced_custom_object` does not read, so the request is done
+    with its `ApiClient`."""
+    query_params = [("fieldManager", field_manager)]
+    if force:
+        query_params.append(("force", True))
+
+    return await api.api_client.call_api(
+        "/apis/{group}/{version}/namespaces/{namespace}/{plural}/{name}",
+        "PATCH",
+        path_params={
+            "group": group,
+            "version": version,
+            "namespace": namespace,
+            "plural": plural,
+            "name": name,
+        },
+        query_params=query_params,
+        header_params={
+            "Accept": "application/json",
+            "Content-Type": "application/apply-patch+yaml",
+        },
+        # Serialized as JSON, which is valid YAML, by the client.
+        body=apply_fields(body),
+        response_types_map={200: "object", 201: "object"},
+        auth_settings=["BearerToken"],
+        _return_http_data_only=True,
+    )
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+from kubeobject.clients import DEFAULT_POOL_SIZE
+
+# Requests in flight at the same time. Matches the size of the connection pool
+# of the shared clients, so calls never wait for a connection.
+DEFAULT_MAX_WORKERS = DEFAULT_POOL_SIZE
+
+
+class Result(NamedTuple):
+    """The outcome of an operation on a single object: `error` is the
+    exception it raised, or None if it succeeded."""
+
+    obj: Any
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkResults(List[Result]):
+    """The results of a bulk operation, in the same order as the objects."""
+
+    @property
+    def succeeded(self) -> List[Any]:
+        return [result.obj for result in self if result.ok]
+
+    @property
+    def failed(self) -> List[Result]:
+        return [result for result in self if not result.ok]
+
+    def raise_for_errors(self):
+        """Raises the first error found, if any."""
+        for result in self:
+            if not result.ok:
+                raise result.error
+
+
+def run_all(
+    fn: Callable[[Any], Any],
+    objs: Iterable,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> BulkResults:
+    """Calls `fn(obj)` for every object in `objs`, at most `max_workers` at a
+    time. A failure does not stop the rest of the calls, every error is
+    returned as part of the results."""
+
+    def call(obj) -> Result:
+        try:
+            fn(obj)
+        except Exception as e:
+            return Result(obj, e)
+
+        return Result(obj)
+
+    objs = list(objs)
+    if not objs:
+        return BulkResults()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(objs))) as executor:
+        return BulkResults(executor.map(call, objs))
+
+
+def create_all(objs: Iterable, max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResults:
+    """Creates every object in `objs` concurrently."""
+    return run_all(lambda obj: obj.create(), objs, max_workers)
+
+
+def update_all(objs: Iterable, max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResults:
+    """Updates every object in `objs` concurrently."""
+    return run_all(lambda obj: obj.update(), objs, max_workers)
+
+
+def delete_all(objs: Iterable, max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResults:
+    """Deletes every object in `objs` concurrently."""
+    return run_all(lambda obj: obj.delete(), objs, max_workers)
+
+
+def reload_all(objs: Iterable, max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResults:
+    """Reloads every object in `objs` concurrently."""
+    return run_all(lambda obj: obj.reload(), objs, max_workers)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import socket
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from kubernetes import client, config
+from urllib3.connection import HTTPConnection
+
+from kubeobject.flowcontrol import FlowControlledApiClient
+
+# Connections kept open to the API server by each `ApiClient`. The default in
+# the `kubernetes` client is 4, which throttles objects used from many threads.
+DEFAULT_POOL_SIZE = 32
+
+
+class ClientRegistry:
+    """ClientRegistry holds one `ApiClient` per kubeconfig context, shared by
+    every `CustomObject` and `KubeObject` that is not given an `api_client`
+    explicitly, so they all reuse the same pool of connections. Their
+    requests are rate limited, see `kubeobject.flowcontrol`.
+
+    The client for the default context (`context=None`) is built from the
+    default `kubernetes` configuration, as set by `config.load_kube_config()`
+    or `config.load_incluster_config()`, and is built again when the default
+    configuration changes.
+
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, keepalive: bool = True):
+        # Maximum number of connections to the API server per client.
+        self.pool_size = pool_size
+
+        # Enables TCP keep-alive, so idle connections in the pool are not
+        # silently dropped by load balancers in between.
+        self.keepalive = keepalive
+
+        self._clients: Dict[Optional[str], client.ApiClient] = {}
+
+        # Default configuration the client for the default context was built
+        # from.
+        self._default_configuration: Optional[client.Configuration] = None
+
+        self._lock = threading.Lock()
+
+    def get(self, context: Optional[str] = None) -> client.ApiClient:
+        """Returns the `ApiClient` for the kubeconfig `context`, or for the
+        default configuration if `context` is None."""
+        with self._lock:
+            api_client = self._clients.get(context)
+
+            if context is None:
+                default_configuration = getattr(client.Configuration, "_default", None)
+                if default_configuration is not self._default_configuration:
+                    api_client = None
+                    self._default_configuration = default_configuration
+
+            if api_client is None:
+                api_client = self._new_client(context)
+                self._clients[context] = api_client
+
+            return api_client
+
+    def _new_client(self, context: Optional[str]) -> client.ApiClient:
+        if context is None:
+            configuration = client.Configuration.get_default_copy()
+        else:
+            configuration = client.Configuration()
+            config.load_kube_config(
+                context=context,
+                client_configuration=configuration,
+                persist_config=False,
+            )
+
+        configuration.connection_pool_maxsize = self.pool_size
+        api_client = FlowControlledApiClient(configuration=configuration)
+
+        if self.keepalive:
+            api_client.rest_client.pool_manager.connection_pool_kw["socket_options"] = (
+                HTTPConnection.default_socket_options
+                + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+            )
+
+        return api_client
+
+    def configure(
+        self, pool_size: Optional[int] = None, keepalive: Optional[bool] = None
+    ):
+        """Changes the settings of the clients, which are built again the next
+        time they are needed."""
+        with self._lock:
+            if pool_size is not None:
+                self.pool_size = pool_size
+            if keepalive is not None:
+                self.keepalive = keepalive
+
+            self._clients.clear()
+            self._default_configuration = None
+
+    def clear(self):
+        """Forgets every client, new ones are built when needed."""
+        self.configure()
+
+
+# Process-wide client registry.
+api_clients = ClientRegistry()
+
+
+def get_api_client(context: Optional[str] = None) -> client.ApiClient:
+    """Returns the shared `ApiClient` for the kubeconfig `context`."""
+    return api_clients.get(context)
+
+
+# Attribute of an `ApiClient` holding its API objects, like
+# `CustomObjectsApi`, by the id of their class. They are kept on the client so
+# they are freed along with it, as the API objects themselves refer to it.
+_APIS_ATTRIBUTE = "_kubeobject_apis"
+_apis_lock = threading.Lock()
+
+
+def shared_api(api_class: type, api_client: Optional[client.ApiClient]):
+    """Returns an instance of `api_class` for `api_client`, shared by every
+    object using that client. API objects hold no state of their own."""
+    if api_client is None:
+        return api_class(api_client=api_client)
+
+    with _apis_lock:
+        apis: Dict[int, Tuple[type, Any]] = api_client.__dict__.setdefault(_APIS_ATTRIBUTE, {})
+
+        entry = apis.get(id(api_class))
+        if entry is None or entry[0] is not api_class:
+            entry = (api_class, api_class(api_client=api_client))
+            apis[id(api_class)] = entry
+
+        return entry[1]
@@ -0,0 +1,50 @@
+"""Compact representation of objects, for processes holding many of them.
+
+Keys, and the values that repeat the most across objects of the same type,
+are interned, so every object holds a reference to the same string instead of
+a copy of its own.
+"""
+from sys import intern
+from typing import Any, Dict
+
+# Values in `metadata`, as strings, that are repeated across objects.
+_INTERNED_METADATA = ("namespace", "generateName")
+
+
+def intern_keys(value: Any) -> Any:
+    """Returns a copy of `value` where every key of every nested dict is an
+    interned string."""
+    if type(value) is dict:
+        return {
+            intern(key) if type(key) is str else key: intern_keys(nested)
+            for key, nested in value.items()
+        }
+
+    if type(value) is list:
+        return [intern_keys(nested) for nested in value]
+
+    return value
+
+
+def _intern_values(obj: Dict, keys):
+    for key in keys:
+        value = obj.get(key)
+        if type(value) is str:
+            obj[key] = intern(value)
+
+
+def compact_object(obj: Dict) -> Dict:
+    """Returns a copy of `obj`, a Kubernetes object, with its keys, `kind`,
+    `apiVersion`, namespace and labels interned."""
+    obj = intern_keys(obj)
+    _intern_values(obj, ("apiVersion", "kind"))
+
+    metadata = obj.get("metadata")
+    if type(metadata) is dict:
+        _intern_values(metadata, _INTERNED_METADATA)
+
+        labels = metadata.get("labels")
+        if type(labels) is dict:
+            _intern_values(labels, list(labels))
+
+    return obj
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, Dict, Optional
+
+from kubernetes.client.rest import ApiException
+
+from kubeobject.patch import resource_version
+
+HTTP_STATUS_CONFLICT = 409
+
+# Bounds, in seconds, of the wait between conflicting updates.
+CONFLICT_BACKOFF_BASE = 0.05
+CONFLICT_BACKOFF_MAX = 1.0
+
+
+def with_precondition(changes: Dict, synced_obj: Optional[Dict]) -> Dict:
+    """Returns `changes` including the `resourceVersion` of `synced_obj`, so
+    the API server rejects it with a 409 Conflict if the object has been
+    modified by somebody else since."""
+    version = resource_version(synced_obj)
+    if version is None:
+        return changes
+
+    metadata = dict(changes.get("metadata") or {}, resourceVersion=version)
+    return dict(changes, metadata=metadata)
+
+
+def conflict_backoff(attempt: int) -> float:
+    """Returns the seconds to wait before retrying an update for the
+    `attempt`th time, growing exponentially up to `CONFLICT_BACKOFF_MAX`."""
+    backoff = min(CONFLICT_BACKOFF_BASE * 2 ** (attempt - 1), CONFLICT_BACKOFF_MAX)
+
+    # Jitter, so workers conflicting with each other don't retry in lockstep.
+    return backoff * random.uniform(0.5, 1)
+
+
+def is_conflict(e: Exception) -> bool:
+    return getattr(e, "status", None) == HTTP_STATUS_CONFLICT
+
+
+def update_with_retries(
+    obj,
+    patch: Callable[[Dict], Dict],
+    read: Callable[[], Dict],
+    retry_on_conflict: int,
+) -> Dict:
+    """Sends the local changes of `obj` with `patch` and returns the updated
+    object, as returned by the API.
+
+    `obj` is a `CustomObject` or a `KubeObject`. With `retry_on_conflict`
+    set, the changes are sent with a `resourceVersion` precondition; on a
+    409 Conflict the object is read again with `read`, the local changes are
+    replayed on top of it and the update is retried, at most
+    `retry_on_conflict` times.
+    """
+    changes = obj._local_changes()
+    if retry_on_conflict <= 0:
+        return patch(changes)
+
+    attempt = 0
+    while True:
+        try:
+            return patch(with_precondition(changes, obj._synced_obj))
+        except ApiException as e:
+            if not is_conflict(e) or attempt >= retry_on_conflict:
+                raise
+
+        attempt += 1
+        time.sleep(conflict_backoff(attempt))
+
+        obj._rebase(read(), changes)
+        changes = obj._local_changes()
@@ -0,0 +1,183 @@
+"""Copy-on-write containers for the state of Kubernetes objects.
+
+Objects returned by the Kubernetes API are kept untouched as the last synced
+state of a `CustomObject` or `KubeObject`, and are wrapped by the containers
+in this module to be used as the working copy. Nested dicts and lists are
+shared with the original object until they are accessed; then only that level
+is copied. Objects that are mostly read, or changed in a few places, are never
+copied as a whole.
+"""
+import copy
+
+from box import Box, BoxList
+
+_CONTAINERS = (dict, list)
+
+
+def wrap(value):
+    """Returns `value` wrapped in a copy-on-write container, if it is a plain
+    dict or list."""
+    if type(value) is dict:
+        return CowDict(value)
+    if type(value) is list:
+        return CowList(value)
+
+    return value
+
+
+class CowDict(dict):
+    """A dict sharing its nested dicts and lists with `source`, until they
+    are accessed. `source` is never modified."""
+
+    __slots__ = ("_shared",)
+
+    def __init__(self, source=()):
+        dict.__init__(self, source)
+
+        # Keys of values that are still shared with `source`.
+        self._shared = {key for key, value in dict.items(self) if type(value) in _CONTAINERS}
+
+    def _own(self, key):
+        value = dict.__getitem__(self, key)
+        if key in self._shared:
+            self._shared.discard(key)
+            value = wrap(value)
+            dict.__setitem__(self, key, value)
+
+        return value
+
+    def __getitem__(self, key):
+        if key in self._shared:
+            return self._own(key)
+
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        self._shared.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._shared.discard(key)
+        dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+
+        return default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+
+        self[key] = default
+        return default
+
+    def pop(self, key, *args):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        if key in self._shared:
+            self._shared.discard(key)
+            value = wrap(value)
+
+        return key, value
+
+    def clear(self):
+        self._shared.clear()
+        dict.clear(self)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        return CowDict(self)
+
+    def __copy__(self):
+        return CowDict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(dict.items(self)), memo)
+
+    def __reduce__(self):
+        return dict, (dict(dict.items(self)),)
+
+
+class CowList(list):
+    """A list which elements are copy-on-write copies of the elements in
+    `source`. `source` is never modified."""
+
+    __slots__ = ()
+
+    def __init__(self, source=()):
+        list.__init__(self, (wrap(value) for value in source))
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+class CowBox(Box):
+    """A `Box` that converts nested dicts and lists into boxes only when they
+    are accessed, instead of converting the whole tree on creation. As with
+    `Box`, the dict it is created from is never modified."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs["box_intact_types"] = _CONTAINERS
+        super().__init__(*args, **kwargs)
+
+    def __getitem__(self, item, _ignore_default=False):
+        value = super().__getitem__(item, _ignore_default=_ignore_default)
+
+        if type(value) is dict:
+            value = self.__class__(value, **self._box_options())
+            dict.__setitem__(self, item, value)
+        elif type(value) is list:
+            # Elements of a list are converted right away, each of them into
+            # a CowBox that converts its own values lazily.
+            options = self._box_options()
+            options["box_intact_types"] = ()
+            value = BoxList(value, **options)
+            dict.__setitem__(self, item, value)
+
+        return value
+
+    def _box_options(self):
+        return {
+            key: value
+            for key, value in self._box_config.items()
+            if not key.startswith("__")
+        }
+
+    def items(self, dotted=False):
+        if dotted:
+            return super().items(dotted=True)
+
+        return [(key, self[key]) for key in dict.keys(self)]
+
+    def values(self):
+        return [self[key] for key in dict.keys(self)]
+
+    def to_dict(self):
+        """Returns a copy of this Box as native python dicts and lists."""
+        out_dict = super().to_dict()
+        for key, value in out_dict.items():
+            if type(value) in _CONTAINERS:
+                out_dict[key] = copy.deepcopy(value)
+
+        return out_dict
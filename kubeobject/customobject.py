@@ -1,11 +1,48 @@
 from __future__ import annotations
 
+import copy
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from sys import intern
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
-import yaml
 from kubernetes import client
 
+from kubeobject import serialization
+from kubeobject.clients import get_api_client, shared_api
+from kubeobject.compact import compact_object
+from kubeobject.conflict import update_with_retries
+from kubeobject.cow import CowDict
+from kubeobject.discovery import crd_cache
+from kubeobject.fastio import RawCustomObjectsApi
+from kubeobject.informer import get_informer
+from kubeobject.instrumentation import api_call, auto_reloading
+from kubeobject.metadata import list_objects_metadata, read_object_metadata
+from kubeobject.patch import (
+    apply_merge_patch,
+    merge_patch,
+    resource_version,
+    server_side_apply,
+)
+from kubeobject.wait import wait_until
+
+HTTP_STATUS_NOT_FOUND = 404
+
+# Shared by every object, timedeltas are immutable.
+DEFAULT_AUTO_RELOAD_PERIOD = timedelta(seconds=2)
+
 
 class CustomObject:
     """CustomObject is an object mapping to a Custom Resource in Kubernetes. It
@@ -17,6 +54,48 @@ class CustomObject:
 
     """
 
+    # Instances keep their attributes in slots, so large numbers of them take
+    # less memory. Their `__dict__` is only allocated when an attribute of
+    # their own is set, as in `obj.my_tag = 1`.
+    __slots__ = (
+        "name",
+        "namespace",
+        "kind",
+        "plural",
+        "group",
+        "version",
+        "bound",
+        "auto_save",
+        "auto_save_delay",
+        "_batch_depth",
+        "_save_pending",
+        "_save_timer",
+        "_save_error",
+        "_lock",
+        "auto_reload",
+        "auto_reload_period",
+        "auto_reload_status",
+        "use_informer",
+        "_informer_obj",
+        "last_update",
+        "_synced_obj",
+        "changed_since_last_reload",
+        "api_client",
+        "api",
+        "backing_obj",
+        "__dict__",
+        "__weakref__",
+    )
+
+    # Set `compact` to `True`, on a class, to intern the keys and the most
+    # repeated values of its objects, when holding many of them in memory.
+    compact = False
+
+    # Set `fast_io` to `True`, on a class, to send and read the JSON of its
+    # objects directly, skipping the (de)serialization layers of the generated
+    # client; see `kubeobject.fastio`. It is read when objects are created.
+    fast_io = False
+
     def __init__(
         self,
         name: str,
@@ -28,7 +107,12 @@ class CustomObject:
         api_client: Optional[client.ApiClient] = None,
     ):
         self.name = name
-        self.namespace = namespace
+        self.namespace = namespace if namespace is None else intern(namespace)
+
+        if api_client is None:
+            # Objects share the same `ApiClient`, and its pool of connections,
+            # unless told otherwise.
+            api_client = get_api_client()
 
         if any(value is None for value in (plural, kind, group, version)):
             # It is possible to have a CustomObject where some of the initial values are set
@@ -42,15 +126,17 @@ class CustomObject:
                 version=version,
                 api_client=api_client,
             )
-            self.kind = crd.spec.names.kind
-            self.plural = crd.spec.names.plural
-            self.group = crd.spec.group
-            self.version = crd.spec.version
-        else:
-            self.kind = kind
-            self.plural = plural
-            self.group = group
-            self.version = version
+            kind = crd.spec.names.kind
+            plural = crd.spec.names.plural
+            group = crd.spec.group
+            version = crd.spec.version
+
+        # These are the same for every object of a type, and are interned to be
+        # shared by them.
+        self.kind = intern(kind)
+        self.plural = intern(plural)
+        self.group = intern(group)
+        self.version = intern(version)
 
         # True if this object is backed by a Kubernetes object, this is, it has
         # been loaded or saved from/to Kubernetes API.
@@ -60,6 +146,24 @@ class CustomObject:
         # attributes is changed.
         self.auto_save = False
 
+        # If `auto_save_delay` is set, `auto_save` waits for this long without
+        # further changes before updating the object, so bursts of changes are
+        # saved with a single update.
+        self.auto_save_delay: Optional[timedelta] = None
+
+        # Pending `auto_save`, deferred by `batch()` or `auto_save_delay`.
+        self._batch_depth = 0
+        self._save_pending = False
+        self._save_timer: Optional[threading.Timer] = None
+
+        # Error raised by an update run by the `auto_save_delay` timer,
+        # raised again by the next `flush()`.
+        self._save_error: Optional[Exception] = None
+
+        # Serializes updates with the changes made through `__setitem__`, as
+        # `auto_save_delay` updates the object from a timer thread.
+        self._lock = threading.RLock()
+
         # Set `auto_reload` to `True` if it needs to be reloaded before every
         # read of an attribute. This considers the `auto_reload_period`
         # attribute at the same time.
@@ -67,13 +171,33 @@ class CustomObject:
 
         # If `auto_reload` is set, it will not reload if less time than
         # `auto_reload_period` has passed since last read.
-        self.auto_reload_period = timedelta(seconds=2)
+        self.auto_reload_period = DEFAULT_AUTO_RELOAD_PERIOD
+
+        # Set `auto_reload_status` to `True`, with `auto_reload`, to only
+        # reload the status, from the status subresource, when it is the key
+        # being read.
+        self.auto_reload_status = False
+
+        # Set `use_informer` to `True` to serve `auto_reload` reads from a
+        # shared, watch-backed `Informer` instead of polling the API.
+        self.use_informer = False
+        self._informer_obj = None
 
         # Last time this object was updated
         self.last_update: datetime = None
 
-        # Sets the API used for this particular type of object
-        self.api = client.CustomObjectsApi(api_client=api_client)
+        # Copy of this object as it was last read from, or written to,
+        # Kubernetes. Used to send only what has changed since then on `update()`.
+        self._synced_obj: Optional[Dict] = None
+
+        # False if the last reload found the object at the same
+        # `resourceVersion` it already had, so nothing had to be done.
+        self.changed_since_last_reload = False
+
+        # Sets the API used for this particular type of object, shared with
+        # every other object using the same client.
+        self.api_client = api_client
+        self.api = shared_api(self._api_class(), api_client)
 
         if not hasattr(self, "backing_obj"):
             self.backing_obj = {
@@ -84,62 +208,292 @@ class CustomObject:
                 "status": {},
             }
 
-    def load(self) -> CustomObject:
-        """Loads this object from the API."""
+    # Initializes the instances of the classes created with `define()`.
+    # Subclasses with an `__init__` of their own signature keep this one.
+    _define_init = __init__
 
-        obj = self.api.get_namespaced_custom_object(
-            self.group, self.version, self.namespace, self.plural, self.name
-        )
+    def load(self) -> CustomObject:
+        """Loads this object from the API. If it has not changed since it was
+        last loaded or saved, the current state is kept as is."""
 
-        self.backing_obj = obj
-        self.bound = True
+        with api_call("get", self.kind):
+            obj = self.api.get_namespaced_custom_object(
+                self.group, self.version, self.namespace, self.plural, self.name
+            )
 
-        self._register_updated()
+        self._bind_if_changed(obj)
         return self
 
+    def exists(self) -> bool:
+        """Returns True if this object exists in Kubernetes. Only its
+        metadata is read."""
+        try:
+            self.load_metadata()
+        except client.ApiException as e:
+            if e.status == HTTP_STATUS_NOT_FOUND:
+                return False
+            raise
+
+        return True
+
+    def load_metadata(self) -> Dict:
+        """Returns the `metadata` of this object, as it is in Kubernetes,
+        without reading its spec and status. The object itself is not
+        changed."""
+        with api_call("get_metadata", self.kind):
+            return read_object_metadata(
+                self.api.api_client,
+                self.group,
+                self.version,
+                self.namespace,
+                self.plural,
+                self.name,
+            )
+
     def create(self) -> CustomObject:
         """Creates this object in Kubernetes."""
-        obj = self.api.create_namespaced_custom_object(
-            self.group, self.version, self.namespace, self.plural, self.backing_obj
-        )
+        with api_call("create", self.kind):
+            obj = self.api.create_namespaced_custom_object(
+                self.group, self.version, self.namespace, self.plural, self.backing_obj
+            )
 
-        self.backing_obj = obj
-        self.bound = True
+        self._bind(obj)
+        return self
+
+    def update(self, retry_on_conflict: int = 0) -> CustomObject:
+        """Updates the object in Kubernetes. Only the changes made since the
+        object was last loaded or saved are sent, as a JSON merge patch.
+
+        If `retry_on_conflict` is set, the update only succeeds if the object
+        was not modified by somebody else in the meantime. Otherwise it is
+        loaded again, the local changes are applied on top of it, and the
+        update is retried up to `retry_on_conflict` times.
+        """
+
+        def patch(body: Dict) -> Dict:
+            with api_call("patch", self.kind):
+                return self.api.patch_namespaced_custom_object(
+                    self.group, self.version, self.namespace, self.plural, self.name, body
+                )
+
+        def read() -> Dict:
+            with api_call("get", self.kind):
+                return self.api.get_namespaced_custom_object(
+                    self.group, self.version, self.namespace, self.plural, self.name
+                )
+
+        with self._lock:
+            sent = []
+
+            def send(body: Dict) -> Dict:
+                sent.append(copy.deepcopy(body))
+                return patch(body)
+
+            obj = update_with_retries(self, send, read, retry_on_conflict)
+
+            # Changes made, to nested values, while the request was in
+            # flight are kept as local changes.
+            saved = apply_merge_patch(self._synced_obj or {}, sent[-1])
+            changes = merge_patch(saved, self.backing_obj)
+            if changes:
+                self._rebase(obj, changes)
+            else:
+                self._bind(obj)
 
-        self._register_updated()
         return self
 
-    def update(self) -> CustomObject:
-        """Updates the object in Kubernetes."""
-        obj = self.api.patch_namespaced_custom_object(
-            self.group,
-            self.version,
-            self.namespace,
-            self.plural,
-            self.name,
+    def reload_status(self) -> CustomObject:
+        """Reloads the status of this object, through its status subresource.
+        Changes made locally to the rest of the object are kept."""
+        with api_call("get_status", self.kind):
+            obj = self.api.get_namespaced_custom_object_status(
+                self.group, self.version, self.namespace, self.plural, self.name
+            )
+
+        self._bind_status(obj)
+        return self
+
+    def _bind_status(self, obj: Dict):
+        """Takes the status of `obj`, as read from the status subresource,
+        keeping the local changes to the rest of the object."""
+        if self._synced_obj is None:
+            self.changed_since_last_reload = True
+            self._bind(obj)
+            return
+
+        self.changed_since_last_reload = obj.get("status") != self._synced_obj.get("status")
+        if not self.changed_since_last_reload:
+            self._register_updated()
+            return
+
+        # Only the status is taken from `obj`; the rest of the synced state,
+        # including its `resourceVersion`, stays as it was last loaded.
+        synced = dict(self._synced_obj)
+        synced.pop("status", None)
+        if "status" in obj:
+            synced["status"] = obj["status"]
+
+        self._rebase(synced, _without_status(self._local_changes()))
+
+    def update_status(self) -> CustomObject:
+        """Updates the status of this object in Kubernetes, through its status
+        subresource. Only the changes made to the status since the object was
+        last loaded or saved are sent, as a JSON merge patch; changes to the
+        rest of the object are kept locally, to be saved with `update()`."""
+        changes = self._local_changes()
+        body = _status_patch(changes)
+
+        with api_call("patch_status", self.kind):
+            obj = self.api.patch_namespaced_custom_object_status(
+                self.group, self.version, self.namespace, self.plural, self.name, body
+            )
+
+        self._rebase(obj, _without_status(changes))
+        return self
+
+    def apply(self, field_manager: str = "kubeobject", force: bool = False) -> CustomObject:
+        """Creates or updates this object in Kubernetes with a single
+        server-side apply request. `field_manager` owns the fields being set,
+        `force` takes the ownership of fields managed by somebody else."""
+        body = dict(
             self.backing_obj,
+            apiVersion="{}/{}".format(self.group, self.version),
+            kind=self.kind,
         )
 
-        self.backing_obj = obj
+        with api_call("apply", self.kind):
+            obj = server_side_apply(
+                self.api,
+                self.group,
+                self.version,
+                self.namespace,
+                self.plural,
+                self.name,
+                body,
+                field_manager=field_manager,
+                force=force,
+            )
 
-        self._register_updated()
+        self._bind(obj)
         return self
 
+    @classmethod
+    def _api_class(cls) -> type:
+        if cls.fast_io:
+            return RawCustomObjectsApi
+
+        return client.CustomObjectsApi
+
+    def _local_changes(self) -> Dict:
+        """Returns a merge patch with the changes made to this object since it
+        was last loaded or saved. Everything is a change if it never was."""
+        if self._synced_obj is None:
+            return self.backing_obj
+
+        return merge_patch(self._synced_obj, self.backing_obj)
+
+    def _bind(self, obj: Dict):
+        """Sets `obj`, as returned by the Kubernetes API, as the state of
+        this object."""
+
+        if self.compact:
+            obj = compact_object(obj)
+
+        # `obj` is kept as is, as the last synced state, and the working copy
+        # only copies the parts of it that are accessed.
+        self.backing_obj = CowDict(obj)
+        self._synced_obj = obj
+        self.bound = True
+
+        self._register_updated()
+
+    def _rebase(self, obj: Dict, changes: Dict):
+        """Binds `obj`, and applies `changes` on top of it as local changes."""
+        self._bind(obj)
+        self.backing_obj = CowDict(apply_merge_patch(obj, changes))
+
+    def _restore_changes(self, changes: Dict):
+        """Discards the local changes, except for `changes`."""
+        if self._synced_obj is None:
+            self.backing_obj = CowDict(changes)
+        else:
+            self.backing_obj = CowDict(apply_merge_patch(self._synced_obj, changes))
+
+    def _bind_if_changed(self, obj: Dict):
+        """Binds `obj`, as read from the Kubernetes API, unless it has the same
+        `resourceVersion` as the last synced state and there are no local
+        changes to discard."""
+        version = resource_version(obj)
+        unchanged = (
+            version is not None
+            and version == resource_version(self._synced_obj)
+            and not self._local_changes()
+        )
+
+        self.changed_since_last_reload = not unchanged
+        if unchanged:
+            self._register_updated()
+        else:
+            self._bind(obj)
+
     def _register_updated(self):
         """Register the last time the object was updated from Kubernetes."""
         self.last_update = datetime.now()
 
-    def _reload_if_needed(self):
+    def _reload_if_needed(self, key=None):
         """Reloads the object is `self.auto_reload` is set to `True` and more than
-        `self.auto_reload_period` time has passed since last reload."""
+        `self.auto_reload_period` time has passed since last reload. With
+        `self.auto_reload_status` set, only the status is reloaded when `key`,
+        the key being read, is "status"."""
         if not self.auto_reload:
             return
 
-        if self.last_update is None:
-            self.reload()
+        if self.use_informer and self._reload_from_informer():
+            return
+
+        reload = self.reload
+        if self.auto_reload_status and key == "status":
+            reload = self.reload_status
+
+        with auto_reloading():
+            if self.last_update is None:
+                reload()
+
+            if datetime.now() - self.last_update > self.auto_reload_period:
+                reload()
+
+    def _reload_from_informer(self) -> bool:
+        """Updates this object from the shared `Informer` for its type, this
+        does not make any request to the API once the `Informer` is synced.
+        Returns False, so the object is reloaded directly instead, if the
+        `Informer` has not synced yet, has failed to, or does not have this
+        object."""
+        informer = get_informer(
+            self.group,
+            self.version,
+            self.plural,
+            self.namespace,
+            api_client=self.api_client,
+        )
+
+        try:
+            obj = informer.get(self.name, timeout=0)
+        except Exception:
+            # Not synced yet, or its LIST failed
+            return False
+
+        if obj is None:
+            # Deleted, not created yet or not seen by the Informer yet
+            return False
+
+        if obj is self._informer_obj:
+            return True
 
-        if datetime.now() - self.last_update > self.auto_reload_period:
-            self.reload()
+        # Objects in the Informer's store are shared, but `_bind` never
+        # modifies them.
+        self._informer_obj = obj
+        self._bind_if_changed(obj)
+        return True
 
     @classmethod
     def from_yaml(cls, yaml_file, name=None, namespace=None):
@@ -147,8 +501,64 @@ class CustomObject:
         `namespace` are optional in this function's signature, because they
         might be passed as part of the `yaml_file` document.
         """
-        doc = yaml.safe_load(open(yaml_file))
+        with open(yaml_file) as stream:
+            doc = serialization.load(stream, as_json=serialization.is_json(yaml_file))
 
+        return cls._from_dict(doc, name, namespace)
+
+    @classmethod
+    def iter_yaml(
+        cls,
+        path_or_stream: Union[str, IO],
+        namespace: Optional[str] = None,
+        classes: Iterable[Type[CustomObject]] = (),
+    ) -> Iterator[CustomObject]:
+        """Yields a `CustomObject` for every document in a multi-document yaml
+        file, or stream. Documents are parsed one at a time, so big files are
+        never fully loaded in memory.
+
+        Each object is an instance of the class in `classes`, created with
+        `define()`, for the document's `apiVersion` and `kind`, if there is
+        one, or of this class otherwise. `namespace` is used for documents
+        that don't have one. Files ending in `.json` are read as JSON.
+        """
+        by_kind = _classes_by_kind(classes)
+
+        if isinstance(path_or_stream, str):
+            with open(path_or_stream) as stream:
+                docs = serialization.load_all(
+                    stream, as_json=serialization.is_json(path_or_stream)
+                )
+                yield from cls._iter_docs(docs, namespace, by_kind)
+            return
+
+        yield from cls._iter_docs(
+            serialization.load_all(path_or_stream), namespace, by_kind
+        )
+
+    @classmethod
+    def _iter_docs(
+        cls,
+        docs: Iterable[Optional[Dict]],
+        namespace: Optional[str],
+        by_kind: Dict[Tuple[str, str], Type[CustomObject]],
+    ) -> Iterator[CustomObject]:
+        for doc in docs:
+            if doc is None:
+                # Empty documents, as in a trailing `---`
+                continue
+
+            klass = by_kind.get((doc.get("apiVersion"), doc.get("kind")))
+            if klass is None:
+                klass = CustomObject if cls._is_defined() else cls
+
+            doc_namespace = doc.get("metadata", {}).get("namespace") or namespace
+            yield klass._from_dict(doc, namespace=doc_namespace)
+
+    @classmethod
+    def _from_dict(cls, doc: Dict, name=None, namespace=None):
+        """Creates a `CustomObject` from `doc`, a Custom Resource as a dict.
+        `name` and `namespace` are taken from `doc` unless passed."""
         if "metadata" not in doc:
             doc["metadata"] = dict()
 
@@ -184,7 +594,7 @@ class CustomObject:
             group = None
             version = api_version
 
-        if getattr(cls, "object_names_initialized", False):
+        if cls._is_defined():
             obj = cls(name, namespace)
         else:
             obj = cls(name, namespace, kind=kind, group=group, version=version)
@@ -193,6 +603,16 @@ class CustomObject:
 
         return obj
 
+    def to_yaml(self, stream: Optional[IO] = None) -> Optional[str]:
+        """Serializes this object as a YAML document, written to `stream` if
+        passed, or returned as a string otherwise."""
+        return serialization.dump(self.backing_obj, stream)
+
+    @classmethod
+    def _is_defined(cls) -> bool:
+        """True if this class was created with `define()`."""
+        return getattr(cls, "object_names_initialized", False)
+
     @classmethod
     def define(
         cls: CustomObject,
@@ -202,6 +622,7 @@ class CustomObject:
         group: Optional[str] = None,
         version: Optional[str] = None,
         api_client: Optional[client.ApiClient] = None,
+        compact: bool = False,
     ):
         """Defines a new class that will hold a particular type of object.
 
@@ -210,18 +631,17 @@ class CustomObject:
         needs to be implemented. If your particular use case requires more
         control or more complex behaviour on top of the CustomObject class,
         consider subclassing it.
+
+        Pass `compact=True` to keep the objects of the new class in the
+        compact layout, see `CustomObject.compact`.
         """
 
         def __init__(self, name, namespace, **kwargs):
-            CustomObject.__init__(
-                self,
+            self._define_init(
                 name,
                 namespace,
-                kind=kind,
-                plural=plural,
-                group=group,
-                version=version,
                 api_client=api_client,
+                **self._crd_names,
             )
 
         def __repr__(self):
@@ -231,23 +651,183 @@ class CustomObject:
                 namespace=repr(self.namespace),
             )
 
-        return type(
+        klass = type(
             name,
-            (CustomObject,),
+            (cls,),
             {
                 "object_names_initialized": True,
+                "_crd_names": {
+                    "kind": kind,
+                    "plural": plural,
+                    "group": group,
+                    "version": version,
+                },
+                "_crd_api_client": api_client,
+                "compact": compact or cls.compact,
                 "__init__": __init__,
                 "__repr__": __repr__,
             },
         )
 
+        return klass
+
+    @classmethod
+    def _defined_names(cls) -> Dict[str, str]:
+        """Returns the CRD names of a class created with `define()`, looking
+        for the missing ones in the API only the first time."""
+        if not cls._is_defined():
+            raise ValueError(
+                "This operation is only supported in classes created with `define()`."
+            )
+
+        names = cls._crd_names
+        if any(value is None for value in names.values()):
+            crd = get_crd_names(api_client=cls._class_api_client(), **names)
+            cls._crd_names = names = {
+                "kind": crd.spec.names.kind,
+                "plural": crd.spec.names.plural,
+                "group": crd.spec.group,
+                "version": crd.spec.version,
+            }
+
+        return names
+
+    @classmethod
+    def _class_api_client(cls) -> client.ApiClient:
+        """Returns the `ApiClient` passed to `define()`, or the shared one."""
+        return cls._crd_api_client or get_api_client()
+
+    @classmethod
+    def load_many(
+        cls,
+        namespace: Optional[str] = None,
+        names: Optional[Iterable[str]] = None,
+        label_selector: Optional[str] = None,
+    ) -> List[CustomObject]:
+        """Loads every object of this class from `namespace`, or from all
+        namespaces if `namespace` is None, with a single LIST request.
+
+        Only objects named in `names` or matching `label_selector` are returned,
+        when provided.
+        """
+        response = cls._list(namespace, label_selector=label_selector)
+
+        return cls._from_items(response["items"], names)
+
+    @classmethod
+    def iter_all(
+        cls,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        page_size: int = 500,
+    ) -> Iterator[CustomObject]:
+        """Yields every object of this class in `namespace`, or in all
+        namespaces if `namespace` is None, matching `label_selector` if
+        passed.
+
+        Objects are listed `page_size` at a time, and the next page is only
+        requested once the objects in the current one have been consumed, so
+        any number of objects can be iterated over with bounded memory.
+        """
+        _continue = None
+        while True:
+            response = cls._list(
+                namespace,
+                label_selector=label_selector,
+                limit=page_size,
+                _continue=_continue,
+            )
+
+            for item in response["items"]:
+                yield cls._from_item(item)
+
+            _continue = response.get("metadata", {}).get("continue")
+            if not _continue:
+                return
+
+    @classmethod
+    def list_metadata(
+        cls,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        page_size: int = 500,
+    ) -> List[Dict]:
+        """Returns the `metadata` of every object of this class in
+        `namespace`, or in all namespaces, matching `label_selector` if
+        passed. Their spec and status are not read."""
+        crd = cls._defined_names()
+        api_client = shared_api(cls._api_class(), cls._class_api_client()).api_client
+
+        metadata = []
+        _continue = None
+        while True:
+            with api_call("list_metadata", crd["kind"]):
+                response = list_objects_metadata(
+                    api_client,
+                    crd["group"],
+                    crd["version"],
+                    namespace,
+                    crd["plural"],
+                    label_selector=label_selector,
+                    limit=page_size,
+                    _continue=_continue,
+                )
+
+            metadata.extend(item["metadata"] for item in response["items"])
+
+            _continue = response.get("metadata", {}).get("continue")
+            if not _continue:
+                return metadata
+
+    @classmethod
+    def _list(cls, namespace: Optional[str], **kwargs) -> Dict:
+        """Lists the objects of this class in `namespace`, or in all
+        namespaces. `kwargs` are passed to the list call."""
+        crd = cls._defined_names()
+        api = shared_api(cls._api_class(), cls._class_api_client())
+
+        with api_call("list", crd["kind"]):
+            if namespace is None:
+                return api.list_cluster_custom_object(
+                    crd["group"], crd["version"], crd["plural"], **kwargs
+                )
+
+            return api.list_namespaced_custom_object(
+                crd["group"], crd["version"], namespace, crd["plural"], **kwargs
+            )
+
+    @classmethod
+    def _from_items(
+        cls, items: List[Dict], names: Optional[Iterable[str]] = None
+    ) -> List[CustomObject]:
+        """Returns instances of this class bound to the listed `items`, only
+        to those named in `names` if passed."""
+        if names is not None:
+            names = set(names)
+
+        return [
+            cls._from_item(item)
+            for item in items
+            if names is None or item["metadata"]["name"] in names
+        ]
+
+    @classmethod
+    def _from_item(cls, item: Dict) -> CustomObject:
+        """Returns an instance of this class bound to `item`, as listed."""
+        metadata = item["metadata"]
+        obj = cls(metadata["name"], metadata.get("namespace"))
+        obj._bind(item)
+
+        return obj
+
     def delete(self):
         """Deletes the object from Kubernetes."""
         body = client.V1DeleteOptions()
 
-        self.api.delete_namespaced_custom_object(
-            self.group, self.version, self.namespace, self.plural, self.name, body=body
-        )
+        with api_call("delete", self.kind):
+            self.api.delete_namespaced_custom_object(
+                self.group, self.version, self.namespace, self.plural, self.name, body=body
+            )
 
         self._register_updated()
 
@@ -255,20 +835,143 @@ class CustomObject:
         """Reloads the object from the Kubernetes API."""
         return self.load()
 
+    def wait_for(
+        self,
+        fn: Callable[[CustomObject], bool],
+        timeout: Optional[float] = None,
+        reload: str = "watch",
+    ) -> bool:
+        """Waits until `fn(self)` is True. The object is kept up to date with a
+        watch (`reload="watch"`) or by reloading it every `auto_reload_period`
+        (`reload="poll"`). Raises `WaitTimeoutException` after `timeout`
+        seconds."""
+        return wait_until(
+            self,
+            fn,
+            timeout,
+            reload,
+            self.group,
+            self.version,
+            self.namespace,
+            self.plural,
+        )
+
     def __getitem__(self, key):
-        self._reload_if_needed()
+        self._reload_if_needed(key)
 
         return self.backing_obj[key]
 
     def __contains__(self, key):
-        self._reload_if_needed()
+        self._reload_if_needed(key)
         return key in self.backing_obj
 
     def __setitem__(self, key, val):
-        self.backing_obj[key] = val
+        with self._lock:
+            self.backing_obj[key] = val
+
+            if self.bound and self.auto_save:
+                self._auto_save()
+
+    def _auto_save(self):
+        if self._batch_depth > 0:
+            self._save_pending = True
+            return
 
-        if self.bound and self.auto_save:
+        if self.auto_save_delay is None:
             self.update()
+            return
+
+        self._save_pending = True
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+
+        self._save_timer = threading.Timer(
+            self.auto_save_delay.total_seconds(), self._flush_from_timer
+        )
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            self._save_error = e
+
+    def flush(self):
+        """Saves the changes deferred by `batch()` or `auto_save_delay`, if
+        any, right away. Raises the error of the last deferred save, if it
+        failed; its changes are saved again by the next `flush()`."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+
+            error, self._save_error = self._save_error, None
+            if error is not None:
+                raise error
+
+            if self._save_pending:
+                self._save_pending = False
+                try:
+                    self.update()
+                except Exception:
+                    self._save_pending = True
+                    raise
+
+    @contextmanager
+    def batch(self):
+        """Within this context `auto_save` is deferred, and all the changes
+        are saved with a single update on exit. If the block raises an
+        exception, the changes made within it are discarded instead.
+
+            with obj.batch():
+                obj["spec"] = {...}
+                obj["metadata"] = {...}
+        """
+        outermost = self._batch_depth == 0
+        if outermost:
+            # Restored if the block raises
+            changes = copy.deepcopy(self._local_changes())
+            save_pending = self._save_pending
+
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if outermost:
+                with self._lock:
+                    self._restore_changes(changes)
+                    self._save_pending = save_pending
+            raise
+        finally:
+            self._batch_depth -= 1
+
+        if self._batch_depth == 0:
+            self.flush()
+
+
+def _status_patch(changes: Dict) -> Dict:
+    """Returns the changes to the status in `changes`, to be sent to the
+    status subresource."""
+    return {"status": changes["status"]} if "status" in changes else {}
+
+
+def _without_status(changes: Dict) -> Dict:
+    return {key: value for key, value in changes.items() if key != "status"}
+
+
+def _classes_by_kind(
+    classes: Iterable[Type[CustomObject]],
+) -> Dict[Tuple[str, str], Type[CustomObject]]:
+    """Indexes classes created with `define()` by the `apiVersion` and `kind`
+    of the objects they hold."""
+    by_kind = {}
+    for klass in classes:
+        names = klass._defined_names()
+        api_version = "{}/{}".format(names["group"], names["version"])
+        by_kind[(api_version, names["kind"])] = klass
+
+    return by_kind
 
 
 def get_crd_names(
@@ -278,33 +981,12 @@ def get_crd_names(
     version: Optional[str] = None,
     api_client: Optional[client.ApiClient] = None,
 ) -> Optional[Dict]:
-    """Gets the CRD entry that matches all the parameters passed."""
-    #
-    # TODO: Update to `client.ApiextensionsV1Api()`
-    #
-    api = client.ApiextensionsV1beta1Api(api_client=api_client)
-
+    """Gets the CRD entry that matches all the parameters passed. CRDs are
+    cached for the whole process, or read from local manifests, see
+    `kubeobject.discovery.crd_cache` and `CRDRegistry`."""
     if plural == kind == group == version is None:
         return None
 
-    crds = api.list_custom_resource_definition()
-    for crd in crds.items:
-        found = True
-        if group != "":
-            if crd.spec.group != group:
-                found = False
-
-        if version != "":
-            if crd.spec.version != version:
-                found = False
-
-        if kind is not None:
-            if crd.spec.names.kind != kind:
-                found = False
-
-        if plural is not None:
-            if crd.spec.names.plural != plural:
-                found = False
-
-        if found:
-            return crd
+    return crd_cache.find(
+        plural=plural, kind=kind, group=group, version=version, api_client=api_client
+    )
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from kubernetes import client
+
+from kubeobject import serialization
+from kubeobject.clients import get_api_client
+from kubeobject.instrumentation import api_call
+
+CRD_KIND = "CustomResourceDefinition"
+
+# `kind` of the index files written by `CRDRegistry.save_index()`.
+CRD_INDEX_KIND = "CRDIndex"
+
+# Files read by `CRDRegistry.from_directory()`.
+MANIFEST_PATTERNS = ("*.yaml", "*.yml", "*.json")
+
+
+class _CRDIndex:
+    """A list of CRDs indexed by kind, plural, group and version."""
+
+    def __init__(self, crds: List):
+        self.crds = crds
+        self.created = datetime.now()
+
+        self.by_kind = defaultdict(list)
+        self.by_plural = defaultdict(list)
+        self.by_group = defaultdict(list)
+        self.by_version = defaultdict(list)
+
+        for crd in crds:
+            self.by_kind[crd.spec.names.kind].append(crd)
+            self.by_plural[crd.spec.names.plural].append(crd)
+            self.by_group[crd.spec.group].append(crd)
+            self.by_version[crd.spec.version].append(crd)
+
+    def find(self, plural, kind, group, version):
+        """Returns the first CRD that matches all the parameters passed."""
+        if kind is not None:
+            candidates = self.by_kind.get(kind, [])
+        elif plural is not None:
+            candidates = self.by_plural.get(plural, [])
+        elif group != "":
+            candidates = self.by_group.get(group, [])
+        elif version != "":
+            candidates = self.by_version.get(version, [])
+        else:
+            candidates = self.crds
+
+        for crd in candidates:
+            if _matches(crd, plural, kind, group, version):
+                return crd
+
+        return None
+
+
+def _matches(crd, plural, kind, group, version) -> bool:
+    if group != "" and crd.spec.group != group:
+        return False
+
+    if version != "" and crd.spec.version != version:
+        return False
+
+    if kind is not None and crd.spec.names.kind != kind:
+        return False
+
+    if plural is not None and crd.spec.names.plural != plural:
+        return False
+
+    return True
+
+
+class CRDCache:
+    """CRDCache keeps the CustomResourceDefinitions read from the
+    apiextensions API for `ttl`, so resolving the names of a Custom Resource
+    does not need a request to the Kubernetes API every time.
+
+    One cache is shared by the whole process, see `crd_cache`. Call
+    `invalidate()` after installing or removing CRDs.
+
+    """
+
+    def __init__(self, ttl: timedelta = timedelta(minutes=5)):
+        self.ttl = ttl
+
+        # CRDs known in advance, looked up before reading them from the API.
+        # See `CRDRegistry`.
+        self.registry: Optional[CRDRegistry] = None
+
+        # Indexed CRD lists, one per `ApiClient`.
+        self._indexes: Dict[Optional[client.ApiClient], _CRDIndex] = {}
+
+        # CRDs read by name with `get()`, one dict per `ApiClient`.
+        self._by_name: Dict[Optional[client.ApiClient], Dict] = defaultdict(dict)
+
+        self._lock = threading.Lock()
+
+    def _expired(self, created: datetime) -> bool:
+        return datetime.now() - created > self.ttl
+
+    def _index(self, api_client, refresh=False) -> Tuple[_CRDIndex, bool]:
+        """Returns the index of CRDs for `api_client`, and True if it was just
+        read from the API."""
+        with self._lock:
+            index = self._indexes.get(api_client)
+            fetched = refresh or index is None or self._expired(index.created)
+            if fetched:
+                #
+                # TODO: Update to `client.ApiextensionsV1Api()`
+                #
+                api = client.ApiextensionsV1beta1Api(
+                    api_client=api_client or get_api_client()
+                )
+                with api_call("list", CRD_KIND):
+                    crds = api.list_custom_resource_definition().items
+                index = _CRDIndex(crds)
+                self._indexes[api_client] = index
+
+            return index, fetched
+
+    def find(
+        self,
+        plural: Optional[str] = None,
+        kind: Optional[str] = None,
+        group: Optional[str] = None,
+        version: Optional[str] = None,
+        api_client: Optional[client.ApiClient] = None,
+    ):
+        """Returns the first CRD that matches all the parameters passed. If none
+        matches, the CRDs are read again once, as it could have been created
+        after they were cached."""
+        if self.registry is not None:
+            crd = self.registry.find(plural, kind, group, version)
+            if crd is not None:
+                return crd
+
+        index, fetched = self._index(api_client)
+
+        crd = index.find(plural, kind, group, version)
+        if crd is None and not fetched:
+            index, _ = self._index(api_client, refresh=True)
+            crd = index.find(plural, kind, group, version)
+
+        return crd
+
+    def get(self, name: str, api: Optional[client.ApiextensionsV1Api] = None):
+        """Returns the CRD called `name`, as read from `api`."""
+        if self.registry is not None:
+            crd = self.registry.get(name)
+            if crd is not None:
+                return crd
+
+        api_client = None if api is None else api.api_client
+
+        with self._lock:
+            entry = self._by_name[api_client].get(name)
+
+        if entry is None or self._expired(entry[1]):
+            if api is None:
+                # Use the shared, default (already configured) client
+                api = client.ApiextensionsV1Api(api_client=get_api_client())
+
+            with api_call("get", CRD_KIND):
+                crd = api.read_custom_resource_definition(name)
+            entry = (crd, datetime.now())
+            with self._lock:
+                self._by_name[api_client][name] = entry
+
+        return entry[0]
+
+    def invalidate(self):
+        """Forgets every CRD in the cache. The `registry` is kept."""
+        with self._lock:
+            self._indexes.clear()
+            self._by_name.clear()
+
+
+# Process-wide CRD cache.
+crd_cache = CRDCache()
+
+
+class CRDRegistry:
+    """CustomResourceDefinitions read from local manifests, so the names of
+    Custom Resources can be resolved without any request to the Kubernetes
+    API. Set it as the `registry` of `crd_cache` to be used by every object:
+
+        crd_cache.registry = CRDRegistry.from_directory("config/crd/bases")
+
+    CRDs not in the registry are still read from the API. CRDs are returned
+    as the `v1beta1` API returns them, with the first of their versions as
+    `spec.version`.
+
+    """
+
+    def __init__(self, entries: Iterable[Dict]):
+        # Compact entries, as saved by `save_index()`, by CRD name.
+        self.entries: Dict[str, Dict] = {entry["name"]: entry for entry in entries}
+
+        # Models share a configuration, instead of building one each.
+        configuration = client.Configuration()
+        configuration.client_side_validation = False
+
+        self._crds = {
+            name: _crd_model(entry, configuration) for name, entry in self.entries.items()
+        }
+        self._index = _CRDIndex(list(self._crds.values()))
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> CRDRegistry:
+        """Reads the CRDs in the YAML or JSON manifests in `paths`; other
+        documents in them are ignored. Index files written by `save_index()`
+        are read as well."""
+        entries = []
+        for path in paths:
+            with open(path) as stream:
+                for doc in serialization.load_all(stream, as_json=serialization.is_json(path)):
+                    if not isinstance(doc, dict):
+                        continue
+
+                    if doc.get("kind") == CRD_INDEX_KIND:
+                        entries.extend(doc["crds"])
+                    elif doc.get("kind") == CRD_KIND:
+                        entries.append(_compact_entry(doc))
+
+        return cls(entries)
+
+    @classmethod
+    def from_directory(cls, path: str) -> CRDRegistry:
+        """Reads the CRDs in every YAML or JSON file in the directory `path`."""
+        paths = set()
+        for pattern in MANIFEST_PATTERNS:
+            paths.update(glob.glob(os.path.join(path, pattern)))
+
+        return cls.from_files(sorted(paths))
+
+    def save_index(self, path: str):
+        """Writes the CRDs in this registry to `path`, as a compact JSON
+        index, much faster to read than the manifests themselves."""
+        index = {"kind": CRD_INDEX_KIND, "crds": list(self.entries.values())}
+        with open(path, "w") as stream:
+            json.dump(index, stream, separators=(",", ":"))
+
+    def find(self, plural=None, kind=None, group=None, version=None):
+        """Returns the first CRD that matches all the parameters passed."""
+        return self._index.find(plural, kind, group, version)
+
+    def get(self, name: str):
+        """Returns the CRD called `name`, if it is in this registry."""
+        return self._crds.get(name)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def _compact_entry(crd: Dict) -> Dict:
+    """Returns the fields of the `v1` or `v1beta1` CRD manifest `crd` used to
+    resolve the names of its Custom Resources."""
+    spec = crd["spec"]
+    versions = spec.get("versions") or [{"name": spec["version"], "served": True, "storage": True}]
+
+    return {
+        "name": crd["metadata"]["name"],
+        "group": spec["group"],
+        "kind": spec["names"]["kind"],
+        "plural": spec["names"]["plural"],
+        "scope": spec.get("scope", "Namespaced"),
+        "versions": [
+            {
+                "name": v["name"],
+                "served": v.get("served", True),
+                "storage": v.get("storage", False),
+            }
+            for v in versions
+        ],
+    }
+
+
+def _crd_model(entry: Dict, configuration: client.Configuration):
+    versions = [
+        client.V1beta1CustomResourceDefinitionVersion(
+            name=v["name"],
+            served=v["served"],
+            storage=v["storage"],
+            local_vars_configuration=configuration,
+        )
+        for v in entry["versions"]
+    ]
+
+    return client.V1beta1CustomResourceDefinition(
+        api_version="apiextensions.k8s.io/v1beta1",
+        kind=CRD_KIND,
+        metadata=client.V1ObjectMeta(
+            name=entry["name"], local_vars_configuration=configuration
+        ),
+        spec=client.V1beta1CustomResourceDefinitionSpec(
+            group=entry["group"],
+            names=client.V1beta1CustomResourceDefinitionNames(
+                kind=entry["kind"],
+                plural=entry["plural"],
+                local_vars_configuration=configuration,
+            ),
+            scope=entry["scope"],
+            version=versions[0].name,
+            versions=versions,
+            local_vars_configuration=configuration,
+        ),
+        local_vars_configuration=configuration,
+    )
@@ -1,2 +1,10 @@
 class ObjectNotBoundException(Exception):
     pass
+
+
+class WaitTimeoutException(TimeoutError):
+    pass
+
+
+class InformerNotSyncedException(TimeoutError):
+    pass
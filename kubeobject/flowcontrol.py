@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException, RESTResponse
+
+from kubeobject.instrumentation import record_response_bytes
+
+HTTP_STATUS_TOO_MANY_REQUESTS = 429
+
+# Bounds, in seconds, of the wait between retries of a throttled request,
+# when the API server does not send a `Retry-After` header.
+THROTTLED_BACKOFF_BASE = 0.2
+THROTTLED_BACKOFF_MAX = 30.0
+
+
+class TokenBucket:
+    """A token bucket rate limiter, as the one in client-go's flowcontrol
+    package: requests are sent at `qps` per second on average, with bursts of
+    up to `burst` requests. It is safe to use from many threads."""
+
+    def __init__(self, qps: float, burst: int):
+        self.qps = qps
+        self.burst = burst
+
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns the seconds to wait before using it.
+        Tokens can be taken ahead of time, so waiting callers are served in
+        order."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.qps)
+            self._last = now
+
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+
+            return -self._tokens / self.qps
+
+    def acquire(self):
+        """Blocks until a request can be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FlowControl:
+    """FlowControl limits the rate of the requests sent to the API server to
+    `qps`, with bursts of up to `burst` requests, and retries requests
+    throttled by the server (429 Too Many Requests) up to `max_retries`
+    times. `qps=None` disables the client-side limit.
+
+    One FlowControl is shared by the whole process, see `flow_control`.
+
+    """
+
+    def __init__(
+        self, qps: Optional[float] = 50, burst: int = 100, max_retries: int = 5
+    ):
+        # Times a request throttled by the server is retried.
+        self.max_retries = max_retries
+
+        self.configure(qps, burst)
+
+    def configure(self, qps: Optional[float], burst: Optional[int] = None):
+        """Changes the client-side rate limit, `qps=None` removes it. `burst`
+        defaults to `qps`."""
+        if burst is None:
+            burst = max(1, int(qps or 1))
+
+        self.bucket = None if qps is None else TokenBucket(qps, burst)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Calls `fn`, sending a request to the API server, once the rate limit
+        allows for it. Retries it if it is throttled by the server."""
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+
+            try:
+                return fn(*args, **kwargs)
+            except ApiException as e:
+                if e.status != HTTP_STATUS_TOO_MANY_REQUESTS or attempt >= self.max_retries:
+                    raise
+
+                attempt += 1
+                time.sleep(throttled_backoff(attempt, retry_after(e)))
+
+
+def retry_after(e: ApiException) -> Optional[float]:
+    """Returns the seconds in the `Retry-After` header of `e`, if any."""
+    headers = getattr(e, "headers", None) or {}
+    value = headers.get("Retry-After")
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # Missing, or an HTTP date, which the API server does not send.
+        return None
+
+
+def throttled_backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Returns the seconds to wait before retrying a throttled request for the
+    `attempt`th time. `Retry-After` is the minimum wait if the server sent it,
+    jitter keeps the clients that were throttled together from retrying in
+    lockstep."""
+    backoff = min(THROTTLED_BACKOFF_BASE * 2 ** (attempt - 1), THROTTLED_BACKOFF_MAX)
+    backoff = random.uniform(backoff / 2, backoff)
+
+    if retry_after is not None:
+        return max(retry_after, backoff)
+
+    return backoff
+
+
+# Process-wide flow control, used by every `FlowControlledApiClient`.
+flow_control = FlowControl()
+
+
+class FlowControlledApiClient(client.ApiClient):
+    """An `ApiClient` which requests go through `flow_control`. The clients
+    shared by kubeobject objects, see `kubeobject.clients`, are of this type;
+    build one to use flow control with an `api_client` of your own."""
+
+    def request(self, *args, **kwargs):
+        response = flow_control.call(super().request, *args, **kwargs)
+
+        # Streamed responses, as watches, are returned unread and not
+        # accounted for.
+        if isinstance(response, RESTResponse):
+            record_response_bytes(len(response.data))
+
+        return response
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from kubernetes import client, watch
+from kubernetes.client.rest import ApiException
+
+from kubeobject.clients import get_api_client
+from kubeobject.exceptions import InformerNotSyncedException
+from kubeobject.instrumentation import api_call
+
+HTTP_STATUS_GONE = 410
+
+
+class Informer:
+    """An Informer keeps a local copy of every Custom Object of a given type
+    (group, version, plural and namespace) by doing one LIST and then
+    following the changes with a WATCH, in a background thread.
+
+    Many objects can read their state from the same Informer, so the load on
+    the Kubernetes API does not depend on how many objects are being watched.
+    Objects in the store are shared and should be treated as read-only.
+
+    """
+
+    def __init__(
+        self,
+        group: str,
+        version: str,
+        plural: str,
+        namespace: Optional[str] = None,
+        api_client: Optional[client.ApiClient] = None,
+    ):
+        self.group = group
+        self.version = version
+        self.plural = plural
+
+        # If `namespace` is None, objects are watched in every namespace.
+        self.namespace = namespace
+
+        self.api = client.CustomObjectsApi(api_client=api_client)
+
+        # Objects indexed by (namespace, name)
+        self.store: Dict[Tuple[str, str], Dict] = {}
+
+        # Last resourceVersion seen by this Informer, used to resume a watch.
+        self.resource_version: Optional[str] = None
+
+        # Max time a single watch request stays open before it is resumed.
+        self.watch_timeout = 300
+
+        # Time to wait before listing again after an unexpected error.
+        self.retry_period = 1.0
+
+        # Max time `get()` waits for the first LIST, unless told otherwise.
+        self.sync_timeout = 10.0
+
+        # Error raised by the last LIST or WATCH, if it failed, until the
+        # next LIST succeeds.
+        self.last_error: Optional[Exception] = None
+
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch: Optional[watch.Watch] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> Informer:
+        """Starts listing and watching in a background thread."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self):
+        """Stops watching. The store is kept as it was last seen."""
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the first LIST has been stored."""
+        return self._synced.wait(timeout)
+
+    def get(
+        self, name: str, namespace: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Optional[Dict]:
+        """Returns the stored object with `name`, or None if it does not exist.
+
+        Waits `timeout` seconds, `sync_timeout` by default, for the first
+        LIST. If it has not been stored by then, the error it failed with is
+        raised, or `InformerNotSyncedException` if it is still running.
+        """
+        if timeout is None:
+            timeout = self.sync_timeout
+
+        if not self.wait_for_sync(timeout):
+            error = self.last_error
+            if error is not None:
+                raise error
+
+            raise InformerNotSyncedException(
+                "{}: the first list did not complete in {}s".format(self.plural, timeout)
+            )
+
+        if namespace is None:
+            namespace = self.namespace
+
+        return self.store.get((namespace, name))
+
+    def _list_args(self):
+        if self.namespace is None:
+            return self.api.list_cluster_custom_object, (
+                self.group,
+                self.version,
+                self.plural,
+            )
+
+        return self.api.list_namespaced_custom_object, (
+            self.group,
+            self.version,
+            self.namespace,
+            self.plural,
+        )
+
+    def _list(self):
+        fn, args = self._list_args()
+        with api_call("list", self.plural):
+            response = fn(*args)
+
+        self.store = {_key(obj): obj for obj in response.get("items", [])}
+        self.resource_version = response["metadata"].get("resourceVersion")
+        self.last_error = None
+        self._synced.set()
+
+    def _handle_event(self, event: Dict):
+        obj = event["raw_object"]
+        self.resource_version = obj["metadata"].get("resourceVersion")
+
+        if event["type"] == "DELETED":
+            self.store.pop(_key(obj), None)
+        else:
+            self.store[_key(obj)] = obj
+
+    def _watch_until_expired(self):
+        fn, args = self._list_args()
+
+        while not self._stopped.is_set():
+            self._watch = watch.Watch()
+            with api_call("watch", self.plural):
+                for event in self._watch.stream(
+                    fn,
+                    *args,
+                    resource_version=self.resource_version,
+                    timeout_seconds=self.watch_timeout,
+                ):
+                    self._handle_event(event)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._list()
+                self._watch_until_expired()
+            except ApiException as e:
+                if e.status != HTTP_STATUS_GONE:
+                    self.last_error = e
+                    time.sleep(self.retry_period)
+            except Exception as e:
+                self.last_error = e
+                time.sleep(self.retry_period)
+
+
+def _key(obj: Dict) -> Tuple[str, str]:
+    return obj["metadata"].get("namespace"), obj["metadata"]["name"]
+
+
+_informers: Dict[Tuple, Informer] = {}
+_informers_lock = threading.Lock()
+
+
+def get_informer(
+    group: str,
+    version: str,
+    plural: str,
+    namespace: Optional[str] = None,
+    api_client: Optional[client.ApiClient] = None,
+) -> Informer:
+    """Returns the process-wide Informer for this type of object, starting it
+    if needed."""
+    if api_client is None:
+        api_client = get_api_client()
+
+    key = (group, version, plural, namespace, api_client)
+
+    with _informers_lock:
+        informer = _informers.get(key)
+        if informer is None:
+            informer = Informer(
+                group, version, plural, namespace=namespace, api_client=api_client
+            )
+            _informers[key] = informer
+
+    return informer.start()
+
+
+def stop_informers():
+    """Stops and forgets every Informer started with `get_informer`."""
+    with _informers_lock:
+        for informer in _informers.values():
+            informer.stop()
+
+        _informers.clear()
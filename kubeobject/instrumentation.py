@@ -0,0 +1,230 @@
+"""Instrumentation of the calls made to the Kubernetes API.
+
+Every request sent by `CustomObject`, `KubeObject`, their asynchronous
+versions in `kubeobject.aio` and the CRD discovery functions is recorded as
+an `ApiCall` and passed to the sinks added with `add_sink()`. Two sinks are
+included: `InMemoryCollector`, to inspect the calls from tests or a
+debugger, and `PrometheusExporter`, that renders them in the Prometheus
+text format.
+
+    collector = InMemoryCollector()
+    add_sink(collector)
+    ...
+    print(collector.summary())
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class ApiCall(NamedTuple):
+    """A call made to the Kubernetes API."""
+
+    # "get", "list", "watch", "create", "patch", "apply", "delete",
+    # "get_metadata" and "list_metadata" when only the metadata of objects is
+    # read, or "get_status" and "patch_status" for the status subresource.
+    # The latency of a "watch" is the time it was followed for.
+    operation: str
+
+    # Kind, or plural if the kind is not known, of the object(s).
+    kind: str
+
+    # Seconds from the request until the response was read.
+    latency: float
+
+    # Size of the response body, if it went through a shared client (see
+    # `kubeobject.clients`).
+    response_bytes: Optional[int]
+
+    # True if the call was made by `auto_reload`, when reading an attribute.
+    auto_reload: bool
+
+    # The exception raised by the call, if any.
+    error: Optional[Exception] = None
+
+
+Sink = Callable[[ApiCall], None]
+
+_sinks: List[Sink] = []
+_sinks_lock = threading.Lock()
+
+# Bytes read by the current call, see `record_response_bytes()`.
+_response_bytes: ContextVar[Optional[List[int]]] = ContextVar(
+    "kubeobject_response_bytes", default=None
+)
+
+_auto_reload: ContextVar[bool] = ContextVar("kubeobject_auto_reload", default=False)
+
+
+def add_sink(sink: Sink):
+    """Passes every API call made from now on to `sink`."""
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink: Sink):
+    with _sinks_lock:
+        _sinks.remove(sink)
+
+
+@contextmanager
+def api_call(operation: str, kind: str):
+    """Records the API call made in this context."""
+    if not _sinks:
+        yield
+        return
+
+    response_bytes: List[int] = []
+    token = _response_bytes.set(response_bytes)
+    error = None
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        latency = time.perf_counter() - start
+        _response_bytes.reset(token)
+
+        call = ApiCall(
+            operation=operation,
+            kind=kind,
+            latency=latency,
+            response_bytes=sum(response_bytes) if response_bytes else None,
+            auto_reload=_auto_reload.get(),
+            error=error,
+        )
+        for sink in list(_sinks):
+            sink(call)
+
+
+@contextmanager
+def auto_reloading():
+    """API calls made in this context are recorded as made by
+    `auto_reload`."""
+    token = _auto_reload.set(True)
+    try:
+        yield
+    finally:
+        _auto_reload.reset(token)
+
+
+def record_response_bytes(size: int):
+    """Adds `size` to the bytes read by the API call being recorded, if any."""
+    response_bytes = _response_bytes.get()
+    if response_bytes is not None:
+        response_bytes.append(size)
+
+
+class InMemoryCollector:
+    """Keeps the last `max_calls` API calls in memory."""
+
+    def __init__(self, max_calls: Optional[int] = 10000):
+        self.calls: deque = deque(maxlen=max_calls)
+
+    def __call__(self, call: ApiCall):
+        self.calls.append(call)
+
+    def summary(self) -> Dict[Tuple[str, str, bool], Dict]:
+        """Returns the number of calls, total latency and response bytes by
+        operation, kind and `auto_reload`."""
+        summary = defaultdict(lambda: {"count": 0, "latency": 0.0, "bytes": 0})
+        for call in list(self.calls):
+            entry = summary[(call.operation, call.kind, call.auto_reload)]
+            entry["count"] += 1
+            entry["latency"] += call.latency
+            entry["bytes"] += call.response_bytes or 0
+
+        return dict(summary)
+
+    def clear(self):
+        self.calls.clear()
+
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PrometheusExporter:
+    """Aggregates API calls as Prometheus metrics; `render()` returns them
+    in the Prometheus text exposition format, to be served by the
+    application's metrics endpoint."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+
+        # Metrics by (operation, kind, auto_reload, result) labels.
+        self._counts: Dict[Tuple, int] = defaultdict(int)
+        self._bytes: Dict[Tuple, int] = defaultdict(int)
+        self._latency_buckets: Dict[Tuple, List[int]] = {}
+        self._latency_sums: Dict[Tuple, float] = defaultdict(float)
+
+        self._lock = threading.Lock()
+
+    def __call__(self, call: ApiCall):
+        labels = (
+            call.operation,
+            call.kind,
+            "true" if call.auto_reload else "false",
+            "success" if call.error is None else "error",
+        )
+
+        with self._lock:
+            self._counts[labels] += 1
+            self._bytes[labels] += call.response_bytes or 0
+            self._latency_sums[labels] += call.latency
+
+            buckets = self._latency_buckets.setdefault(labels, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if call.latency <= bound:
+                    buckets[i] += 1
+
+    def render(self) -> str:
+        lines = []
+
+        with self._lock:
+            lines.append("# HELP kubeobject_api_calls_total Calls made to the Kubernetes API.")
+            lines.append("# TYPE kubeobject_api_calls_total counter")
+            for labels, count in self._counts.items():
+                lines.append("kubeobject_api_calls_total{{{}}} {}".format(_labels(labels), count))
+
+            lines.append(
+                "# HELP kubeobject_api_response_bytes_total Bytes read from the Kubernetes API."
+            )
+            lines.append("# TYPE kubeobject_api_response_bytes_total counter")
+            for labels, size in self._bytes.items():
+                lines.append(
+                    "kubeobject_api_response_bytes_total{{{}}} {}".format(_labels(labels), size)
+                )
+
+            name = "kubeobject_api_call_duration_seconds"
+            lines.append("# HELP {} Latency of the calls to the Kubernetes API.".format(name))
+            lines.append("# TYPE {} histogram".format(name))
+            for labels, buckets in self._latency_buckets.items():
+                for bound, count in zip(self.buckets, buckets):
+                    lines.append(
+                        '{}_bucket{{{},le="{}"}} {}'.format(name, _labels(labels), bound, count)
+                    )
+                lines.append(
+                    '{}_bucket{{{},le="+Inf"}} {}'.format(name, _labels(labels), self._counts[labels])
+                )
+                lines.append(
+                    "{}_sum{{{}}} {}".format(name, _labels(labels), self._latency_sums[labels])
+                )
+                lines.append("{}_count{{{}}} {}".format(name, _labels(labels), self._counts[labels]))
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple) -> str:
+    names = ("operation", "kind", "auto_reload", "result")
+    return ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, labels)
+    )
@@ -1,22 +1,47 @@
 from __future__ import annotations
 
-import copy
 import io
-import time
 from datetime import datetime, timedelta
-from typing import Optional, TextIO, Tuple, Union
+from typing import IO, Callable, Optional, TextIO, Tuple, Union
 
-import yaml
 from box import Box
-from kubernetes import client
 from kubernetes.client.api import ApiextensionsV1Api, CustomObjectsApi
 
+from kubeobject import serialization
+from kubeobject.clients import get_api_client, shared_api
+from kubeobject.compact import compact_object
+from kubeobject.conflict import update_with_retries
+from kubeobject.cow import CowBox
+from kubeobject.discovery import crd_cache
 from kubeobject.exceptions import ObjectNotBoundException
+from kubeobject.fastio import RawCustomObjectsApi
+from kubeobject.informer import get_informer
+from kubeobject.instrumentation import api_call, auto_reloading
+from kubeobject.patch import (
+    apply_merge_patch,
+    merge_patch,
+    resource_version,
+    server_side_apply,
+)
+from kubeobject.wait import wait_until
+
+
+# Shared by every object, timedeltas are immutable.
+DEFAULT_AUTO_RELOAD_PERIOD = timedelta(seconds=2)
 
 
 class KubeObject(object):
     BACKING_OBJ = "__backing_obj"
 
+    # Set `compact` to `True`, on the class, to intern the keys and the most
+    # repeated values of the objects, when holding many of them in memory.
+    compact = False
+
+    # Set `fast_io` to `True`, on the class, to send and read the JSON of the
+    # objects directly, skipping the (de)serialization layers of the
+    # generated client; see `kubeobject.fastio`.
+    fast_io = False
+
     def __init__(
         self,
         group: str,
@@ -41,13 +66,14 @@ class KubeObject(object):
         self.__dict__["bound"] = {}
 
         # This is the object that will contain the definition of the Custom Object when bound
-        self.__dict__[KubeObject.BACKING_OBJ] = Box(default_box=True)
+        self.__dict__[KubeObject.BACKING_OBJ] = CowBox(default_box=True)
 
         # Set an API to work with.
         # TODO: Allow for a better experience; api could be defined from env variables,
         # in_cluster or whatever. See if this is needed. Can we run our samples with
         # in_cluster, or based on different clusters pointed at by env variables?
-        self.__dict__["api"] = CustomObjectsApi()
+        api_class = RawCustomObjectsApi if self.fast_io else CustomObjectsApi
+        self.__dict__["api"] = shared_api(api_class, get_api_client())
 
         # Set `auto_reload` to `True` if it needs to be reloaded before every
         # read of an attribute. This considers the `auto_reload_period`
@@ -56,11 +82,29 @@ class KubeObject(object):
 
         # If `auto_reload` is set, it will not reload if less time than
         # `auto_reload_period` has passed since last read.
-        self.__dict__["auto_reload_period"] = timedelta(seconds=2)
+        self.__dict__["auto_reload_period"] = DEFAULT_AUTO_RELOAD_PERIOD
+
+        # Set `auto_reload_status` to `True`, with `auto_reload`, to only
+        # reload the status, from the status subresource, when it is the
+        # attribute being read.
+        self.__dict__["auto_reload_status"]: bool = False
+
+        # Set `use_informer` to `True` to serve `auto_reload` reads from a
+        # shared, watch-backed `Informer` instead of polling the API.
+        self.__dict__["use_informer"]: bool = False
+        self.__dict__["_informer_obj"] = None
 
         # Last time this object was updated
         self.__dict__["last_update"]: Optional[datetime] = None
 
+        # The object as it was last read from, or written to, Kubernetes. Used
+        # to send only what has changed since then on `update()`.
+        self.__dict__["_synced_obj"]: Optional[dict] = None
+
+        # False if the last read found the object at the same
+        # `resourceVersion` it already had, so nothing had to be done.
+        self.__dict__["changed_since_last_reload"]: bool = False
+
         # These attributes need to be set in order to read the object (as in reload)
         # back from the API.
         self.__dict__["name"]: str = None
@@ -69,44 +113,186 @@ class KubeObject(object):
     def _register_update(self):
         self.last_update = datetime.now()
 
-    def _reload_if_needed(self):
+    def _reload_if_needed(self, item=None):
         if not self.auto_reload or not self.bound:
             return
 
+        if self.use_informer and self._reload_from_informer():
+            return
+
         if (
             self.last_update is None
             or datetime.now() - self.last_update > self.auto_reload_period
         ):
-            self.read(name=self.name, namespace=self.namespace)
-
-    def read(self, name: str, namespace: str):
-        obj = self.api.get_namespaced_custom_object(
-            name=name, namespace=namespace, **self.crd
-        )
-
-        self.__dict__[KubeObject.BACKING_OBJ] = Box(obj, default_box=True)
+            with auto_reloading():
+                if self.auto_reload_status and item == "status":
+                    self.reload_status()
+                else:
+                    self.read(name=self.name, namespace=self.namespace)
+
+    def _reload_from_informer(self) -> bool:
+        """Returns False if the `Informer` can't serve this object, see
+        `CustomObject._reload_from_informer()`."""
+        informer = get_informer(namespace=self.namespace, **self.crd)
+
+        try:
+            obj = informer.get(self.name, timeout=0)
+        except Exception:
+            return False
+
+        if obj is None:
+            return False
+
+        if obj is self._informer_obj:
+            return True
+
+        self.__dict__["_informer_obj"] = obj
+        self._bind_if_changed(obj)
+        return True
+
+    def _bind(self, obj: dict):
+        """Sets `obj`, as returned by the Kubernetes API, as the state of this
+        object."""
+
+        if self.compact:
+            obj = compact_object(obj)
+
+        # `obj` is never modified by CowBox, which only copies the parts of it
+        # that are accessed, so it can be kept as the last synced state.
+        self.__dict__[KubeObject.BACKING_OBJ] = CowBox(obj, default_box=True)
+        self.__dict__["_synced_obj"] = obj
         self.__dict__["bound"] = True
         self.__dict__["name"] = obj["metadata"]["name"]
         self.__dict__["namespace"] = obj["metadata"]["namespace"]
 
         self._register_update()
+
+    def _rebase(self, obj: dict, changes: dict):
+        """Binds `obj`, and applies `changes` on top of it as local changes."""
+        self._bind(obj)
+        self.__dict__[KubeObject.BACKING_OBJ] = CowBox(
+            apply_merge_patch(obj, changes), default_box=True
+        )
+
+    def _bind_if_changed(self, obj: dict):
+        """Binds `obj`, as read from the Kubernetes API, unless it is the
+        object this one is bound to, at the same `resourceVersion`, and there
+        are no local changes to discard."""
+        version = resource_version(obj)
+        unchanged = (
+            version is not None
+            and version == resource_version(self.__dict__["_synced_obj"])
+            and obj["metadata"]["name"] == self.name
+            and obj["metadata"].get("namespace") == self.namespace
+            and not self._local_changes()
+        )
+
+        self.__dict__["changed_since_last_reload"] = not unchanged
+        if unchanged:
+            self._register_update()
+        else:
+            self._bind(obj)
+
+    def _local_changes(self) -> dict:
+        """Returns a merge patch with the changes made to this object since it
+        was last read or saved."""
+        return merge_patch(
+            self.__dict__["_synced_obj"], self.__dict__[KubeObject.BACKING_OBJ]
+        )
+
+    def read(self, name: str, namespace: str):
+        with api_call("get", self.crd["plural"]):
+            obj = self.api.get_namespaced_custom_object(
+                name=name, namespace=namespace, **self.crd
+            )
+
+        self._bind_if_changed(obj)
         return self
 
-    def update(self):
+    def reload(self):
+        if not self.bound:
+            raise ObjectNotBoundException
+
+        return self.read(self.name, self.namespace)
+
+    def update(self, retry_on_conflict: int = 0):
+        """Updates this object in Kubernetes. With `retry_on_conflict` set,
+        concurrent modifications are detected with the object's
+        `resourceVersion`; the object is then read again, the local changes
+        are applied on top of it and the update is retried, up to
+        `retry_on_conflict` times."""
         if not self.bound:
             # there's no corresponding object in the Kubernetes cluster
             raise ObjectNotBoundException
 
-        obj = self.api.patch_namespaced_custom_object(
-            name=self.name,
-            namespace=self.namespace,
-            **self.crd,
-            body=self.__dict__[KubeObject.BACKING_OBJ].to_dict(),
-        )
+        # Only what has changed since the object was last read or saved is
+        # sent, as a JSON merge patch.
+        def patch(body: dict) -> dict:
+            with api_call("patch", self.crd["plural"]):
+                return self.api.patch_namespaced_custom_object(
+                    name=self.name, namespace=self.namespace, **self.crd, body=body
+                )
 
-        self.__dict__[KubeObject.BACKING_OBJ] = Box(obj, default_box=True)
-        self._register_update()
+        def read() -> dict:
+            with api_call("get", self.crd["plural"]):
+                return self.api.get_namespaced_custom_object(
+                    name=self.name, namespace=self.namespace, **self.crd
+                )
+
+        obj = update_with_retries(self, patch, read, retry_on_conflict)
+
+        self._bind(obj)
+        return self
+
+    def reload_status(self):
+        """Reads the status of this object again, through its status
+        subresource. Changes made locally to the rest of the object are
+        kept."""
+        if not self.bound:
+            raise ObjectNotBoundException
 
+        with api_call("get_status", self.crd["plural"]):
+            obj = self.api.get_namespaced_custom_object_status(
+                name=self.name, namespace=self.namespace, **self.crd
+            )
+
+        self._bind_status(obj)
+        return self
+
+    def _bind_status(self, obj: dict):
+        """Takes the status of `obj`, as read from the status subresource,
+        keeping the local changes to the rest of the object."""
+        synced_obj = self.__dict__["_synced_obj"]
+        changed = obj.get("status") != synced_obj.get("status")
+        self.__dict__["changed_since_last_reload"] = changed
+        if not changed:
+            self._register_update()
+            return
+
+        # Only the status is taken from `obj`, the rest of the synced state
+        # stays as it was last read.
+        synced = {key: value for key, value in synced_obj.items() if key != "status"}
+        if "status" in obj:
+            synced["status"] = obj["status"]
+
+        self._rebase(synced, _without_status(self._local_changes()))
+
+    def update_status(self):
+        """Updates the status of this object, through its status subresource.
+        Only the changes made to the status are sent; changes to the rest of
+        the object are kept locally, to be saved with `update()`."""
+        if not self.bound:
+            raise ObjectNotBoundException
+
+        changes = self._local_changes()
+        body = _status_patch(changes)
+
+        with api_call("patch_status", self.crd["plural"]):
+            obj = self.api.patch_namespaced_custom_object_status(
+                name=self.name, namespace=self.namespace, **self.crd, body=body
+            )
+
+        self._rebase(obj, _without_status(changes))
         return self
 
     def delete(self):
@@ -116,12 +302,13 @@ class KubeObject(object):
         # TODO: body is supposed to be client.V1DeleteOptions()
         # but for now we are just passing the empty dict.
 
-        self.api.delete_namespaced_custom_object(
-            name=self.name,
-            namespace=self.namespace,
-            body={},
-            **self.crd,
-        )
+        with api_call("delete", self.crd["plural"]):
+            self.api.delete_namespaced_custom_object(
+                name=self.name,
+                namespace=self.namespace,
+                body={},
+                **self.crd,
+            )
 
         self._register_update()
         # Not bound any more!
@@ -139,43 +326,78 @@ class KubeObject(object):
         if namespace is not None:
             self.namespace = namespace
 
-        obj = api.create_namespaced_custom_object(
-            namespace=self.namespace,
-            **self.crd,
-            body=self.__dict__[KubeObject.BACKING_OBJ].to_dict(),
-        )
-
-        self.__dict__[KubeObject.BACKING_OBJ] = Box(obj, default_box=True)
-        self.__dict__["bound"] = True
-        self.__dict__["name"] = obj["metadata"]["name"]
-        self.__dict__["namespace"] = obj["metadata"]["namespace"]
+        with api_call("create", self.crd["plural"]):
+            obj = api.create_namespaced_custom_object(
+                namespace=self.namespace,
+                **self.crd,
+                body=self.__dict__[KubeObject.BACKING_OBJ].to_dict(),
+            )
 
         # This object has been bound to an existing object in Kube
-        self.bound = True
-        self._register_update()
+        self._bind(obj)
 
         return self
 
+    def apply(
+        self,
+        field_manager: str = "kubeobject",
+        force: bool = False,
+        namespace: Optional[str] = None,
+    ) -> KubeObject:
+        """Creates or updates this object with a single server-side apply
+        request. `field_manager` owns the fields being set, `force` takes the
+        ownership of fields managed by somebody else."""
+        backing_obj = self.__dict__[KubeObject.BACKING_OBJ]
+
+        if namespace is not None:
+            self.namespace = namespace
+        if self.namespace is None:
+            self.namespace = backing_obj.metadata.get("namespace")
+        if self.name is None:
+            self.name = backing_obj.metadata.get("name")
+
+        body = backing_obj.to_dict()
+        body["apiVersion"] = "{group}/{version}".format(**self.crd)
+
+        with api_call("apply", self.crd["plural"]):
+            obj = server_side_apply(
+                self.api,
+                name=self.name,
+                namespace=self.namespace,
+                body=body,
+                field_manager=field_manager,
+                force=force,
+                **self.crd,
+            )
+
+        self._bind(obj)
+        return self
+
     def read_from_yaml_file(self, object_definition: TextIO):
         return self._read_from(object_definition)
 
     def read_from_dict(self, object_definition: dict):
-        return self._read_from(object_definition)
+        """Populates this object from `object_definition`, which is never
+        modified. Its top level is copied; its nested dicts and lists are
+        only copied when they are changed through this object, so they
+        should not be changed in place by the caller afterwards."""
+        return self._read_from(dict(object_definition))
 
     def _read_from(self, object_definition=Union[TextIO, dict]):
         """Populates this object from object_definition.
 
         * type(io.IOBase): opens the file and reads a yaml doc from it
-        * type(dict): Uses it as backing_object
+        * type(dict): Uses it as backing_object. The dict is never modified
+          but it is not copied either, so it should not be modified afterwards.
         """
         if isinstance(object_definition, io.IOBase):
-            obj = yaml.safe_load(object_definition.read())
+            obj = serialization.load(object_definition)
         elif isinstance(object_definition, dict):
-            obj = copy.deepcopy(object_definition)
+            obj = object_definition
         else:
             raise ValueError("argument should be a file-like object or a dict")
 
-        self.__dict__[KubeObject.BACKING_OBJ] = Box(obj, default_box=True)
+        self.__dict__[KubeObject.BACKING_OBJ] = CowBox(obj, default_box=True)
         self.__dict__["bound"] = False
 
         return self
@@ -187,7 +409,7 @@ class KubeObject(object):
             self.__dict__[KubeObject.BACKING_OBJ][item] = value
 
     def __getattr__(self, item):
-        self._reload_if_needed()
+        self._reload_if_needed(item)
         # if item not in self.__dict__[KubeObject.BACKING_OBJ]:
         #     raise AttributeError(item)
 
@@ -202,20 +424,31 @@ class KubeObject(object):
 
         return d
 
-    def wait_for(self, fn):
-        while True:
-            try:
-                # Add self.reload() somehow
-                if fn(self):
-                    return True
+    def wait_for(
+        self,
+        fn: Callable[[KubeObject], bool],
+        timeout: Optional[float] = None,
+        reload: str = "watch",
+    ) -> bool:
+        """Waits until `fn(self)` is True. The object is kept up to date with a
+        watch (`reload="watch"`) or by reloading it every `auto_reload_period`
+        (`reload="poll"`). Raises `WaitTimeoutException` after `timeout`
+        seconds."""
+        if not self.bound:
+            raise ObjectNotBoundException
 
-                time.sleep(4)
-            except Exception:
-                print("Function fails")
+        return wait_until(
+            self, fn, timeout, reload, namespace=self.namespace, **self.crd
+        )
 
     def to_dict(self):
         return self.__dict__[KubeObject.BACKING_OBJ].to_dict()
 
+    def to_yaml(self, stream: Optional[IO] = None) -> Optional[str]:
+        """Serializes this object as a YAML document, written to `stream` if
+        passed, or returned as a string otherwise."""
+        return serialization.dump(self.to_dict(), stream)
+
 
 def create_custom_object(name: str, api=None) -> KubeObject:
     """This function returns a Class type that can be used to initialize
@@ -234,13 +467,11 @@ def full_crd_name(
     name: str, api: Optional[ApiextensionsV1Api] = None
 ) -> Tuple[str, str, str, str]:
     """Fetches this CRD from the kubernetes API by name and returns its
-    name, kind, plural, group and version."""
-    if api is None:
-        # Use default (already configured) client
-        api = client.ApiextensionsV1Api()
+    name, kind, plural, group and version. CRDs are cached for the whole
+    process, see `kubeobject.discovery.crd_cache`."""
 
     # The name here is something like: resource.group (dummy.example.com)
-    response = api.read_custom_resource_definition(name)
+    response = crd_cache.get(name, api)
 
     group = response.spec.group
     kind = response.spec.names.kind
@@ -248,3 +479,11 @@ def full_crd_name(
     version = [v.name for v in response.spec.versions if v.served][0]
 
     return kind, plural, group, version
+
+
+def _status_patch(changes: dict) -> dict:
+    return {"status": changes["status"]} if "status" in changes else {}
+
+
+def _without_status(changes: dict) -> dict:
+    return {key: value for key, value in changes.items() if key != "status"}
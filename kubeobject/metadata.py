@@ -0,0 +1,116 @@
+"""Reads of the metadata of Custom Objects only.
+
+Requests accepting `PartialObjectMetadata` get the `metadata` of the objects
+from the API server, without their `spec` and `status`. Servers which do not
+support it send the whole objects, their `metadata` is used the same way.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from kubernetes import client
+
+ACCEPT_METADATA = "application/json;as=PartialObjectMetadata;g=meta.k8s.io;v=v1,application/json"
+ACCEPT_METADATA_LIST = (
+    "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+)
+
+
+def read_object_metadata(
+    api_client: client.ApiClient,
+    group: str,
+    version: str,
+    namespace: str,
+    plural: str,
+    name: str,
+) -> Dict:
+    """Returns the `metadata` of a namespaced Custom Object."""
+    request = object_metadata_request(group, version, namespace, plural, name)
+
+    return _call(api_client, request)["metadata"]
+
+
+def list_objects_metadata(
+    api_client: client.ApiClient,
+    group: str,
+    version: str,
+    namespace: Optional[str],
+    plural: str,
+    label_selector: Optional[str] = None,
+    limit: Optional[int] = None,
+    _continue: Optional[str] = None,
+) -> Dict:
+    """Lists Custom Objects in `namespace`, or in all namespaces. The `items`
+    of the list returned hold the `metadata` of each object."""
+    request = list_metadata_request(
+        group, version, namespace, plural, label_selector, limit, _continue
+    )
+
+    return _call(api_client, request)
+
+
+def object_metadata_request(
+    group: str, version: str, namespace: str, plural: str, name: str
+) -> Dict:
+    """Returns the arguments of `ApiClient.call_api` reading the `metadata`
+    of a namespaced Custom Object, but its response type, which is passed
+    differently by the `kubernetes` and `kubernetes_asyncio` clients."""
+    return _request(
+        "/apis/{group}/{version}/namespaces/{namespace}/{plural}/{name}",
+        {
+            "group": group,
+            "version": version,
+            "namespace": namespace,
+            "plural": plural,
+            "name": name,
+        },
+        [],
+        ACCEPT_METADATA,
+    )
+
+
+def list_metadata_request(
+    group: str,
+    version: str,
+    namespace: Optional[str],
+    plural: str,
+    label_selector: Optional[str] = None,
+    limit: Optional[int] = None,
+    _continue: Optional[str] = None,
+) -> Dict:
+    """Returns the arguments of `ApiClient.call_api` listing the `metadata`
+    of Custom Objects, see `object_metadata_request()`."""
+    path_params = {"group": group, "version": version, "plural": plural}
+    if namespace is None:
+        path = "/apis/{group}/{version}/{plural}"
+    else:
+        path = "/apis/{group}/{version}/namespaces/{namespace}/{plural}"
+        path_params["namespace"] = namespace
+
+    query_params = [
+        (key, value)
+        for key, value in (
+            ("labelSelector", label_selector),
+            ("limit", limit),
+            ("continue", _continue),
+        )
+        if value is not None
+    ]
+
+    return _request(path, path_params, query_params, ACCEPT_METADATA_LIST)
+
+
+def _request(path, path_params, query_params, accept) -> Dict:
+    return {
+        "resource_path": path,
+        "method": "GET",
+        "path_params": path_params,
+        "query_params": query_params,
+        "header_params": {"Accept": accept},
+        "auth_settings": ["BearerToken"],
+        "_return_http_data_only": True,
+    }
+
+
+def _call(api_client: client.ApiClient, request: Dict) -> Dict:
+    return api_client.call_api(**request, response_type="object")
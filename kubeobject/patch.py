@@ -0,0 +1,137 @@
+import json
+from typing import Any, Dict, Optional
+
+from kubernetes import client
+
+
+def merge_patch(original: Dict, modified: Dict) -> Dict:
+    """Returns the JSON merge patch (RFC 7386) that turns `original` into
+    `modified`. Only the keys that changed are included; keys that were
+    removed are set to None and lists are always replaced as a whole.
+
+    Values are read with `dict.items` so copy-on-write containers are not
+    copied, and values still shared with `original` are skipped right away.
+    """
+    patch = {}
+
+    for key, value in dict.items(modified):
+        if key not in original:
+            patch[key] = value
+            continue
+
+        previous = original[key]
+        if previous is value:
+            continue
+
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = merge_patch(previous, value)
+            if nested:
+                patch[key] = nested
+        elif value != previous:
+            patch[key] = value
+
+    for key in original:
+        if key not in modified:
+            patch[key] = None
+
+    return patch
+
+
+def resource_version(obj: Optional[Dict]) -> Optional[str]:
+    """Returns the `metadata.resourceVersion` of `obj`, if it has one."""
+    if not obj:
+        return None
+
+    return obj.get("metadata", {}).get("resourceVersion") or None
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Applies a JSON merge patch (RFC 7386) to `target` and returns the
+    result. `target` is not modified."""
+    if not isinstance(patch, dict):
+        return patch
+
+    if isinstance(target, dict):
+        result = dict(target)
+    else:
+        result = {}
+
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+
+    return result
+
+
+# Fields set by the API server that can't be part of an apply request.
+SERVER_SIDE_METADATA = (
+    "creationTimestamp",
+    "generation",
+    "managedFields",
+    "resourceVersion",
+    "selfLink",
+    "uid",
+)
+
+
+def apply_fields(obj: Dict) -> Dict:
+    """Returns the fields of `obj` to send in a server-side apply request.
+    Fields populated by the API server and `status`, which is owned by
+    controllers, are left out."""
+    body = {key: value for key, value in obj.items() if key != "status"}
+    body["metadata"] = {
+        key: value
+        for key, value in obj.get("metadata", {}).items()
+        if key not in SERVER_SIDE_METADATA
+    }
+
+    return body
+
+
+def apply_body(obj: Dict) -> str:
+    """Returns `obj` as the body of a server-side apply request, see
+    `apply_fields()`."""
+    # JSON is valid YAML, and it is what the `kubernetes` client can serialize.
+    return json.dumps(apply_fields(obj))
+
+
+def server_side_apply(
+    api: client.CustomObjectsApi,
+    group: str,
+    version: str,
+    namespace: str,
+    plural: str,
+    name: str,
+    body: Dict,
+    field_manager: str,
+    force: bool = False,
+) -> Dict:
+    """Creates or updates a namespaced Custom Object with a server-side apply
+    request. `CustomObjectsApi` can't send `application/apply-patch+yaml`, so
+    the request is done with its `ApiClient`, as the generated code does."""
+    query_params = [("fieldManager", field_manager)]
+    if force:
+        query_params.append(("force", True))
+
+    return api.api_client.call_api(
+        "/apis/{group}/{version}/namespaces/{namespace}/{plural}/{name}",
+        "PATCH",
+        path_params={
+            "group": group,
+            "version": version,
+            "namespace": namespace,
+            "plural": plural,
+            "name": name,
+        },
+        query_params=query_params,
+        header_params={
+            "Accept": "application/json",
+            "Content-Type": "application/apply-patch+yaml",
+        },
+        body=apply_body(body),
+        response_type="object",
+        auth_settings=["BearerToken"],
+        _return_http_data_only=True,
+    )
@@ -0,0 +1,90 @@
+"""Reading and writing of Kubernetes manifests.
+
+The libyaml bindings of PyYAML are used when available, they are an order of
+magnitude faster than the pure-Python implementation, which is used
+otherwise. JSON manifests, a subset of YAML, are parsed with the `json`
+module, and the payloads of the Kubernetes API with `orjson` if it is
+installed, see `json_loads()`.
+"""
+from __future__ import annotations
+
+import json
+from typing import IO, Any, Iterator, Optional, Union
+
+import yaml
+
+from kubeobject.cow import CowDict, CowList
+
+try:
+    from yaml import CSafeDumper as _SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper as _SafeDumper
+    from yaml import SafeLoader  # noqa: F401
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class SafeDumper(_SafeDumper):
+    """Safe dumper that also knows how to represent the copy-on-write
+    containers backing `CustomObject`."""
+
+
+SafeDumper.add_representer(CowDict, SafeDumper.represent_dict)
+SafeDumper.add_representer(CowList, SafeDumper.represent_list)
+
+
+def is_json(path: str) -> bool:
+    return path.endswith(".json")
+
+
+def load(stream: IO, as_json: bool = False) -> Any:
+    """Parses the single document in `stream`, as JSON if `as_json` is set or
+    as YAML otherwise."""
+    if as_json:
+        return json.load(stream)
+
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def load_all(stream: IO, as_json: bool = False) -> Iterator[Any]:
+    """Parses the documents in `stream` one at a time. As JSON (`as_json`),
+    `stream` holds a single object, a list or a Kubernetes `List` of them."""
+    if not as_json:
+        yield from yaml.load_all(stream, Loader=SafeLoader)
+        return
+
+    doc = json.load(stream)
+    if isinstance(doc, dict) and doc.get("kind", "").endswith("List") and "items" in doc:
+        yield from doc["items"]
+    elif isinstance(doc, list):
+        yield from doc
+    else:
+        yield doc
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Parses a JSON payload of the Kubernetes API."""
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serializes `obj` as a JSON payload for the Kubernetes API."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def dump(obj: Any, stream: Optional[IO] = None) -> Optional[str]:
+    """Serializes `obj` as YAML, keeping the order of its keys as
+    `kubectl` does. Returns a string if `stream` is not passed."""
+    return yaml.dump(
+        obj, stream, Dumper=SafeDumper, default_flow_style=False, sort_keys=False
+    )
@@ -0,0 +1,702 @@
+"""A fake Kubernetes API server, to test and load-test code using kubeobject
+without a cluster.
+
+`FakeApiServer` serves the custom objects and CustomResourceDefinition
+endpoints over HTTP, on localhost, from a thread of the same process:
+
+    with FakeApiServer() as server:
+        server.add_crd("dummy.com", "v1", "dummies", "Dummy")
+
+        Dummy = CustomObject.define(
+            "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1",
+            api_client=server.api_client(),
+        )
+        Dummy("my-dummy", "default").create()
+
+It keeps objects in memory, assigns them `resourceVersion`s, rejects
+conflicting updates, and supports lists with `limit` and `continue`, label
+and field selectors, watches, the `status` subresource and reads of
+`PartialObjectMetadata`. Every request can be delayed with `latency`, and
+made to fail with `fail_next()`.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from kubernetes import client
+
+from kubeobject import serialization
+from kubeobject.patch import apply_merge_patch
+
+# Events kept to serve watches from past resourceVersions. Watches from older
+# versions get a 410 Gone, as from a real API server.
+DEFAULT_EVENT_HISTORY = 1000
+
+Latency = Union[float, Callable[[str, str], float]]
+
+
+class ApiError(Exception):
+    """An error response, with a `Status` object as body."""
+
+    def __init__(self, code: int, reason: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.reason = reason
+        self.message = message
+
+    def status(self) -> Dict:
+        return {
+            "kind": "Status",
+            "apiVersion": "v1",
+            "metadata": {},
+            "status": "Failure",
+            "message": self.message,
+            "reason": self.reason,
+            "code": self.code,
+        }
+
+
+class _InjectedError:
+    def __init__(self, status, times, method, path, retry_after):
+        self.status = status
+        self.times = times
+        self.method = method
+        self.path = path
+        self.retry_after = retry_after
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method is not None and self.method != method:
+            return False
+
+        return self.path is None or self.path in path
+
+
+class FakeApiServer:
+    """An in-memory stand-in for the Kubernetes API server, serving custom
+    objects and CRDs on `url`."""
+
+    def __init__(
+        self,
+        latency: Latency = 0,
+        event_history: int = DEFAULT_EVENT_HISTORY,
+        port: int = 0,
+    ):
+        # Seconds every request is delayed, or a function of the method and
+        # path of the request returning them.
+        self.latency = latency
+
+        # Requests received, as (method, path) tuples.
+        self.requests: List[Tuple[str, str]] = []
+
+        self._objects: Dict[Tuple[str, str, str, str], Dict] = {}
+        self._crds: Dict[str, Dict] = {}
+        self._resource_version = 0
+        self._events: deque = deque(maxlen=event_history)
+        self._errors: List[_InjectedError] = []
+
+        self._lock = threading.Condition()
+        self._stopped = threading.Event()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self) -> FakeApiServer:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            self._lock.notify_all()
+
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> FakeApiServer:
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def configuration(self) -> client.Configuration:
+        """Returns a client configuration pointing at this server."""
+        configuration = client.Configuration()
+        configuration.host = self.url
+
+        return configuration
+
+    def api_client(self) -> client.ApiClient:
+        """Returns a new `ApiClient` for this server. It has no flow control,
+        see `kubeobject.flowcontrol.FlowControlledApiClient`."""
+        return client.ApiClient(configuration=self.configuration())
+
+    def add_crd(
+        self,
+        group: str,
+        version: str,
+        plural: str,
+        kind: str,
+        namespaced: bool = True,
+    ) -> Dict:
+        """Installs a CustomResourceDefinition, with the status
+        subresource enabled."""
+        name = "{}.{}".format(plural, group)
+        crd = {
+            "apiVersion": "apiextensions.k8s.io/v1",
+            "kind": "CustomResourceDefinition",
+            "metadata": {"name": name},
+            "spec": {
+                "group": group,
+                "names": {"kind": kind, "plural": plural, "listKind": kind + "List"},
+                "scope": "Namespaced" if namespaced else "Cluster",
+                "versions": [
+                    {
+                        "name": version,
+                        "served": True,
+                        "storage": True,
+                        "subresources": {"status": {}},
+                    }
+                ],
+            },
+        }
+
+        with self._lock:
+            self._stamp(crd)
+            self._crds[name] = crd
+
+        return crd
+
+    def fail_next(
+        self,
+        status: int,
+        times: int = 1,
+        method: Optional[str] = None,
+        path: Optional[str] = None,
+        retry_after: Optional[int] = None,
+    ):
+        """Makes the next `times` requests fail with `status`. Only requests
+        with `method`, or which path contains `path`, fail if given.
+        `retry_after` is sent as the `Retry-After` header."""
+        with self._lock:
+            self._errors.append(_InjectedError(status, times, method, path, retry_after))
+
+    def objects(self) -> List[Dict]:
+        """Returns every custom object stored."""
+        with self._lock:
+            return list(self._objects.values())
+
+    # Request handling
+
+    def _injected_error(self, method: str, path: str) -> Optional[_InjectedError]:
+        with self._lock:
+            for error in self._errors:
+                if error.matches(method, path):
+                    error.times -= 1
+                    if error.times <= 0:
+                        self._errors.remove(error)
+                    return error
+
+        return None
+
+    def _delay(self, method: str, path: str):
+        latency = self.latency(method, path) if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def _stamp(self, obj: Dict, previous: Optional[Dict] = None):
+        """Sets the fields populated by the server, with a new
+        resourceVersion."""
+        self._resource_version += 1
+
+        metadata = obj.setdefault("metadata", {})
+        previous_metadata = (previous or {}).get("metadata", {})
+        metadata["resourceVersion"] = str(self._resource_version)
+        metadata["uid"] = previous_metadata.get("uid", str(uuid.uuid4()))
+        metadata["creationTimestamp"] = previous_metadata.get(
+            "creationTimestamp",
+            datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        )
+
+        generation = previous_metadata.get("generation", 0)
+        if previous is None or obj.get("spec") != previous.get("spec"):
+            generation += 1
+        metadata["generation"] = generation
+
+    def _record(self, event_type: str, key: Tuple, obj: Dict):
+        self._events.append((self._resource_version, event_type, key, obj))
+        self._lock.notify_all()
+
+
+def _parse_path(path: str) -> Optional[Dict]:
+    """Parses `/apis/{group}/{version}[/namespaces/{namespace}]/{plural}[/{name}[/status]]`."""
+    parts = [part for part in path.split("/") if part]
+    if len(parts) < 4 or parts[0] != "apis":
+        return None
+
+    route = {"group": parts[1], "version": parts[2], "namespace": None}
+    rest = parts[3:]
+    if len(rest) >= 3 and rest[0] == "namespaces":
+        route["namespace"] = rest[1]
+        rest = rest[2:]
+
+    if not 1 <= len(rest) <= 3:
+        return None
+
+    route["plural"] = rest[0]
+    route["name"] = rest[1] if len(rest) > 1 else None
+    route["subresource"] = rest[2] if len(rest) > 2 else None
+
+    return route
+
+
+def _matches_labels(obj: Dict, selector: Optional[str]) -> bool:
+    if not selector:
+        return True
+
+    labels = obj.get("metadata", {}).get("labels") or {}
+    for requirement in selector.split(","):
+        requirement = requirement.strip()
+        if "!=" in requirement:
+            key, value = requirement.split("!=", 1)
+            if labels.get(key.strip()) == value.strip():
+                return False
+        elif "=" in requirement:
+            key, value = requirement.split("=", 1)
+            if labels.get(key.strip().rstrip("=")) != value.strip().lstrip("="):
+                return False
+        elif requirement.startswith("!"):
+            if requirement[1:] in labels:
+                return False
+        elif requirement not in labels:
+            return False
+
+    return True
+
+
+def _matches_fields(obj: Dict, selector: Optional[str]) -> bool:
+    if not selector:
+        return True
+
+    metadata = obj.get("metadata", {})
+    for requirement in selector.split(","):
+        field, value = requirement.split("=", 1)
+        field = field.strip().rstrip("=")
+        if field == "metadata.name" and metadata.get("name") != value:
+            return False
+        if field == "metadata.namespace" and metadata.get("namespace") != value:
+            return False
+
+    return True
+
+
+def _encode_continue(key: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def _decode_continue(token: str) -> Tuple:
+    try:
+        return tuple(json.loads(base64.urlsafe_b64decode(token.encode())))
+    except ValueError:
+        raise ApiError(400, "BadRequest", "invalid continue token")
+
+
+def _handler(server: FakeApiServer):
+    class Handler(_RequestHandler):
+        fake = server
+
+    return Handler
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and bodies are written separately, Nagle's algorithm would
+    # delay the latter until the former is acknowledged.
+    disable_nagle_algorithm = True
+    fake: FakeApiServer
+
+    def log_message(self, format, *args):
+        """Requests are not logged."""
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method: str):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = self._read_body()
+
+        fake = self.fake
+        fake.requests.append((method, url.path))
+        fake._delay(method, url.path)
+
+        error = fake._injected_error(method, url.path)
+        if error is not None:
+            headers = {}
+            if error.retry_after is not None:
+                headers["Retry-After"] = str(error.retry_after)
+            api_error = ApiError(error.status, "Injected", "injected error")
+            return self._send(error.status, api_error.status(), headers)
+
+        try:
+            if url.path.startswith("/apis/apiextensions.k8s.io/"):
+                return self._send(200, self._crds(method, url.path))
+
+            route = _parse_path(url.path)
+            if route is None:
+                raise ApiError(404, "NotFound", "the server could not find the requested resource")
+
+            if method == "GET" and route["name"] is None and query.get("watch") in ("true", "True", "1"):
+                return self._watch(route, query)
+
+            status, response = self._custom_objects(method, route, query, body)
+            if method == "GET" and "as=PartialObjectMetadata" in self.headers.get("Accept", ""):
+                response = _partial(response)
+            return self._send(status, response)
+        except ApiError as e:
+            return self._send(e.code, e.status())
+
+    def _read_body(self) -> Optional[Dict]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length == 0:
+            return None
+
+        data = self.rfile.read(length)
+        if "yaml" in self.headers.get("Content-Type", ""):
+            # Apply requests are YAML, or JSON as a subset of it
+            return serialization.load(io.BytesIO(data))
+
+        return serialization.json_loads(data)
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        data = json.dumps(body).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _crds(self, method: str, path: str) -> Dict:
+        if method != "GET":
+            raise ApiError(405, "MethodNotAllowed", "CRDs are added with add_crd()")
+
+        parts = [part for part in path.split("/") if part]
+        api_version = parts[2]
+
+        with self.fake._lock:
+            crds = [_crd_as(crd, api_version) for crd in self.fake._crds.values()]
+
+        if len(parts) == 4:
+            return {
+                "apiVersion": "apiextensions.k8s.io/" + api_version,
+                "kind": "CustomResourceDefinitionList",
+                "metadata": {"resourceVersion": str(self.fake._resource_version)},
+                "items": crds,
+            }
+
+        for crd in crds:
+            if crd["metadata"]["name"] == parts[4]:
+                return crd
+
+        raise ApiError(404, "NotFound", "customresourcedefinitions {} not found".format(parts[4]))
+
+    def _custom_objects(self, method, route, query, body) -> Tuple[int, Dict]:
+        fake = self.fake
+        name = route["name"]
+        key = (route["group"], route["plural"], route["namespace"] or "", name)
+
+        with fake._lock:
+            if name is None:
+                if method == "GET":
+                    return 200, self._list(route, query)
+                if method == "POST":
+                    return 201, self._create(route, body)
+
+                raise ApiError(405, "MethodNotAllowed", "method not allowed")
+
+            current = fake._objects.get(key)
+            if method == "GET":
+                if current is None:
+                    raise _not_found(route)
+                return 200, current
+
+            if method == "DELETE":
+                if current is None:
+                    raise _not_found(route)
+                del fake._objects[key]
+                fake._resource_version += 1
+                # The DELETED event carries the resourceVersion of the deletion
+                deleted = dict(current)
+                deleted["metadata"] = dict(
+                    current["metadata"], resourceVersion=str(fake._resource_version)
+                )
+                fake._record("DELETED", key, deleted)
+                return 200, deleted
+
+            if method == "PUT":
+                if current is None:
+                    raise _not_found(route)
+                return 200, self._write(key, current, body, route["subresource"])
+
+            if method == "PATCH":
+                content_type = self.headers.get("Content-Type", "")
+                if "apply-patch" in content_type:
+                    if current is None:
+                        body.setdefault("metadata", {})["namespace"] = route["namespace"]
+                        return 201, self._create(route, body)
+                    patch = {k: v for k, v in body.items() if k not in ("apiVersion", "kind")}
+                elif "merge-patch" in content_type:
+                    patch = body
+                else:
+                    raise ApiError(415, "UnsupportedMediaType", "unsupported patch type " + content_type)
+
+                if current is None:
+                    raise _not_found(route)
+
+                obj = apply_merge_patch(current, patch)
+                precondition = (patch.get("metadata") or {}).get("resourceVersion")
+                if precondition is None:
+                    obj["metadata"]["resourceVersion"] = current["metadata"]["resourceVersion"]
+
+                return 200, self._write(key, current, obj, route["subresource"])
+
+        raise ApiError(405, "MethodNotAllowed", "method not allowed")
+
+    def _create(self, route, body) -> Dict:
+        fake = self.fake
+        if body is None:
+            raise ApiError(400, "BadRequest", "missing body")
+
+        metadata = body.setdefault("metadata", {})
+        name = metadata.get("name")
+        if not name:
+            raise ApiError(422, "Invalid", "metadata.name: Required value")
+
+        if route["namespace"] is not None:
+            metadata["namespace"] = route["namespace"]
+
+        key = (route["group"], route["plural"], route["namespace"] or "", name)
+        if key in fake._objects:
+            raise ApiError(
+                409, "AlreadyExists", '{} "{}" already exists'.format(route["plural"], name)
+            )
+
+        obj = json.loads(json.dumps(body))
+        # The status is only set through the status subresource
+        obj.pop("status", None)
+        fake._stamp(obj)
+        fake._objects[key] = obj
+        fake._record("ADDED", key, obj)
+
+        return obj
+
+    def _write(self, key, current: Dict, obj: Dict, subresource: Optional[str]) -> Dict:
+        """Replaces `current` with `obj`, checking its resourceVersion."""
+        fake = self.fake
+
+        version = (obj.get("metadata") or {}).get("resourceVersion")
+        if version and version != current["metadata"]["resourceVersion"]:
+            raise ApiError(
+                409,
+                "Conflict",
+                "Operation cannot be fulfilled on {} \"{}\": the object has been modified; "
+                "please apply your changes to the latest version and try again".format(
+                    key[1], key[3]
+                ),
+            )
+
+        if subresource == "status":
+            # Only the status is changed through the status subresource
+            obj = dict(current, status=obj.get("status"))
+        else:
+            # and the status is not changed through the main resource
+            obj = dict(obj)
+            if "status" in current:
+                obj["status"] = current["status"]
+            else:
+                obj.pop("status", None)
+
+        obj["metadata"] = dict(obj.get("metadata") or {})
+        for field in ("name", "namespace"):
+            if field in current["metadata"]:
+                obj["metadata"][field] = current["metadata"][field]
+
+        obj = json.loads(json.dumps(obj))
+        fake._stamp(obj, previous=current)
+        fake._objects[key] = obj
+        fake._record("MODIFIED", key, obj)
+
+        return obj
+
+    def _selected(self, route, query) -> List[Tuple[Tuple, Dict]]:
+        fake = self.fake
+        return sorted(
+            (key, obj)
+            for key, obj in fake._objects.items()
+            if key[0] == route["group"]
+            and key[1] == route["plural"]
+            and (route["namespace"] is None or key[2] == route["namespace"])
+            and _matches_labels(obj, query.get("labelSelector"))
+            and _matches_fields(obj, query.get("fieldSelector"))
+        )
+
+    def _list(self, route, query) -> Dict:
+        selected = self._selected(route, query)
+
+        token = query.get("continue")
+        if token:
+            after = _decode_continue(token)
+            selected = [(key, obj) for key, obj in selected if key > after]
+
+        metadata = {"resourceVersion": str(self.fake._resource_version)}
+        limit = int(query.get("limit") or 0)
+        if limit and len(selected) > limit:
+            selected = selected[:limit]
+            metadata["continue"] = _encode_continue(selected[-1][0])
+
+        return {
+            "apiVersion": "{}/{}".format(route["group"], route["version"]),
+            "kind": "List",
+            "metadata": metadata,
+            "items": [obj for _, obj in selected],
+        }
+
+    def _watch(self, route, query):
+        fake = self.fake
+        timeout = float(query.get("timeoutSeconds") or 0) or None
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        with fake._lock:
+            since = query.get("resourceVersion")
+            if since in (None, "", "0"):
+                # Start with the current state, as ADDED events.
+                since = fake._resource_version
+                pending = [("ADDED", obj) for _, obj in self._selected(route, query)]
+            else:
+                since = int(since)
+                oldest = fake._events[0][0] if fake._events else fake._resource_version + 1
+                if since < fake._resource_version and since < oldest - 1:
+                    gone = ApiError(410, "Expired", "too old resource version: {}".format(since))
+                    self._write_chunk({"type": "ERROR", "object": gone.status()})
+                    return self._end_chunks()
+                pending = []
+
+        try:
+            while not fake._stopped.is_set():
+                for event_type, obj in pending:
+                    self._write_chunk({"type": event_type, "object": obj})
+
+                with fake._lock:
+                    pending = []
+                    for version, event_type, key, obj in fake._events:
+                        if version <= since or not self._watched(route, query, key, obj):
+                            continue
+                        pending.append((event_type, obj))
+                    if fake._events:
+                        since = max(since, fake._events[-1][0])
+
+                    if not pending:
+                        wait = None if deadline is None else deadline - time.monotonic()
+                        if wait is not None and wait <= 0:
+                            break
+                        fake._lock.wait(min(wait or 1, 1))
+
+            self._end_chunks()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped watching
+            pass
+
+    def _watched(self, route, query, key, obj) -> bool:
+        return (
+            key[0] == route["group"]
+            and key[1] == route["plural"]
+            and (route["namespace"] is None or key[2] == route["namespace"])
+            and _matches_labels(obj, query.get("labelSelector"))
+            and _matches_fields(obj, query.get("fieldSelector"))
+        )
+
+    def _write_chunk(self, event: Dict):
+        data = json.dumps(event).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunks(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _not_found(route) -> ApiError:
+    return ApiError(
+        404,
+        "NotFound",
+        '{}.{} "{}" not found'.format(route["plural"], route["group"], route["name"]),
+    )
+
+
+def _partial(obj: Dict) -> Dict:
+    """Returns `obj`, or the list of objects, as `PartialObjectMetadata`."""
+    if "items" in obj:
+        return {
+            "apiVersion": "meta.k8s.io/v1",
+            "kind": "PartialObjectMetadataList",
+            "metadata": obj["metadata"],
+            "items": [_partial(item) for item in obj["items"]],
+        }
+
+    return {
+        "apiVersion": "meta.k8s.io/v1",
+        "kind": "PartialObjectMetadata",
+        "metadata": obj["metadata"],
+    }
+
+
+def _crd_as(crd: Dict, api_version: str) -> Dict:
+    """Returns `crd` as served by the `api_version` of apiextensions."""
+    if api_version == "v1":
+        return crd
+
+    # v1beta1 has a single, top level, version.
+    crd = json.loads(json.dumps(crd))
+    crd["apiVersion"] = "apiextensions.k8s.io/v1beta1"
+    crd["spec"]["version"] = crd["spec"]["versions"][0]["name"]
+    crd["spec"]["subresources"] = crd["spec"]["versions"][0].pop("subresources")
+
+    return crd
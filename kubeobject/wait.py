@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable, Optional
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from kubeobject.exceptions import WaitTimeoutException
+from kubeobject.instrumentation import api_call
+
+HTTP_STATUS_GONE = 410
+
+
+def wait_until(
+    obj,
+    fn: Callable,
+    timeout: Optional[float],
+    reload: str,
+    group: str,
+    version: str,
+    namespace: str,
+    plural: str,
+) -> bool:
+    """Waits until `fn(obj)` is True, for at most `timeout` seconds.
+
+    `obj` is a `CustomObject` or a `KubeObject`. With `reload="watch"` the
+    object is updated from a watch on this single object and `fn` is evaluated
+    on every change. With `reload="poll"` the object is reloaded every
+    `obj.auto_reload_period` instead.
+
+    Raises `WaitTimeoutException` if `fn(obj)` is not True in time.
+    """
+    if reload not in ("watch", "poll"):
+        raise ValueError("`reload` should be one of 'watch' or 'poll'.")
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    def remaining() -> Optional[float]:
+        if deadline is None:
+            return None
+
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise WaitTimeoutException(
+                "Timed out waiting for {}/{}".format(namespace, obj.name)
+            )
+
+        return left
+
+    obj.reload()
+    if fn(obj):
+        return True
+
+    if reload == "poll":
+        while True:
+            period = obj.auto_reload_period.total_seconds()
+            left = remaining()
+            time.sleep(period if left is None else min(period, left))
+
+            obj.reload()
+            if fn(obj):
+                return True
+
+    while True:
+        left = remaining()
+
+        w = watch.Watch()
+        try:
+            with api_call("watch", plural):
+                for event in w.stream(
+                    obj.api.list_namespaced_custom_object,
+                    group,
+                    version,
+                    namespace,
+                    plural,
+                    field_selector="metadata.name={}".format(obj.name),
+                    resource_version=obj._synced_obj["metadata"].get("resourceVersion"),
+                    timeout_seconds=None if left is None else math.ceil(left),
+                ):
+                    if event["type"] == "DELETED":
+                        obj.bound = False
+                    else:
+                        obj._bind(event["raw_object"])
+
+                    if fn(obj):
+                        w.stop()
+                        return True
+
+                    remaining()
+        except ApiException as e:
+            if e.status != HTTP_STATUS_GONE:
+                raise
+
+            # Our resourceVersion is too old to watch from, read the object
+            # again and start watching from there.
+            obj.reload()
+            if fn(obj):
+                return True
@@ -28,6 +28,10 @@ setup(
     long_description_content_type="text/markdown",
 
     install_requires=packages,
+    extras_require={
+        "aio": ["kubernetes_asyncio"],
+        "fast": ["orjson"],
+    },
 
     packages=find_packages(),
 )
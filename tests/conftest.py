@@ -0,0 +1,43 @@
+import pytest
+
+from kubeobject import CustomObject
+from kubeobject.testing import FakeApiServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeApiServer() as server:
+        server.add_crd("dummy.com", "v1", "dummies", "Dummy")
+        yield server
+
+
+@pytest.fixture
+def api_client(server):
+    return server.api_client()
+
+
+@pytest.fixture
+def fast_io():
+    # Overridden by the modules testing `fast_io` classes.
+    return False
+
+
+@pytest.fixture
+def Dummy(api_client, fast_io):
+    # Every test uses its own namespace on the shared server
+    klass = CustomObject.define(
+        "Dummy",
+        kind="Dummy",
+        plural="dummies",
+        group="dummy.com",
+        version="v1",
+        api_client=api_client,
+    )
+    klass.fast_io = fast_io
+
+    return klass
+
+
+@pytest.fixture
+def namespace(request):
+    return request.node.name.replace("_", "-")
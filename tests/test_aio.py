@@ -0,0 +1,377 @@
+import asyncio
+import inspect
+from unittest import mock
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from kubernetes_asyncio import client as async_client
+
+from kubeobject.aio import (
+    AsyncCustomObject,
+    AsyncKubeObject,
+    close_default_api_client,
+    default_api_client,
+)
+from kubeobject.patch import apply_merge_patch
+from kubeobject.testing import FakeApiServer
+
+
+def mocked_async_custom_api():
+    stored_body = []
+
+    async def get_namespaced_custom_object(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return stored_body[-1]
+
+    async def create_namespaced_custom_object(*args, body=None, **kwargs):
+        body = body if body is not None else args[-1]
+        stored_body.append(body)
+        return body
+
+    async def patch_namespaced_custom_object(*args, body=None, **kwargs):
+        body = body if body is not None else args[-1]
+        stored_body.append(apply_merge_patch(stored_body[-1], body))
+        return stored_body[-1]
+
+    api = MagicMock()
+    api.get_namespaced_custom_object = AsyncMock(side_effect=get_namespaced_custom_object)
+    api.create_namespaced_custom_object = AsyncMock(
+        side_effect=create_namespaced_custom_object
+    )
+    api.patch_namespaced_custom_object = AsyncMock(
+        side_effect=patch_namespaced_custom_object
+    )
+    api.delete_namespaced_custom_object = AsyncMock()
+
+    return api
+
+
+@mock.patch("kubeobject.aio.async_client.ApiClient")
+@mock.patch("kubeobject.aio.async_client.CustomObjectsApi")
+def test_async_custom_object_lifecycle(mocked_client, _):
+    mocked_client.return_value = mocked_async_custom_api()
+    Dummy = AsyncCustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    async def lifecycle():
+        obj = Dummy("my-dummy", "default")
+        obj["spec"] = {"attr": "value"}
+
+        await obj.create()
+        assert obj.bound
+
+        obj["spec"] = {"attr": "other value"}
+        await obj.update()
+        await obj.reload()
+        assert obj["spec"]["attr"] == "other value"
+
+        await obj.delete()
+
+    asyncio.run(lifecycle())
+    assert issubclass(Dummy, AsyncCustomObject)
+    mocked_client.return_value.delete_namespaced_custom_object.assert_awaited_once()
+
+
+@mock.patch("kubeobject.aio.async_client.ApiClient")
+@mock.patch("kubeobject.aio.async_client.CustomObjectsApi")
+def test_async_custom_objects_run_concurrently(mocked_client, mocked_api_client):
+    mocked_client.return_value = mocked_async_custom_api()
+    Dummy = AsyncCustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    async def load_many():
+        objs = [Dummy("dummy-{}".format(i), "default") for i in range(100)]
+        await objs[0].create()
+        await asyncio.gather(*(obj.load() for obj in objs))
+
+        return objs
+
+    loop = asyncio.new_event_loop()
+    start = loop.time()
+    objs = loop.run_until_complete(load_many())
+    elapsed = loop.time() - start
+    loop.close()
+
+    # Each get takes 10ms, sequentially this would take at least 1s.
+    assert elapsed < 0.5
+    assert all(obj.bound for obj in objs)
+
+    # Objects in the same event loop share an ApiClient
+    mocked_api_client.assert_called_once()
+
+
+@mock.patch("kubeobject.aio.async_client.ApiClient")
+@mock.patch("kubeobject.aio.async_client.CustomObjectsApi")
+def test_async_custom_object_wait_for_times_out(mocked_client, _):
+    mocked_client.return_value = mocked_async_custom_api()
+    Dummy = AsyncCustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    async def wait():
+        obj = await Dummy("my-dummy", "default").create()
+        obj.auto_reload_period = obj.auto_reload_period / 100
+
+        assert await obj.wait_for(lambda o: o["metadata"]["name"] == "my-dummy")
+        await obj.wait_for(lambda o: False, timeout=0.1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(wait())
+
+
+@mock.patch("kubeobject.aio.async_client.ApiClient")
+@mock.patch("kubeobject.aio.async_client.CustomObjectsApi")
+def test_async_kubeobject_lifecycle(mocked_client, _):
+    mocked_client.return_value = mocked_async_custom_api()
+
+    async def lifecycle():
+        k = AsyncKubeObject("dummy.com", "v1", "dummies")
+        k.metadata = {"name": "my-dummy", "namespace": "default"}
+        k.spec = {"attr": "value"}
+
+        await k.create()
+        assert k.bound
+        assert k.name == "my-dummy"
+
+        k.spec.attr = "other value"
+        await k.update()
+        await k.reload()
+        assert k.spec.attr == "other value"
+
+        await k.delete()
+        assert not k.bound
+
+    asyncio.run(lifecycle())
+
+
+def async_api_client(server: FakeApiServer) -> async_client.ApiClient:
+    # Created from the running event loop, as aiohttp requires
+    return async_client.ApiClient(async_client.Configuration(host=server.url))
+
+
+def test_async_apply(server):
+    async def apply():
+        async with async_api_client(server) as api_client:
+            obj = AsyncCustomObject(
+                "my-dummy",
+                "test-async-apply",
+                kind="Dummy",
+                plural="dummies",
+                group="dummy.com",
+                version="v1",
+                api_client=api_client,
+            )
+            obj["spec"] = {"attr": "value"}
+            await obj.apply()
+            assert obj.bound
+
+            with mock.patch("kubeobject.aio.default_api_client", return_value=api_client):
+                k = AsyncKubeObject("dummy.com", "v1", "dummies")
+            k.read_from_dict(
+                {"metadata": {"name": "my-dummy"}, "spec": {"other": "value"}}
+            )
+            await k.apply(field_manager="other", namespace="test-async-apply", force=True)
+
+            await obj.reload()
+            return obj["spec"]
+
+    assert asyncio.run(apply()) == {"attr": "value", "other": "value"}
+
+
+def test_async_metadata(server):
+    async def metadata():
+        async with async_api_client(server) as api_client:
+            Dummy = AsyncCustomObject.define(
+                "Dummy",
+                kind="Dummy",
+                plural="dummies",
+                group="dummy.com",
+                version="v1",
+                api_client=api_client,
+            )
+
+            obj = Dummy("my-dummy", "test-async-metadata")
+            assert not await obj.exists()
+
+            obj["metadata"]["labels"] = {"app": "dummy"}
+            await obj.create()
+            assert await obj.exists()
+            assert (await obj.load_metadata())["labels"] == {"app": "dummy"}
+
+            await Dummy("other-dummy", "test-async-metadata").create()
+            return await Dummy.list_metadata(namespace="test-async-metadata", page_size=1)
+
+    metadata = asyncio.run(metadata())
+    assert [m["name"] for m in metadata] == ["my-dummy", "other-dummy"]
+
+
+def test_async_status(server):
+    async def status():
+        async with async_api_client(server) as api_client:
+            obj = AsyncCustomObject(
+                "my-dummy",
+                "test-async-status",
+                kind="Dummy",
+                plural="dummies",
+                group="dummy.com",
+                version="v1",
+                api_client=api_client,
+            )
+            await obj.create()
+
+            obj["spec"] = {"attr": "local value"}
+            obj["status"] = {"phase": "Running"}
+            await obj.update_status()
+            assert obj["spec"] == {"attr": "local value"}
+
+            with mock.patch("kubeobject.aio.default_api_client", return_value=api_client):
+                k = AsyncKubeObject("dummy.com", "v1", "dummies")
+            await k.read("my-dummy", "test-async-status")
+            assert k.status.phase == "Running"
+            assert "attr" not in k.spec
+
+            k.status.phase = "Done"
+            await k.update_status()
+
+            await obj.reload_status()
+            assert obj.changed_since_last_reload
+            return obj
+
+    obj = asyncio.run(status())
+    assert obj["status"] == {"phase": "Done"}
+    assert obj["spec"] == {"attr": "local value"}
+
+
+# Methods of the async classes which do not call the Kubernetes API.
+SYNCHRONOUS_METHODS = {
+    "batch",
+    "define",
+    "flush",
+    "from_yaml",
+    "init_attributes",
+    "iter_yaml",
+    "read_from_dict",
+    "read_from_yaml_file",
+    "to_dict",
+    "to_yaml",
+}
+
+
+@pytest.mark.parametrize("klass", [AsyncCustomObject, AsyncKubeObject])
+def test_api_methods_are_awaitable(klass):
+    for name in dir(klass):
+        method = getattr(klass, name)
+        if name.startswith("_") or not callable(method) or name in SYNCHRONOUS_METHODS:
+            continue
+
+        assert inspect.iscoroutinefunction(method) or inspect.isasyncgenfunction(method), name
+
+
+def test_async_custom_object_methods(server):
+    async def run():
+        async with async_api_client(server) as api_client:
+            Dummy = AsyncCustomObject.define(
+                "Dummy",
+                kind="Dummy",
+                plural="dummies",
+                group="dummy.com",
+                version="v1",
+                api_client=api_client,
+            )
+
+            obj = Dummy("my-dummy", "test-async-methods")
+            assert not await obj.exists()
+            obj["spec"] = {"attr": "value"}
+            await obj.create()
+            assert await obj.exists()
+            assert (await obj.load_metadata())["name"] == "my-dummy"
+
+            obj["spec"]["attr"] = "other value"
+            await obj.update(retry_on_conflict=1)
+            await Dummy("my-dummy", "test-async-methods").load()
+
+            obj["status"] = {"phase": "Running"}
+            await obj.update_status()
+            await obj.reload_status()
+            await obj.reload()
+            assert await obj.wait_for(lambda o: o["status"]["phase"] == "Running")
+
+            other = Dummy("other-dummy", "test-async-methods")
+            await other.apply()
+
+            assert [o.name for o in await Dummy.load_many("test-async-methods")] == [
+                "my-dummy",
+                "other-dummy",
+            ]
+            assert [o.name async for o in Dummy.iter_all("test-async-methods", page_size=1)] == [
+                "my-dummy",
+                "other-dummy",
+            ]
+            assert len(await Dummy.list_metadata("test-async-methods")) == 2
+
+            await other.delete()
+            assert not await other.exists()
+
+            return await Dummy("my-dummy", "test-async-methods").load()
+
+    obj = asyncio.run(run())
+    assert obj["spec"] == {"attr": "other value"}
+    assert obj["status"] == {"phase": "Running"}
+
+
+def test_async_kubeobject_methods(server):
+    async def run():
+        async with async_api_client(server) as api_client:
+            with mock.patch("kubeobject.aio.default_api_client", return_value=api_client):
+                k = AsyncKubeObject("dummy.com", "v1", "dummies")
+
+            k.read_from_dict({"metadata": {"name": "my-dummy"}})
+            await k.create(namespace="test-async-methods-k")
+
+            k.spec = {"attr": "value"}
+            await k.update(retry_on_conflict=1)
+            await k.read("my-dummy", "test-async-methods-k")
+
+            k.status = {"phase": "Running"}
+            await k.update_status()
+            await k.reload_status()
+            await k.reload()
+            assert await k.wait_for(lambda o: o.status.phase == "Running")
+
+            k.spec.other = "value"
+            await k.apply()
+            spec = k.spec.to_dict()
+
+            await k.delete()
+            return spec
+
+    assert asyncio.run(run()) == {"attr": "value", "other": "value"}
+
+
+def test_async_custom_object_needs_crd_names():
+    async def create():
+        AsyncCustomObject("my-dummy", "default", plural="dummies", group="dummy.com")
+
+    with pytest.raises(ValueError) as e:
+        asyncio.run(create())
+    assert "kind, version" in str(e.value)
+
+    Dummy = AsyncCustomObject.define("Dummy", plural="dummies", group="dummy.com")
+    with pytest.raises(ValueError):
+        asyncio.run(Dummy.load_many("default"))
+
+
+def test_close_default_api_client():
+    async def close():
+        api_client = default_api_client()
+        await close_default_api_client()
+
+        # A new one is created on the next use
+        assert default_api_client() is not api_client
+        await close_default_api_client()
+        return api_client
+
+    api_client = asyncio.run(close())
+    assert api_client.rest_client.pool_manager.closed
@@ -0,0 +1,81 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from kubeobject import CustomObject
+from kubeobject.bulk import create_all, delete_all, reload_all, run_all, update_all
+
+
+class SlowApi:
+    """Takes 10ms for every call, and fails for objects named "bad-*"."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def call(self, name, body=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(0.01)
+
+        with self.lock:
+            self.in_flight -= 1
+
+        if name.startswith("bad-"):
+            raise ApiException(status=422, reason="Invalid")
+
+        return {"metadata": {"name": name, "namespace": "default"}, "spec": {}}
+
+    def create_namespaced_custom_object(self, group, version, namespace, plural, body):
+        return self.call(body["metadata"]["name"])
+
+    def patch_namespaced_custom_object(self, group, version, namespace, plural, name, body):
+        return self.call(name)
+
+    def get_namespaced_custom_object(self, group, version, namespace, plural, name):
+        return self.call(name)
+
+    def delete_namespaced_custom_object(self, group, version, namespace, plural, name, body):
+        return self.call(name)
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_bulk_operations(mocked_client):
+    api = SlowApi()
+    mocked_client.return_value = api
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    objs = [Dummy("dummy-{}".format(i), "default") for i in range(100)]
+    objs.append(Dummy("bad-dummy", "default"))
+
+    start = time.monotonic()
+    results = create_all(objs, max_workers=20)
+    elapsed = time.monotonic() - start
+
+    # Sequentially this would take at least 1s
+    assert elapsed < 0.5
+    assert api.max_in_flight <= 20
+
+    assert [result.obj for result in results] == objs
+    assert len(results.succeeded) == 100
+    assert [result.obj.name for result in results.failed] == ["bad-dummy"]
+    assert results.failed[0].error.status == 422
+    with pytest.raises(ApiException):
+        results.raise_for_errors()
+
+    created = results.succeeded
+    assert all(obj.bound for obj in created)
+    for operation in (update_all, reload_all, delete_all):
+        assert not operation(created).failed
+
+
+def test_run_all_without_objects():
+    assert run_all(lambda obj: obj, []) == []
@@ -0,0 +1,91 @@
+import gc
+import socket
+import weakref
+from unittest import mock
+
+from kubernetes import client
+
+from kubeobject import CustomObject, KubeObject
+from kubeobject.clients import ClientRegistry, api_clients, shared_api
+
+
+def test_clients_are_shared_and_pooled():
+    registry = ClientRegistry(pool_size=50)
+
+    api_client = registry.get()
+    assert registry.get() is api_client
+
+    pool_manager = api_client.rest_client.pool_manager
+    assert pool_manager.connection_pool_kw["maxsize"] == 50
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in pool_manager.connection_pool_kw[
+        "socket_options"
+    ]
+
+
+def test_configure_builds_new_clients():
+    registry = ClientRegistry()
+    api_client = registry.get()
+
+    registry.configure(pool_size=8, keepalive=False)
+    new_client = registry.get()
+
+    assert new_client is not api_client
+    assert new_client.rest_client.pool_manager.connection_pool_kw["maxsize"] == 8
+    assert "socket_options" not in new_client.rest_client.pool_manager.connection_pool_kw
+
+
+def test_default_client_follows_default_configuration():
+    registry = ClientRegistry()
+    api_client = registry.get()
+
+    configuration = client.Configuration()
+    configuration.host = "https://other-cluster:6443"
+    with mock.patch.object(client.Configuration, "_default", configuration):
+        other_client = registry.get()
+
+    assert other_client is not api_client
+    assert other_client.configuration.host == "https://other-cluster:6443"
+
+
+@mock.patch("kubeobject.clients.config.load_kube_config")
+def test_clients_by_context(mocked_load_kube_config):
+    registry = ClientRegistry()
+
+    api_client = registry.get("my-context")
+    assert registry.get("my-context") is api_client
+    assert registry.get() is not api_client
+
+    mocked_load_kube_config.assert_called_once()
+    assert mocked_load_kube_config.call_args[1]["context"] == "my-context"
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+@mock.patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_objects_share_the_default_client(kube_objects_api, custom_objects_api):
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    a = Dummy("a", "default")
+    b = Dummy("b", "default")
+    KubeObject("dummy.com", "v1", "dummies")
+
+    assert a.api_client is b.api_client is api_clients.get()
+    for call in custom_objects_api.call_args_list + kube_objects_api.call_args_list:
+        assert call[1]["api_client"] is api_clients.get()
+
+
+def test_shared_apis_are_freed_with_their_client():
+    registry = ClientRegistry()
+    api_client = registry.get()
+
+    api = shared_api(client.CustomObjectsApi, api_client)
+    assert shared_api(client.CustomObjectsApi, api_client) is api
+    assert shared_api(client.CustomObjectsApi, registry.get()) is api
+
+    ref = weakref.ref(api_client)
+    registry.configure(pool_size=8)
+    del api_client, api
+    gc.collect()
+
+    assert ref() is None
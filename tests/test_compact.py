@@ -0,0 +1,84 @@
+import json
+from unittest import mock
+
+from kubeobject import CustomObject, KubeObject
+from kubeobject.compact import compact_object
+
+manifest = {
+    "apiVersion": "dummy.com/v1",
+    "kind": "Dummy",
+    "metadata": {"name": "my-dummy", "namespace": "default", "labels": {"app": "dummy"}},
+    "spec": {"members": [{"name": "m0"}]},
+}
+
+
+def test_compact_object_interns_keys_and_values():
+    a = compact_object(json.loads(json.dumps(manifest)))
+    b = compact_object(json.loads(json.dumps(manifest)))
+
+    assert a == manifest
+    a_keys = list(a["spec"]["members"][0])
+    b_keys = list(b["spec"]["members"][0])
+    assert a_keys[0] is b_keys[0]
+    assert a["kind"] is b["kind"]
+    assert a["metadata"]["namespace"] is b["metadata"]["namespace"]
+    assert a["metadata"]["labels"]["app"] is b["metadata"]["labels"]["app"]
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_objects_are_compact(mocked_client):
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    a = Dummy("a", "default")
+    b = Dummy("b", "default")
+
+    assert a.api is b.api
+    assert a.auto_reload_period is b.auto_reload_period
+    mocked_client.assert_called_once()
+
+    Dummy.compact = True
+    a._bind(json.loads(json.dumps(manifest)))
+    b._bind(json.loads(json.dumps(manifest)))
+    assert a["kind"] is b["kind"]
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_define_compact(_):
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1", compact=True
+    )
+    assert Dummy.compact
+
+    a = Dummy("a", "default")
+    b = Dummy("b", "default")
+    a._bind(json.loads(json.dumps(manifest)))
+    b._bind(json.loads(json.dumps(manifest)))
+    assert a["kind"] is b["kind"]
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_objects_take_attributes_of_their_own(_):
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    a = Dummy("a", "default")
+    a.my_tag = 1
+    assert a.my_tag == 1
+    assert vars(a) == {"my_tag": 1}
+
+
+@mock.patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_kube_objects_share_api(_):
+    class CompactKubeObject(KubeObject):
+        compact = True
+
+    a = CompactKubeObject("dummy.com", "v1", "dummies")
+    b = CompactKubeObject("dummy.com", "v1", "dummies")
+    assert a.api is b.api
+
+    a._bind(json.loads(json.dumps(manifest)))
+    b._bind(json.loads(json.dumps(manifest)))
+    assert a.metadata.namespace is b.metadata.namespace
@@ -0,0 +1,130 @@
+from unittest import mock
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from kubeobject import CustomObject, KubeObject
+from kubeobject.conflict import conflict_backoff, with_precondition
+from kubeobject.patch import apply_merge_patch
+
+
+class ConflictingApi:
+    """Stores a single object, and rejects patches with a stale
+    resourceVersion as the API server does."""
+
+    def __init__(self, conflicts=1):
+        self.conflicts = conflicts
+        self.patches = []
+        self.store = {
+            "metadata": {"name": "my-dummy", "namespace": "default", "resourceVersion": "1"},
+            "spec": {"replicas": 1, "version": "1.0"},
+        }
+
+    def modify(self, patch):
+        self.store = apply_merge_patch(self.store, patch)
+        version = int(self.store["metadata"]["resourceVersion"]) + 1
+        self.store["metadata"]["resourceVersion"] = str(version)
+
+    def get_namespaced_custom_object(self, *args, **kwargs):
+        return self.store
+
+    def patch_namespaced_custom_object(self, *args, body=None, **kwargs):
+        body = body if body is not None else args[-1]
+        self.patches.append(body)
+
+        expected = body.get("metadata", {}).get("resourceVersion")
+        if expected is not None and expected != self.store["metadata"]["resourceVersion"]:
+            raise ApiException(status=409, reason="Conflict")
+
+        if self.conflicts > 0:
+            # Somebody else updates the object right before us.
+            self.conflicts -= 1
+            self.modify({"spec": {"replicas": 3}})
+            raise ApiException(status=409, reason="Conflict")
+
+        self.modify({key: value for key, value in body.items() if key != "metadata"})
+        return self.store
+
+
+def test_with_precondition():
+    changes = {"spec": {"replicas": 2}}
+    synced = {"metadata": {"name": "my-dummy", "resourceVersion": "7"}}
+
+    assert with_precondition(changes, synced) == {
+        "spec": {"replicas": 2},
+        "metadata": {"resourceVersion": "7"},
+    }
+    assert changes == {"spec": {"replicas": 2}}
+    assert with_precondition(changes, {"metadata": {}}) is changes
+
+
+def test_conflict_backoff_is_bounded():
+    assert conflict_backoff(1) <= conflict_backoff(3) * 4
+    assert conflict_backoff(100) <= 1.0
+
+
+@mock.patch("kubeobject.conflict.time.sleep")
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_object_update_retries_on_conflict(mocked_client, _):
+    api = ConflictingApi(conflicts=2)
+    mocked_client.return_value = api
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").load()
+    k["spec"]["version"] = "2.0"
+    k.update(retry_on_conflict=3)
+
+    # The change made by somebody else is kept, and ours is applied on top
+    assert api.store["spec"] == {"replicas": 3, "version": "2.0"}
+    assert k["spec"] == {"replicas": 3, "version": "2.0"}
+    assert len(api.patches) == 3
+    assert all(patch["spec"] == {"version": "2.0"} for patch in api.patches)
+
+
+@mock.patch("kubeobject.conflict.time.sleep")
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_object_update_gives_up(mocked_client, _):
+    mocked_client.return_value = ConflictingApi(conflicts=5)
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").load()
+    k["spec"]["version"] = "2.0"
+
+    with pytest.raises(ApiException):
+        k.update(retry_on_conflict=2)
+
+    assert len(mocked_client.return_value.patches) == 3
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_update_without_retries_sends_no_precondition(mocked_client):
+    api = ConflictingApi(conflicts=0)
+    mocked_client.return_value = api
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").load()
+    k["spec"]["version"] = "2.0"
+    k.update()
+
+    assert api.patches == [{"spec": {"version": "2.0"}}]
+
+
+@mock.patch("kubeobject.conflict.time.sleep")
+@mock.patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_kubeobject_update_retries_on_conflict(patched_custom_objects_api, _):
+    api = ConflictingApi(conflicts=1)
+    patched_custom_objects_api.return_value = api
+
+    c = KubeObject("dummy.com", "v1", "dummies").read("my-dummy", "default")
+    c.spec.version = "2.0"
+    c.update(retry_on_conflict=1)
+
+    assert api.store["spec"] == {"replicas": 3, "version": "2.0"}
+    assert c.spec.replicas == 3
+    assert c.metadata.resourceVersion == "3"
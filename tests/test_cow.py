@@ -0,0 +1,71 @@
+import copy
+import json
+
+from kubeobject.cow import CowBox, CowDict
+from kubeobject.patch import merge_patch
+
+original = {
+    "metadata": {"name": "my-dummy", "labels": {"app": "dummy"}},
+    "spec": {"members": 3, "args": ["--a", "--b"]},
+    "status": {"members": [{"name": "m0"}, {"name": "m1"}]},
+}
+
+
+def test_cow_dict_does_not_modify_source():
+    before = copy.deepcopy(original)
+
+    obj = CowDict(original)
+    obj["metadata"]["labels"]["env"] = "prod"
+    obj["spec"]["args"].append("--c")
+    obj["status"]["members"][0]["name"] = "m2"
+    del obj["spec"]["members"]
+
+    assert original == before
+    assert obj["metadata"]["labels"] == {"app": "dummy", "env": "prod"}
+    assert obj["spec"] == {"args": ["--a", "--b", "--c"]}
+    assert obj["status"]["members"][0]["name"] == "m2"
+
+
+def test_cow_dict_shares_what_is_not_accessed():
+    obj = CowDict(original)
+    obj["metadata"]["name"] = "other-dummy"
+
+    assert dict.__getitem__(obj, "spec") is original["spec"]
+    assert dict.__getitem__(obj["metadata"], "labels") is original["metadata"]["labels"]
+
+    # Only changed keys end up in the patch
+    assert merge_patch(original, obj) == {"metadata": {"name": "other-dummy"}}
+
+
+def test_cow_dict_copies_are_plain():
+    obj = CowDict(original)
+
+    assert type(copy.deepcopy(obj)) is dict
+    assert copy.deepcopy(obj) == original
+    assert json.loads(json.dumps(obj)) == original
+
+
+def test_cow_box_does_not_modify_source():
+    before = copy.deepcopy(original)
+
+    obj = CowBox(original, default_box=True)
+    obj.metadata.labels.env = "prod"
+    obj.spec.args.append("--c")
+    obj.status.members[0].name = "m2"
+    obj.spec.other.attr = "value"
+
+    assert original == before
+    assert obj.metadata.labels == {"app": "dummy", "env": "prod"}
+    assert obj.spec.other.attr == "value"
+    assert isinstance(obj.status.members[0], CowBox)
+
+
+def test_cow_box_to_dict():
+    obj = CowBox(original, default_box=True)
+    obj.metadata.name = "other-dummy"
+
+    as_dict = obj.to_dict()
+    as_dict["spec"]["members"] = 5
+
+    assert original["spec"]["members"] == 3
+    assert merge_patch(original, obj) == {"metadata": {"name": "other-dummy"}}
@@ -1,3 +1,7 @@
+import io
+import json
+import threading
+import time
 from datetime import datetime, timedelta
 from types import SimpleNamespace
 from unittest import mock
@@ -5,8 +9,12 @@ from unittest.mock import MagicMock
 
 import pytest
 from freezegun import freeze_time
+from kubernetes.client.rest import ApiException
 
 from kubeobject import CustomObject
+from kubeobject.flowcontrol import FlowControlledApiClient
+from kubeobject.instrumentation import InMemoryCollector, add_sink, remove_sink
+from kubeobject.patch import apply_merge_patch
 
 yaml_data0 = """
 ---
@@ -50,8 +58,8 @@ def mocked_custom_api():
     def patch_namespaced_custom_object(
         group, version, namespace, plural, name, body: dict
     ):
-        stored_body.append(body)
-        return body
+        stored_body.append(apply_merge_patch(stored_body[-1], body))
+        return stored_body[-1]
 
     base = MagicMock()
     base.get_namespaced_custom_object = MagicMock(
@@ -236,6 +244,24 @@ def test_defined_wont_require_api_if_all_parameteres_are_provided(mocked_client)
     assert k.get_spec() == {"testAttr": "value"}
 
 
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_define_from_subclass_with_its_own_init(mocked_client):
+    class Tagged(CustomObject):
+        def __init__(self, name, namespace, tag):
+            super().__init__(
+                name, namespace, kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+            )
+            self.backing_obj["metadata"]["labels"] = {"tag": tag}
+
+    Dummy = Tagged.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default")
+    assert isinstance(k, Tagged)
+    assert k.plural == "dummies"
+
+
 @mock.patch("kubeobject.customobject.client.CustomObjectsApi")
 @mock.patch(
     "kubeobject.customobject.get_crd_names", return_value=mocked_crd_return_value()
@@ -321,3 +347,565 @@ def test_name_is_set_as_argument(_):
 def test_called_when_updating(mocked_client):
     mocked_client.return_value = mocked_custom_api()
     assert True
+
+
+def mocked_list_response():
+    return {
+        "metadata": {"resourceVersion": "10"},
+        "items": [
+            {
+                "metadata": {"name": "dummy-{}".format(i), "namespace": "default"},
+                "kind": "Dummy",
+                "spec": {"index": i},
+            }
+            for i in range(5)
+        ],
+    }
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_load_many(mocked_client):
+    mocked_client.return_value.list_namespaced_custom_object.return_value = (
+        mocked_list_response()
+    )
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    objs = Dummy.load_many("default", label_selector="app=dummy")
+
+    mocked_client.return_value.list_namespaced_custom_object.assert_called_once_with(
+        "dummy.com", "v1", "default", "dummies", label_selector="app=dummy"
+    )
+    mocked_client.return_value.get_namespaced_custom_object.assert_not_called()
+
+    assert len(objs) == 5
+    for i, obj in enumerate(objs):
+        assert isinstance(obj, Dummy)
+        assert obj.bound
+        assert obj.last_update is not None
+        assert obj.name == "dummy-{}".format(i)
+        assert obj["spec"]["index"] == i
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_load_many_filters_by_name_in_all_namespaces(mocked_client):
+    mocked_client.return_value.list_cluster_custom_object.return_value = (
+        mocked_list_response()
+    )
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    objs = Dummy.load_many(names=["dummy-1", "dummy-3", "not-found"])
+
+    mocked_client.return_value.list_cluster_custom_object.assert_called_once_with(
+        "dummy.com", "v1", "dummies", label_selector=None
+    )
+    assert [obj.name for obj in objs] == ["dummy-1", "dummy-3"]
+    assert objs[0].namespace == "default"
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+@mock.patch(
+    "kubeobject.customobject.get_crd_names", return_value=mocked_crd_return_value()
+)
+def test_load_many_resolves_names_once(mocked_get_crd_names, mocked_client):
+    mocked_client.return_value.list_namespaced_custom_object.return_value = (
+        mocked_list_response()
+    )
+    Dummy = CustomObject.define("Dummy", kind="Dummy")
+
+    objs = Dummy.load_many("default")
+
+    assert len(objs) == 5
+    assert objs[0].plural == "dummies"
+    mocked_get_crd_names.assert_called_once()
+
+
+def test_load_many_requires_a_defined_class():
+    with pytest.raises(ValueError, match=r".*classes created with `define\(\)`.*"):
+        CustomObject.load_many("default")
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_update_sends_only_changes(mocked_client):
+    instance = mocked_custom_api()
+    mocked_client.return_value = instance
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default")
+    k["spec"] = {"replicas": 1, "version": "1.0", "nested": {"a": "b"}}
+    k["status"] = {"phase": "Running"}
+    k.create()
+
+    k["spec"]["version"] = "2.0"
+    k["spec"]["nested"]["c"] = "d"
+    del k["spec"]["replicas"]
+    k.update()
+
+    body = instance.patch_namespaced_custom_object.call_args[0][-1]
+    assert body == {"spec": {"version": "2.0", "nested": {"c": "d"}, "replicas": None}}
+
+    assert k["spec"] == {"version": "2.0", "nested": {"a": "b", "c": "d"}}
+    assert k["status"] == {"phase": "Running"}
+
+    # Nothing changed since the last update
+    k.update()
+    assert instance.patch_namespaced_custom_object.call_args[0][-1] == {}
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_apply_uses_server_side_apply(mocked_client):
+    def call_api(path, method, path_params, body, **kwargs):
+        obj = json.loads(body)
+        obj["metadata"]["resourceVersion"] = "2"
+        return obj
+
+    mocked_client.return_value.api_client.call_api.side_effect = call_api
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default")
+    k["spec"] = {"attr": "value"}
+    k["metadata"]["resourceVersion"] = "1"
+    k.apply(field_manager="my-manager", force=True)
+
+    assert k.bound
+    assert k["metadata"]["resourceVersion"] == "2"
+
+    call_api = mocked_client.return_value.api_client.call_api
+    call_api.assert_called_once()
+    args, kwargs = call_api.call_args
+
+    assert args[1] == "PATCH"
+    assert kwargs["path_params"]["name"] == "my-dummy"
+    assert kwargs["header_params"]["Content-Type"] == "application/apply-patch+yaml"
+    assert kwargs["query_params"] == [("fieldManager", "my-manager"), ("force", True)]
+    assert json.loads(kwargs["body"]) == {
+        "apiVersion": "dummy.com/v1",
+        "kind": "Dummy",
+        "metadata": {"name": "my-dummy", "namespace": "default"},
+        "spec": {"attr": "value"},
+    }
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_batch_saves_once(mocked_client):
+    instance = mocked_custom_api()
+    mocked_client.return_value = instance
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").create()
+    k.auto_save = True
+
+    with k.batch():
+        k["spec"] = {"replicas": 3}
+        k["status"] = {"phase": "Pending"}
+        with k.batch():
+            k["data"] = "some data"
+
+        instance.patch_namespaced_custom_object.assert_not_called()
+
+    instance.patch_namespaced_custom_object.assert_called_once()
+    body = instance.patch_namespaced_custom_object.call_args[0][-1]
+    assert body == {
+        "spec": {"replicas": 3},
+        "status": {"phase": "Pending"},
+        "data": "some data",
+    }
+
+    # Without batch, every change is saved
+    k["spec"] = {"replicas": 5}
+    assert instance.patch_namespaced_custom_object.call_count == 2
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_batch_does_not_save_on_error(mocked_client):
+    instance = mocked_custom_api()
+    mocked_client.return_value = instance
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").create()
+    k.auto_save = True
+
+    k["metadata"]["labels"] = {"saved": "later"}
+
+    with pytest.raises(RuntimeError):
+        with k.batch():
+            k["spec"] = {"replicas": 3}
+            k["metadata"]["labels"]["saved"] = "changed"
+            raise RuntimeError
+
+    instance.patch_namespaced_custom_object.assert_not_called()
+    assert k["spec"] == {}
+    assert k["metadata"]["labels"] == {"saved": "later"}
+
+    # The changes of the aborted block are not saved later either
+    k.flush()
+    instance.patch_namespaced_custom_object.assert_not_called()
+
+    with k.batch():
+        k["spec"] = {"replicas": 1}
+
+    instance.patch_namespaced_custom_object.assert_called_once()
+    assert instance.patch_namespaced_custom_object.call_args[0][-1] == {
+        "metadata": {"labels": {"saved": "later"}},
+        "spec": {"replicas": 1},
+    }
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_auto_save_delay(mocked_client):
+    instance = mocked_custom_api()
+    mocked_client.return_value = instance
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").create()
+    k.auto_save = True
+    k.auto_save_delay = timedelta(seconds=60)
+
+    for i in range(5):
+        k["spec"] = {"replicas": i}
+
+    instance.patch_namespaced_custom_object.assert_not_called()
+
+    k.flush()
+    instance.patch_namespaced_custom_object.assert_called_once()
+    assert k["spec"] == {"replicas": 4}
+
+    k.auto_save_delay = timedelta(milliseconds=10)
+    k["spec"] = {"replicas": 10}
+    timer = k._save_timer
+    timer.join(timeout=5)
+    assert instance.patch_namespaced_custom_object.call_count == 2
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_reload_skips_unchanged_objects(mocked_client):
+    stored = {
+        "metadata": {"name": "my-dummy", "namespace": "default", "resourceVersion": "1"},
+        "spec": {"attr": "value"},
+    }
+    mocked_client.return_value.get_namespaced_custom_object.side_effect = (
+        lambda *args: stored
+    )
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").load()
+    assert k.changed_since_last_reload
+    backing_obj = k.backing_obj
+
+    # Same resourceVersion, the object is kept as it was
+    stored = dict(stored)
+    k.reload()
+    assert not k.changed_since_last_reload
+    assert k.backing_obj is backing_obj
+
+    # Local changes are discarded on reload, as before
+    k["spec"]["attr"] = "other value"
+    k.reload()
+    assert k.changed_since_last_reload
+    assert k["spec"]["attr"] == "value"
+
+    stored = dict(stored, metadata=dict(stored["metadata"], resourceVersion="2"))
+    k.reload()
+    assert k.changed_since_last_reload
+    assert k["metadata"]["resourceVersion"] == "2"
+
+
+yaml_bundle = """
+---
+apiVersion: dummy.com/v1
+kind: Dummy
+metadata:
+  name: my-dummy-object0
+  namespace: my-dummy-namespace
+spec:
+  attrStr: value0
+---
+apiVersion: other.com/v1
+kind: Other
+metadata:
+  name: my-other-object
+spec:
+  attrStr: value1
+---
+"""
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+@mock.patch(
+    "kubeobject.customobject.get_crd_names", return_value=mocked_crd_return_value()
+)
+def test_iter_yaml_yields_defined_classes(mocked_get_crd_names, mocked_client):
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+    # Only the classes passed to `iter_yaml` are used
+    CustomObject.define(
+        "Other", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    objs = CustomObject.iter_yaml(
+        io.StringIO(yaml_bundle), namespace="default", classes=[Dummy]
+    )
+    dummy = next(objs)
+    assert type(dummy) is Dummy
+    assert dummy.namespace == "my-dummy-namespace"
+    assert dummy["spec"]["attrStr"] == "value0"
+    mocked_get_crd_names.assert_not_called()
+
+    # Documents without a defined class are plain CustomObjects
+    other = next(objs)
+    assert type(other) is CustomObject
+    assert other.name == "my-other-object"
+    assert other.namespace == "default"
+    mocked_get_crd_names.assert_called_once()
+
+    # The trailing empty document is skipped
+    assert list(objs) == []
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_iter_yaml_from_path(mocked_client):
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    with mock.patch(
+        "kubeobject.customobject.open",
+        mock.mock_open(read_data=yaml_data0 + yaml_data0),
+        create=True,
+    ) as m:
+        objs = list(CustomObject.iter_yaml("some-file.yaml", classes=[Dummy]))
+        m.assert_called_once_with("some-file.yaml")
+
+    assert [obj.name for obj in objs] == ["my-dummy-object0", "my-dummy-object0"]
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_iter_all_pages_lazily(mocked_client):
+    def list_namespaced_custom_object(
+        group, version, namespace, plural, limit, _continue, **kwargs
+    ):
+        start = int(_continue or 0)
+        end = min(start + limit, 5)
+        response = mocked_list_response()
+        response["items"] = response["items"][start:end]
+        if end < 5:
+            response["metadata"]["continue"] = str(end)
+
+        return response
+
+    api = mocked_client.return_value
+    api.list_namespaced_custom_object.side_effect = list_namespaced_custom_object
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    objs = Dummy.iter_all("default", label_selector="app=dummy", page_size=2)
+
+    first = next(objs)
+    assert isinstance(first, Dummy)
+    assert first.bound
+    assert first["spec"]["index"] == 0
+    api.list_namespaced_custom_object.assert_called_once_with(
+        "dummy.com",
+        "v1",
+        "default",
+        "dummies",
+        label_selector="app=dummy",
+        limit=2,
+        _continue=None,
+    )
+
+    assert [obj.name for obj in objs] == ["dummy-{}".format(i) for i in range(1, 5)]
+    assert api.list_namespaced_custom_object.call_count == 3
+    assert api.list_namespaced_custom_object.call_args[1]["_continue"] == "4"
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_iter_all_namespaces(mocked_client):
+    mocked_client.return_value.list_cluster_custom_object.return_value = (
+        mocked_list_response()
+    )
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    assert len(list(Dummy.iter_all())) == 5
+    mocked_client.return_value.list_cluster_custom_object.assert_called_once()
+
+
+@pytest.fixture
+def Dummy(server):
+    api_client = FlowControlledApiClient(configuration=server.configuration())
+    return CustomObject.define(
+        "Dummy",
+        kind="Dummy",
+        plural="dummies",
+        group="dummy.com",
+        version="v1",
+        api_client=api_client,
+    )
+
+
+def test_exists_and_load_metadata(Dummy):
+    obj = Dummy("my-dummy", "test-exists")
+    assert not obj.exists()
+
+    obj["metadata"]["labels"] = {"app": "dummy"}
+    obj["spec"] = {"payload": "x" * 100_000}
+    obj.create()
+
+    collector = InMemoryCollector()
+    add_sink(collector)
+    try:
+        assert Dummy("my-dummy", "test-exists").exists()
+        metadata = Dummy("my-dummy", "test-exists").load_metadata()
+    finally:
+        remove_sink(collector)
+
+    assert metadata["labels"] == {"app": "dummy"}
+    assert metadata["resourceVersion"] == obj["metadata"]["resourceVersion"]
+
+    # Only the metadata came over the wire
+    assert [call.operation for call in collector.calls] == ["get_metadata", "get_metadata"]
+    assert all(call.response_bytes < 1000 for call in collector.calls)
+
+
+def test_list_metadata(Dummy):
+    for i in range(3):
+        obj = Dummy("dummy-{}".format(i), "test-list-metadata")
+        obj["metadata"]["labels"] = {"index": str(i)}
+        obj.create()
+
+    metadata = Dummy.list_metadata(namespace="test-list-metadata", page_size=2)
+    assert [m["name"] for m in metadata] == ["dummy-0", "dummy-1", "dummy-2"]
+
+    metadata = Dummy.list_metadata(label_selector="index=1")
+    assert [(m["namespace"], m["name"]) for m in metadata] == [("test-list-metadata", "dummy-1")]
+
+
+def test_update_status_keeps_local_changes(Dummy):
+    obj = Dummy("my-dummy", "test-update-status")
+    obj["spec"] = {"attr": "value"}
+    obj.create()
+
+    obj["spec"]["attr"] = "local value"
+    obj["status"] = {"phase": "Running"}
+    obj.update_status()
+
+    assert obj["status"] == {"phase": "Running"}
+    assert obj["spec"] == {"attr": "local value"}
+
+    loaded = Dummy("my-dummy", "test-update-status").load()
+    assert loaded["status"] == {"phase": "Running"}
+    assert loaded["spec"] == {"attr": "value"}
+
+    # The spec is still to be saved
+    obj.update()
+    assert Dummy("my-dummy", "test-update-status").load()["spec"] == {"attr": "local value"}
+
+
+def test_status_writers_do_not_conflict_with_spec_writers(Dummy):
+    Dummy("my-dummy", "test-status-writers").create()
+
+    controller = Dummy("my-dummy", "test-status-writers").load()
+    user = Dummy("my-dummy", "test-status-writers").load()
+
+    user["spec"] = {"attr": "value"}
+    user.update(retry_on_conflict=0)
+
+    controller["status"] = {"phase": "Running"}
+    controller.update_status()
+
+    obj = Dummy("my-dummy", "test-status-writers").load()
+    assert obj["spec"] == {"attr": "value"}
+    assert obj["status"] == {"phase": "Running"}
+
+
+def test_reload_status(Dummy):
+    obj = Dummy("my-dummy", "test-reload-status").create()
+    obj["spec"] = {"attr": "local value"}
+
+    other = Dummy("my-dummy", "test-reload-status").load()
+    other["status"] = {"phase": "Running"}
+    other.update_status()
+
+    obj.reload_status()
+    assert obj.changed_since_last_reload
+    assert obj["status"] == {"phase": "Running"}
+    assert obj["spec"] == {"attr": "local value"}
+
+    obj.reload_status()
+    assert not obj.changed_since_last_reload
+
+
+def test_auto_reload_status(server, Dummy):
+    obj = Dummy("my-dummy", "test-auto-reload-status").create()
+    obj["status"] = {"phase": "Pending"}
+    obj.update_status()
+
+    obj.auto_reload = True
+    obj.auto_reload_status = True
+    obj.auto_reload_period = timedelta(0)
+
+    server.requests.clear()
+    assert obj["status"] == {"phase": "Pending"}
+    assert obj["spec"] == {}
+
+    assert [path.rsplit("/", 1)[-1] for _, path in server.requests] == ["status", "my-dummy"]
+
+
+def test_changes_made_during_update_are_kept(server, Dummy):
+    obj = Dummy("my-dummy", "test-update-in-flight")
+    obj["spec"] = {"a": 1}
+    obj.create()
+    obj["spec"]["a"] = 2
+
+    server.latency = 0.2
+    try:
+        update = threading.Thread(target=obj.update)
+        update.start()
+        time.sleep(0.05)
+        obj["spec"]["b"] = 3
+        update.join(timeout=5)
+    finally:
+        server.latency = 0
+
+    assert obj["spec"] == {"a": 2, "b": 3}
+    assert obj._local_changes() == {"spec": {"b": 3}}
+
+    obj.update()
+    assert Dummy("my-dummy", "test-update-in-flight").load()["spec"] == {"a": 2, "b": 3}
+
+
+def test_auto_save_delay_errors_are_raised_by_flush(server, Dummy):
+    obj = Dummy("my-dummy", "test-auto-save-error").create()
+    obj.auto_save = True
+    obj.auto_save_delay = timedelta(milliseconds=10)
+
+    server.fail_next(500, method="PATCH")
+    obj["spec"] = {"attr": "value"}
+    obj._save_timer.join(timeout=5)
+
+    with pytest.raises(ApiException) as e:
+        obj.flush()
+    assert e.value.status == 500
+
+    # The changes are still pending, and saved by the next flush
+    obj.flush()
+    assert Dummy("my-dummy", "test-auto-save-error").load()["spec"] == {"attr": "value"}
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+from freezegun import freeze_time
+
+from kubeobject import CustomObject, create_custom_object
+from kubeobject.customobject import get_crd_names
+from kubeobject.discovery import CRDCache, CRDRegistry, crd_cache
+from kubeobject.kubeobject import full_crd_name
+
+
+def crd(kind, plural, group, version):
+    return SimpleNamespace(
+        spec=SimpleNamespace(
+            group=group,
+            version=version,
+            names=SimpleNamespace(plural=plural, kind=kind),
+        )
+    )
+
+
+def crd_list(count=300):
+    items = [
+        crd("Kind{}".format(i), "kinds{}".format(i), "group.com", "v1")
+        for i in range(count)
+    ]
+    items.append(crd("Dummy", "dummies", "dummy.com", "v1"))
+
+    return SimpleNamespace(items=items)
+
+
+@pytest.fixture(autouse=True)
+def invalidate_cache():
+    crd_cache.invalidate()
+    yield
+    crd_cache.invalidate()
+    crd_cache.registry = None
+
+
+@mock.patch("kubeobject.discovery.client.ApiextensionsV1beta1Api")
+def test_crds_are_listed_once(mocked_api):
+    mocked_api.return_value.list_custom_resource_definition.return_value = crd_list()
+
+    for _ in range(10):
+        found = get_crd_names(kind="Dummy", group="dummy.com", version="v1")
+        assert found.spec.names.plural == "dummies"
+
+    found = get_crd_names(plural="kinds42", group="group.com", version="v1")
+    assert found.spec.names.kind == "Kind42"
+
+    mocked_api.return_value.list_custom_resource_definition.assert_called_once()
+
+
+@mock.patch("kubeobject.discovery.client.ApiextensionsV1beta1Api")
+def test_crds_are_listed_again_after_ttl(mocked_api):
+    mocked_api.return_value.list_custom_resource_definition.return_value = crd_list()
+    cache = CRDCache(ttl=timedelta(minutes=1))
+
+    cache.find(kind="Dummy", group="dummy.com", version="v1")
+    with freeze_time(datetime.now() + timedelta(minutes=2)):
+        cache.find(kind="Dummy", group="dummy.com", version="v1")
+
+    assert mocked_api.return_value.list_custom_resource_definition.call_count == 2
+
+
+@mock.patch("kubeobject.discovery.client.ApiextensionsV1beta1Api")
+def test_crds_are_listed_again_on_miss(mocked_api):
+    mocked_api.return_value.list_custom_resource_definition.return_value = crd_list(0)
+    cache = CRDCache()
+
+    cache.find(kind="Dummy", group="dummy.com", version="v1")
+    assert cache.find(kind="Missing", group="dummy.com", version="v1") is None
+
+    # The first find listed CRDs, the second one did not find the CRD in the
+    # cache and listed them again.
+    assert mocked_api.return_value.list_custom_resource_definition.call_count == 2
+
+    cache.invalidate()
+    cache.find(kind="Dummy", group="dummy.com", version="v1")
+    assert mocked_api.return_value.list_custom_resource_definition.call_count == 3
+
+
+def test_full_crd_name_is_cached():
+    api = MagicMock()
+    api.read_custom_resource_definition.return_value = SimpleNamespace(
+        spec=SimpleNamespace(
+            group="dummy.com",
+            names=SimpleNamespace(plural="dummies", kind="Dummy"),
+            versions=[
+                SimpleNamespace(name="v1alpha1", served=False),
+                SimpleNamespace(name="v1", served=True),
+            ],
+        )
+    )
+
+    for _ in range(3):
+        assert full_crd_name("dummies.dummy.com", api) == (
+            "Dummy",
+            "dummies",
+            "dummy.com",
+            "v1",
+        )
+
+    api.read_custom_resource_definition.assert_called_once_with("dummies.dummy.com")
+
+
+CRD_V1 = """
+apiVersion: apiextensions.k8s.io/v1
+kind: CustomResourceDefinition
+metadata:
+  name: dummies.dummy.com
+spec:
+  group: dummy.com
+  names:
+    kind: Dummy
+    plural: dummies
+  scope: Namespaced
+  versions:
+    - name: v1
+      served: true
+      storage: true
+      schema:
+        openAPIV3Schema:
+          type: object
+    - name: v1alpha1
+      served: false
+      storage: false
+"""
+
+CRD_V1BETA1 = """
+apiVersion: apiextensions.k8s.io/v1beta1
+kind: CustomResourceDefinition
+metadata:
+  name: others.other.com
+spec:
+  group: other.com
+  version: v2
+  names:
+    kind: Other
+    plural: others
+  scope: Cluster
+---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: not-a-crd
+"""
+
+
+@pytest.fixture
+def crd_dir(tmp_path):
+    (tmp_path / "dummies.yaml").write_text(CRD_V1)
+    (tmp_path / "others.yml").write_text(CRD_V1BETA1)
+    (tmp_path / "README.md").write_text("Not a manifest")
+
+    return tmp_path
+
+
+def test_registry_from_directory(crd_dir):
+    registry = CRDRegistry.from_directory(str(crd_dir))
+    assert len(registry) == 2
+
+    dummy = registry.find(kind="Dummy", group="dummy.com", version="v1")
+    assert dummy.spec.names.plural == "dummies"
+    assert dummy.spec.scope == "Namespaced"
+    assert [(v.name, v.served) for v in dummy.spec.versions] == [("v1", True), ("v1alpha1", False)]
+
+    other = registry.get("others.other.com")
+    assert other.spec.version == "v2"
+    assert other.spec.scope == "Cluster"
+
+    assert registry.find(kind="Missing", group="dummy.com", version="v1") is None
+
+
+def test_registry_index(crd_dir, tmp_path):
+    index = str(tmp_path / "index.json")
+    CRDRegistry.from_directory(str(crd_dir)).save_index(index)
+
+    registry = CRDRegistry.from_files([index])
+
+    assert registry.entries == CRDRegistry.from_directory(str(crd_dir)).entries
+    assert registry.find(plural="others", group="other.com", version="v2").spec.names.kind == "Other"
+
+
+@mock.patch("kubeobject.discovery.client.ApiextensionsV1Api")
+@mock.patch("kubeobject.discovery.client.ApiextensionsV1beta1Api")
+def test_registry_resolves_names_without_requests(mocked_v1beta1, mocked_v1, crd_dir, tmp_path):
+    crd_cache.registry = CRDRegistry.from_directory(str(crd_dir))
+
+    obj = CustomObject("my-dummy", "default", kind="Dummy", group="dummy.com", version="v1")
+    assert obj.plural == "dummies"
+
+    manifest = tmp_path / "other.yaml"
+    manifest.write_text("apiVersion: other.com/v2\nkind: Other\nmetadata:\n  name: my-other\n")
+    assert CustomObject.from_yaml(str(manifest), namespace="default").plural == "others"
+
+    assert create_custom_object("dummies.dummy.com").crd == {
+        "group": "dummy.com",
+        "version": "v1",
+        "plural": "dummies",
+    }
+
+    mocked_v1beta1.assert_not_called()
+    mocked_v1.assert_not_called()
+
+
+@mock.patch("kubeobject.discovery.client.ApiextensionsV1beta1Api")
+def test_registry_misses_are_read_from_the_api(mocked_api, crd_dir):
+    mocked_api.return_value.list_custom_resource_definition.return_value = crd_list(0)
+    crd_cache.registry = CRDRegistry.from_directory(str(crd_dir))
+
+    assert get_crd_names(kind="Dummy", group="dummy.com", version="v1") is not None
+    mocked_api.assert_not_called()
+
+    assert get_crd_names(kind="Dummy", group="other.com", version="v1") is None
+    mocked_api.return_value.list_custom_resource_definition.assert_called()
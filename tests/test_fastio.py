@@ -0,0 +1,129 @@
+from unittest import mock
+
+import pytest
+from kubernetes import client
+from kubernetes.client.exceptions import ApiValueError
+from kubernetes.client.rest import ApiException
+
+from kubeobject import CustomObject, KubeObject
+from kubeobject.fastio import RawCustomObjectsApi
+from kubeobject.flowcontrol import FlowControlledApiClient
+
+
+@pytest.fixture
+def fast_io():
+    return True
+
+
+def test_fast_io_objects_use_raw_api(Dummy):
+    assert isinstance(Dummy("my-dummy", "default").api, RawCustomObjectsApi)
+
+    obj = CustomObject(
+        "my-dummy", "default", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+    assert type(obj.api) is client.CustomObjectsApi
+
+
+def test_crud(Dummy, namespace):
+    obj = Dummy("my-dummy", namespace)
+    obj["spec"] = {"attr": "value", "text": "ünïcödé"}
+    obj.create()
+    assert obj["metadata"]["resourceVersion"]
+
+    obj["spec"]["attr"] = "other value"
+    obj.update()
+
+    loaded = Dummy("my-dummy", namespace).load()
+    assert loaded["spec"] == {"attr": "other value", "text": "ünïcödé"}
+
+    obj.delete()
+    with pytest.raises(ApiException) as e:
+        loaded.reload()
+    assert e.value.status == 404
+
+
+def test_errors_are_api_exceptions(Dummy, namespace):
+    Dummy("my-dummy", namespace).create()
+
+    with pytest.raises(ApiException) as e:
+        Dummy("my-dummy", namespace).create()
+
+    assert e.value.status == 409
+    assert '"reason": "AlreadyExists"' in e.value.body
+
+
+def test_update_retries_conflicts(Dummy, namespace):
+    Dummy("my-dummy", namespace).create()
+
+    obj = Dummy("my-dummy", namespace).load()
+    other = Dummy("my-dummy", namespace).load()
+    other["spec"] = {"other": "value"}
+    other.update()
+
+    obj["spec"] = {"attr": "value"}
+    obj.update(retry_on_conflict=1)
+
+    assert obj["spec"] == {"attr": "value", "other": "value"}
+
+
+def test_iter_all(server, Dummy, namespace):
+    for i in range(3):
+        obj = Dummy("dummy-{}".format(i), namespace)
+        obj["metadata"]["labels"] = {"index": str(i)}
+        obj.create()
+
+    assert [obj.name for obj in Dummy.iter_all(namespace=namespace, page_size=2)] == [
+        "dummy-0",
+        "dummy-1",
+        "dummy-2",
+    ]
+    assert [obj.name for obj in Dummy.iter_all(label_selector="index=1")] == ["dummy-1"]
+
+
+def test_wait_for_watches(Dummy, namespace):
+    obj = Dummy("my-dummy", namespace).create()
+
+    assert obj.wait_for(lambda obj: obj["metadata"]["name"] == "my-dummy", timeout=5)
+
+
+def test_invalid_arguments(server):
+    api = RawCustomObjectsApi(server.api_client())
+
+    with pytest.raises(TypeError):
+        api.list_cluster_custom_object("dummy.com", "v1", "dummies", pretty="true")
+
+    with pytest.raises(ApiValueError):
+        api.get_namespaced_custom_object("dummy.com", "v1", None, "dummies", "my-dummy")
+
+
+@mock.patch("kubeobject.flowcontrol.time.sleep")
+def test_flow_control(mocked_sleep, server, namespace):
+    api = RawCustomObjectsApi(FlowControlledApiClient(configuration=server.configuration()))
+    server.fail_next(429, path="/namespaces/" + namespace)
+
+    obj = api.create_namespaced_custom_object(
+        "dummy.com", "v1", namespace, "dummies", {"metadata": {"name": "my-dummy"}}
+    )
+
+    assert obj["metadata"]["name"] == "my-dummy"
+    assert mocked_sleep.call_count == 1
+
+
+def test_kube_object(server, namespace):
+    class FastKubeObject(KubeObject):
+        fast_io = True
+
+    with mock.patch("kubeobject.kubeobject.get_api_client", return_value=server.api_client()):
+        obj = FastKubeObject("dummy.com", "v1", "dummies")
+
+    assert isinstance(obj.api, RawCustomObjectsApi)
+
+    obj.metadata = {"name": "my-dummy", "namespace": namespace}
+    obj.spec = {"attr": "value"}
+    obj.create(namespace=namespace)
+
+    obj.spec.attr = "other value"
+    obj.update()
+
+    assert obj.reload().spec.attr == "other value"
+    obj.delete()
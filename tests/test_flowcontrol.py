@@ -0,0 +1,94 @@
+import time
+from unittest import mock
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from kubeobject.clients import ClientRegistry
+from kubeobject.flowcontrol import (
+    FlowControl,
+    FlowControlledApiClient,
+    TokenBucket,
+    retry_after,
+    throttled_backoff,
+)
+
+
+def throttled(seconds=None):
+    e = ApiException(status=429, reason="Too Many Requests")
+    e.headers = {} if seconds is None else {"Retry-After": seconds}
+    return e
+
+
+def test_token_bucket_allows_bursts_then_limits_rate():
+    bucket = TokenBucket(qps=100, burst=10)
+
+    assert all(bucket.reserve() == 0 for _ in range(10))
+
+    # Tokens are taken in advance, each caller waits a bit longer
+    waits = [bucket.reserve() for _ in range(3)]
+    assert waits == sorted(waits)
+    assert waits[0] == pytest.approx(0.01, abs=0.005)
+    assert waits[-1] == pytest.approx(0.03, abs=0.005)
+
+
+def test_token_bucket_sustained_rate():
+    bucket = TokenBucket(qps=200, burst=1)
+
+    start = time.monotonic()
+    for _ in range(21):
+        bucket.acquire()
+
+    assert time.monotonic() - start >= 0.09
+
+
+def test_retry_after():
+    assert retry_after(throttled("3")) == 3
+    assert retry_after(throttled()) is None
+    assert retry_after(throttled("Wed, 21 Oct 2015 07:28:00 GMT")) is None
+
+
+def test_throttled_backoff():
+    assert 0.1 <= throttled_backoff(1) <= 0.2
+    assert throttled_backoff(100) <= 30
+    assert throttled_backoff(1, retry_after=5) == 5
+
+
+@mock.patch("kubeobject.flowcontrol.time.sleep")
+def test_retries_throttled_requests(mocked_sleep):
+    fn = mock.Mock(side_effect=[throttled("2"), throttled(), "response"])
+
+    assert FlowControl(qps=None).call(fn, "arg", key="value") == "response"
+    assert fn.call_count == 3
+    fn.assert_called_with("arg", key="value")
+
+    # Retry-After is honoured
+    assert mocked_sleep.call_args_list[0][0][0] >= 2
+
+
+@mock.patch("kubeobject.flowcontrol.time.sleep")
+def test_gives_up_and_does_not_retry_other_errors(_):
+    flow_control = FlowControl(qps=None, max_retries=2)
+
+    fn = mock.Mock(side_effect=throttled())
+    with pytest.raises(ApiException):
+        flow_control.call(fn)
+    assert fn.call_count == 3
+
+    fn = mock.Mock(side_effect=ApiException(status=500))
+    with pytest.raises(ApiException):
+        flow_control.call(fn)
+    assert fn.call_count == 1
+
+
+@mock.patch("kubeobject.flowcontrol.time.sleep")
+def test_shared_clients_use_flow_control(_):
+    api_client = ClientRegistry().get()
+    assert isinstance(api_client, FlowControlledApiClient)
+
+    with mock.patch.object(
+        api_client.rest_client, "request", side_effect=[throttled(), mock.sentinel.response]
+    ) as request:
+        assert api_client.request("GET", "https://localhost/apis") is mock.sentinel.response
+
+    assert request.call_count == 2
@@ -0,0 +1,249 @@
+import threading
+import time
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from kubeobject import CustomObject, KubeObject
+from kubeobject.exceptions import InformerNotSyncedException
+from kubeobject.informer import Informer, get_informer, stop_informers
+
+
+def dummy(name, resource_version, value):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": "default",
+            "resourceVersion": resource_version,
+        },
+        "spec": {"value": value},
+    }
+
+
+class FakeWatch:
+    """Replays a list of events once and then waits until stopped."""
+
+    events = []
+
+    def __init__(self):
+        self.stopped = False
+
+    def stream(self, fn, *args, **kwargs):
+        events, FakeWatch.events = FakeWatch.events, []
+        for event in events:
+            yield event
+
+        while not self.stopped:
+            time.sleep(0.01)
+
+    def stop(self):
+        self.stopped = True
+
+
+def mocked_custom_api():
+    api = MagicMock()
+    api.list_namespaced_custom_object.return_value = {
+        "metadata": {"resourceVersion": "1"},
+        "items": [dummy("obj0", "1", "a"), dummy("obj1", "1", "b")],
+    }
+
+    return api
+
+
+@pytest.fixture(autouse=True)
+def cleanup_informers():
+    yield
+    stop_informers()
+
+
+@mock.patch("kubeobject.informer.watch.Watch", FakeWatch)
+@mock.patch("kubeobject.informer.client.CustomObjectsApi")
+def test_informer_lists_and_follows_watch(mocked_client):
+    mocked_client.return_value = mocked_custom_api()
+    FakeWatch.events = [
+        {"type": "MODIFIED", "raw_object": dummy("obj0", "2", "c")},
+        {"type": "DELETED", "raw_object": dummy("obj1", "3", "b")},
+    ]
+
+    informer = Informer("dummy.com", "v1", "dummies", "default").start()
+    assert informer.wait_for_sync(timeout=5)
+
+    for _ in range(100):
+        if informer.resource_version == "3":
+            break
+        time.sleep(0.01)
+
+    assert informer.get("obj0")["spec"]["value"] == "c"
+    assert informer.get("obj1") is None
+    assert informer.resource_version == "3"
+
+    informer.stop()
+    mocked_client.return_value.list_namespaced_custom_object.assert_called_once_with(
+        "dummy.com", "v1", "default", "dummies"
+    )
+
+
+@mock.patch("kubeobject.informer.watch.Watch", FakeWatch)
+@mock.patch("kubeobject.informer.client.CustomObjectsApi")
+def test_get_informer_is_shared(mocked_client):
+    mocked_client.return_value = mocked_custom_api()
+
+    informer0 = get_informer("dummy.com", "v1", "dummies", "default")
+    informer1 = get_informer("dummy.com", "v1", "dummies", "default")
+    informer2 = get_informer("dummy.com", "v1", "dummies", "other")
+
+    assert informer0 is informer1
+    assert informer0 is not informer2
+
+
+@mock.patch("kubeobject.informer.watch.Watch", FakeWatch)
+@mock.patch("kubeobject.informer.client.CustomObjectsApi")
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_object_reads_from_informer(mocked_client, mocked_informer_client):
+    mocked_informer_client.return_value = mocked_custom_api()
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    assert get_informer("dummy.com", "v1", "dummies", "default").wait_for_sync(timeout=5)
+
+    objs = [Dummy("obj0", "default"), Dummy("obj1", "default")]
+    for obj in objs:
+        obj.auto_reload = True
+        obj.use_informer = True
+
+    assert objs[0]["spec"]["value"] == "a"
+    assert objs[1]["spec"]["value"] == "b"
+    assert objs[0].bound
+
+    # Reads are served from the Informer, which did a single LIST
+    mocked_client.return_value.get_namespaced_custom_object.assert_not_called()
+    mocked_informer_client.return_value.list_namespaced_custom_object.assert_called_once()
+
+    # Local changes do not leak into the shared store
+    objs[0]["spec"]["value"] = "changed"
+    assert get_informer("dummy.com", "v1", "dummies", "default").get("obj0")["spec"][
+        "value"
+    ] == "a"
+
+
+@mock.patch("kubeobject.informer.watch.Watch", FakeWatch)
+@mock.patch("kubeobject.informer.client.CustomObjectsApi")
+@mock.patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_kubeobject_reads_from_informer(mocked_client, mocked_informer_client):
+    mocked_informer_client.return_value = mocked_custom_api()
+    mocked_client.return_value.get_namespaced_custom_object.return_value = dummy(
+        "obj0", "1", "a"
+    )
+
+    assert get_informer("dummy.com", "v1", "dummies", "default").wait_for_sync(timeout=5)
+
+    k = KubeObject("dummy.com", "v1", "dummies").read("obj0", "default")
+    k.auto_reload = True
+    k.use_informer = True
+
+    assert k.spec.value == "a"
+    mocked_client.return_value.get_namespaced_custom_object.assert_called_once()
+
+
+@mock.patch("kubeobject.informer.client.CustomObjectsApi")
+def test_informer_get_raises_list_errors(mocked_client):
+    mocked_client.return_value.list_namespaced_custom_object.side_effect = ApiException(
+        status=403
+    )
+
+    informer = Informer("dummy.com", "v1", "dummies", "default")
+    informer.retry_period = 0.01
+    informer.start()
+
+    with pytest.raises(ApiException) as e:
+        informer.get("obj0", timeout=0.5)
+    assert e.value.status == 403
+
+    informer.stop()
+
+
+@mock.patch("kubeobject.informer.client.CustomObjectsApi")
+def test_informer_get_times_out(mocked_client):
+    listed = threading.Event()
+    mocked_client.return_value.list_namespaced_custom_object.side_effect = (
+        lambda *args: listed.wait(5)
+    )
+
+    informer = Informer("dummy.com", "v1", "dummies", "default").start()
+    try:
+        with pytest.raises(InformerNotSyncedException):
+            informer.get("obj0", timeout=0.05)
+    finally:
+        informer.stop()
+        listed.set()
+
+
+# Both modules use `kubernetes.client`, the Informer gets the same mock.
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_object_reads_directly_until_informer_syncs(mocked_client):
+    listed = threading.Event()
+    mocked_client.return_value.list_namespaced_custom_object.side_effect = (
+        lambda *args: listed.wait(5)
+    )
+    mocked_client.return_value.get_namespaced_custom_object.return_value = dummy(
+        "obj0", "1", "a"
+    )
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    obj = Dummy("obj0", "default")
+    obj.auto_reload = True
+    obj.use_informer = True
+
+    try:
+        start = time.monotonic()
+        assert obj["spec"]["value"] == "a"
+        # Reads don't wait for the first LIST
+        assert time.monotonic() - start < 1
+    finally:
+        listed.set()
+
+    mocked_client.return_value.get_namespaced_custom_object.assert_called_once()
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_object_reads_directly_if_informer_fails(mocked_client):
+    mocked_client.return_value.list_namespaced_custom_object.side_effect = ApiException(
+        status=403
+    )
+    mocked_client.return_value.get_namespaced_custom_object.return_value = dummy(
+        "obj0", "1", "a"
+    )
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+    informer = get_informer("dummy.com", "v1", "dummies", "default")
+    informer.retry_period = 0.01
+    while informer.last_error is None:
+        time.sleep(0.01)
+
+    obj = Dummy("obj0", "default")
+    obj.auto_reload = True
+    obj.use_informer = True
+
+    assert obj["spec"]["value"] == "a"
+    mocked_client.return_value.get_namespaced_custom_object.assert_called_once()
+
+
+def test_missing_objects_are_not_served_from_informer(api_client, Dummy, namespace):
+    Dummy("existing", namespace).create()
+    assert get_informer(
+        "dummy.com", "v1", "dummies", namespace, api_client=api_client
+    ).wait_for_sync(timeout=5)
+
+    obj = Dummy("nope", namespace)
+    obj.auto_reload = True
+    obj.use_informer = True
+
+    with pytest.raises(ApiException) as e:
+        obj["spec"]
+    assert e.value.status == 404
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from freezegun import freeze_time
+from kubernetes.client.rest import ApiException, RESTResponse
+from kubernetes_asyncio import client as async_client
+
+from kubeobject import CustomObject, KubeObject
+from kubeobject.aio import AsyncCustomObject
+from kubeobject.clients import ClientRegistry
+from kubeobject.informer import Informer
+from kubeobject.instrumentation import (
+    ApiCall,
+    InMemoryCollector,
+    PrometheusExporter,
+    add_sink,
+    api_call,
+    remove_sink,
+)
+from kubeobject.testing import FakeApiServer
+
+
+@pytest.fixture
+def collector():
+    collector = InMemoryCollector()
+    add_sink(collector)
+    yield collector
+    remove_sink(collector)
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_object_calls_are_recorded(mocked_client, collector):
+    stored = {"metadata": {"name": "my-dummy", "namespace": "default"}, "status": {}}
+    api = mocked_client.return_value
+    api.create_namespaced_custom_object.return_value = stored
+    api.get_namespaced_custom_object.return_value = stored
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    k = Dummy("my-dummy", "default").create()
+    k.auto_reload = True
+    with freeze_time(datetime.now() + timedelta(seconds=5)):
+        k["status"]
+
+    assert [(c.operation, c.kind, c.auto_reload) for c in collector.calls] == [
+        ("create", "Dummy", False),
+        ("get", "Dummy", True),
+    ]
+    assert collector.summary()[("get", "Dummy", True)]["count"] == 1
+
+
+@mock.patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_kubeobject_errors_are_recorded(patched_custom_objects_api, collector):
+    api = patched_custom_objects_api.return_value
+    api.get_namespaced_custom_object.side_effect = ApiException(status=404)
+
+    with pytest.raises(ApiException):
+        KubeObject("dummy.com", "v1", "dummies").read("my-dummy", "default")
+
+    (call,) = collector.calls
+    assert call.operation == "get"
+    assert call.kind == "dummies"
+    assert call.error.status == 404
+
+
+def test_response_bytes_are_recorded(collector):
+    api_client = ClientRegistry().get()
+    urllib3_response = SimpleNamespace(status=200, reason="OK", data=b'{"kind": "Dummy"}')
+
+    with mock.patch.object(
+        api_client.rest_client, "request", return_value=RESTResponse(urllib3_response)
+    ):
+        with api_call("get", "Dummy"):
+            api_client.request("GET", "https://localhost/apis")
+
+    assert collector.calls[0].response_bytes == 17
+
+
+def test_watches_are_recorded(collector):
+    with FakeApiServer() as server:
+        server.add_crd("dummy.com", "v1", "dummies", "Dummy")
+        api_client = server.api_client()
+        Dummy = CustomObject.define(
+            "Dummy",
+            kind="Dummy",
+            plural="dummies",
+            group="dummy.com",
+            version="v1",
+            api_client=api_client,
+        )
+        obj = Dummy("my-dummy", "default").create()
+
+        informer = Informer("dummy.com", "v1", "dummies", "default", api_client=api_client)
+        informer.start().wait_for_sync(timeout=5)
+        informer.stop()
+
+        def change():
+            time.sleep(0.1)
+            other = Dummy("my-dummy", "default").load()
+            other["spec"] = {"attr": "value"}
+            other.update()
+
+        threading.Thread(target=change).start()
+        assert obj.wait_for(lambda o: o["spec"] == {"attr": "value"}, timeout=5)
+
+        # The change ends the informer's watch too
+        informer._thread.join(timeout=5)
+
+    # The informer's LIST and WATCH, and the WATCH of `wait_for()`
+    recorded = [(c.operation, c.kind) for c in collector.calls]
+    assert ("list", "dummies") in recorded
+    assert recorded.count(("watch", "dummies")) == 2
+
+
+def test_async_calls_are_recorded(server, collector):
+    async def lifecycle():
+        configuration = async_client.Configuration(host=server.url)
+        async with async_client.ApiClient(configuration) as api_client:
+            obj = AsyncCustomObject(
+                "my-dummy",
+                "test-async-calls-are-recorded",
+                kind="Dummy",
+                plural="dummies",
+                group="dummy.com",
+                version="v1",
+                api_client=api_client,
+            )
+            await obj.create()
+            obj["spec"] = {"attr": "value"}
+            await obj.update()
+            await obj.load_metadata()
+            await obj.delete()
+
+            with pytest.raises(async_client.ApiException):
+                await obj.load()
+
+    asyncio.run(lifecycle())
+
+    assert [(c.operation, c.kind, c.error is None) for c in collector.calls] == [
+        ("create", "Dummy", True),
+        ("patch", "Dummy", True),
+        ("get_metadata", "Dummy", True),
+        ("delete", "Dummy", True),
+        ("get", "Dummy", False),
+    ]
+
+
+def test_prometheus_exporter():
+    exporter = PrometheusExporter(buckets=(0.1, 1.0))
+    exporter(ApiCall("get", "Dummy", 0.05, 100, True))
+    exporter(ApiCall("get", "Dummy", 0.5, 200, True))
+    exporter(ApiCall("patch", "Dummy", 0.05, None, False, error=ApiException(status=409)))
+
+    text = exporter.render()
+    labels = 'operation="get",kind="Dummy",auto_reload="true",result="success"'
+    assert "kubeobject_api_calls_total{{{}}} 2".format(labels) in text
+    assert "kubeobject_api_response_bytes_total{{{}}} 300".format(labels) in text
+    assert 'kubeobject_api_call_duration_seconds_bucket{{{},le="0.1"}} 1'.format(labels) in text
+    assert 'kubeobject_api_call_duration_seconds_bucket{{{},le="+Inf"}} 2'.format(labels) in text
+    assert 'operation="patch",kind="Dummy",auto_reload="false",result="error"' in text
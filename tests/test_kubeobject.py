@@ -1,5 +1,6 @@
-import copy
 import io
+import json
+from datetime import timedelta
 from unittest.mock import Mock, call, patch
 
 import pytest
@@ -8,6 +9,7 @@ from box import Box
 from kubernetes import client, config
 
 from kubeobject import KubeObject, create_custom_object
+from kubeobject.patch import apply_merge_patch
 
 # config.load_kube_config()
 
@@ -182,9 +184,11 @@ class MockedCustomObjectsApi:
     ):
         # body needs to be passed always
         assert body is not None
-        MockedCustomObjectsApi.store = body
+        MockedCustomObjectsApi.store = apply_merge_patch(
+            MockedCustomObjectsApi.store, body
+        )
 
-        return body
+        return MockedCustomObjectsApi.store
 
     @staticmethod
     def delete_namespaced_custom_object(group, version, namespace, plural, name, body):
@@ -207,9 +211,7 @@ def test_can_read_and_update(patched_custom_objects_api: Mock):
     c.spec.thisAttribute = "fourty three"
     c.update()
 
-    # We expect this body to be one sent to the API.
-    updated_body = copy.deepcopy(MockedCustomObjectsApi.store)
-    updated_body["spec"]["thisAttribute"] = "fourty three"
+    # We expect only the changed attribute to be sent to the API.
     api.patch_namespaced_custom_object.assert_called_once_with(
         **dict(
             name="my-dummy-object",
@@ -217,9 +219,10 @@ def test_can_read_and_update(patched_custom_objects_api: Mock):
             plural="dummies",
             group="example.com",
             version="v1",
-            body=updated_body,
+            body={"spec": {"thisAttribute": "fourty three"}},
         )
     )
+    assert c.metadata.name == "my-dummy-object"
 
     read_calls = [
         call(
@@ -299,6 +302,21 @@ spec:
     assert c.to_dict() == as_dict
 
 
+@patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_read_from_dict_does_not_alias_the_dict(_):
+    definition = {
+        "metadata": {"name": "my-dummy-object"},
+        "spec": {"thisAttribute": "fourty two"},
+    }
+
+    c = KubeObject("example.com", "v1", "dummies").read_from_dict(definition)
+    c.spec.thisAttribute = "eighty one"
+    definition["spec"] = {"other": "value"}
+
+    assert c.spec.to_dict() == {"thisAttribute": "eighty one"}
+    assert definition == {"metadata": {"name": "my-dummy-object"}, "spec": {"other": "value"}}
+
+
 @pytest.mark.skip
 def test_set_and_get_attrs():
     """Studying __setattr__ and __getattr__
@@ -331,3 +349,98 @@ def test_set_and_get_attrs():
 
     with pytest.raises(KeyError):
         assert a.d
+
+
+@patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_apply(patched_custom_objects_api: Mock):
+    api = patched_custom_objects_api.return_value
+    api.api_client.call_api.side_effect = lambda *args, body, **kwargs: json.loads(body)
+
+    C = KubeObject("example.com", "v1", "dummies")
+    c = C.read_from_dict(
+        {
+            "kind": "Dummy",
+            "metadata": {"name": "my-dummy-object", "namespace": "default"},
+            "spec": {"thisAttribute": "fourty two"},
+        }
+    )
+    c.apply(field_manager="my-manager")
+
+    assert c.bound
+    assert c.name == "my-dummy-object"
+    assert c.apiVersion == "example.com/v1"
+
+    _, kwargs = api.api_client.call_api.call_args
+    assert kwargs["header_params"]["Content-Type"] == "application/apply-patch+yaml"
+    assert kwargs["query_params"] == [("fieldManager", "my-manager")]
+    assert kwargs["path_params"] == {
+        "group": "example.com",
+        "version": "v1",
+        "namespace": "default",
+        "plural": "dummies",
+        "name": "my-dummy-object",
+    }
+
+
+@patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_read_skips_unchanged_objects(patched_custom_objects_api: Mock):
+    stored = {
+        "metadata": {"name": "my-dummy", "namespace": "default", "resourceVersion": "1"},
+        "spec": {"thisAttribute": "fourty two"},
+    }
+    api = patched_custom_objects_api.return_value
+    api.get_namespaced_custom_object.side_effect = lambda **kwargs: dict(stored)
+
+    C = KubeObject("example.com", "v1", "dummies")
+    c = C.read("my-dummy", "default")
+    assert c.changed_since_last_reload
+    spec = c.spec
+
+    c.reload()
+    assert not c.changed_since_last_reload
+    assert c.spec is spec
+
+    stored["metadata"] = dict(stored["metadata"], resourceVersion="2")
+    c.reload()
+    assert c.changed_since_last_reload
+    assert c.metadata.resourceVersion == "2"
+
+
+@patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_status_subresource(patched_custom_objects_api: Mock):
+    stored = {
+        "metadata": {"name": "my-dummy", "namespace": "default", "resourceVersion": "1"},
+        "spec": {"thisAttribute": "fourty two"},
+        "status": {"phase": "Pending"},
+    }
+
+    def patch_status(body, **kwargs):
+        stored.update(apply_merge_patch(stored, body))
+        return dict(stored)
+
+    api = patched_custom_objects_api.return_value
+    api.get_namespaced_custom_object.side_effect = lambda **kwargs: dict(stored)
+    api.get_namespaced_custom_object_status.side_effect = lambda **kwargs: dict(stored)
+    api.patch_namespaced_custom_object_status.side_effect = patch_status
+
+    c = KubeObject("example.com", "v1", "dummies").read("my-dummy", "default")
+    c.spec.thisAttribute = "local"
+
+    c.status.phase = "Running"
+    c.update_status()
+    assert api.patch_namespaced_custom_object_status.call_args[1]["body"] == {
+        "status": {"phase": "Running"}
+    }
+    assert c.spec.thisAttribute == "local"
+
+    stored["status"] = {"phase": "Failed"}
+    c.auto_reload = True
+    c.auto_reload_status = True
+    c.auto_reload_period = timedelta(0)
+
+    assert c.status.phase == "Failed"
+    api.get_namespaced_custom_object.assert_called_once()
+
+    # Other attributes are reloaded as a whole
+    assert c.spec.thisAttribute == "fourty two"
+    assert api.get_namespaced_custom_object.call_count == 2
@@ -0,0 +1,39 @@
+import copy
+
+from kubeobject.patch import apply_merge_patch, merge_patch
+
+original = {
+    "metadata": {"name": "my-dummy", "labels": {"app": "dummy", "tier": "db"}},
+    "spec": {"members": 3, "version": "4.4", "args": ["--a", "--b"]},
+    "status": {"phase": "Running", "members": [{"name": "m0"}, {"name": "m1"}]},
+}
+
+
+def test_merge_patch_is_empty_without_changes():
+    assert merge_patch(original, copy.deepcopy(original)) == {}
+
+
+def test_merge_patch_includes_only_changes():
+    modified = copy.deepcopy(original)
+    modified["spec"]["version"] = "5.0"
+    modified["spec"]["args"].append("--c")
+    modified["metadata"]["labels"]["env"] = "prod"
+    del modified["metadata"]["labels"]["tier"]
+
+    assert merge_patch(original, modified) == {
+        "metadata": {"labels": {"env": "prod", "tier": None}},
+        "spec": {"version": "5.0", "args": ["--a", "--b", "--c"]},
+    }
+
+
+def test_apply_merge_patch_roundtrip():
+    modified = copy.deepcopy(original)
+    modified["spec"] = {"members": 5}
+    modified["annotations"] = {"some": "annotation"}
+    del modified["status"]
+
+    before = copy.deepcopy(original)
+    assert apply_merge_patch(original, merge_patch(original, modified)) == modified
+
+    # The original object is not modified
+    assert original == before
@@ -0,0 +1,78 @@
+import io
+import json
+from unittest import mock
+
+import yaml
+
+from kubeobject import CustomObject, KubeObject, serialization
+from kubeobject.cow import CowDict
+
+manifest = {
+    "apiVersion": "dummy.com/v1",
+    "kind": "Dummy",
+    "metadata": {"name": "my-dummy", "namespace": "default"},
+    "spec": {"members": 3, "args": ["--a", "--b"]},
+}
+
+
+def test_uses_libyaml_when_available():
+    if hasattr(yaml, "CSafeLoader"):
+        assert serialization.SafeLoader is yaml.CSafeLoader
+        assert issubclass(serialization.SafeDumper, yaml.CSafeDumper)
+    else:
+        assert serialization.SafeLoader is yaml.SafeLoader
+
+
+def test_load_json_and_yaml():
+    assert serialization.load(io.StringIO(json.dumps(manifest)), as_json=True) == manifest
+    assert serialization.load(io.StringIO(yaml.safe_dump(manifest))) == manifest
+
+
+def test_load_all_json_list():
+    stream = io.StringIO(json.dumps({"kind": "DummyList", "items": [manifest, manifest]}))
+    assert list(serialization.load_all(stream, as_json=True)) == [manifest, manifest]
+
+
+def test_json_payloads_with_and_without_orjson():
+    obj = {"metadata": CowDict(manifest["metadata"]), "spec": {"text": "ünïcödé"}}
+
+    data = serialization.json_dumps(obj)
+    assert isinstance(data, bytes)
+    assert serialization.json_loads(data) == json.loads(json.dumps(obj))
+
+    with mock.patch.object(serialization, "orjson", None):
+        assert serialization.json_dumps(obj) == data
+        assert serialization.json_loads(data) == json.loads(data)
+
+
+def test_dump_keeps_order_and_cow_containers():
+    text = serialization.dump(CowDict(manifest))
+
+    assert text.startswith("apiVersion: dummy.com/v1\nkind: Dummy\n")
+    assert yaml.safe_load(text) == manifest
+
+
+@mock.patch("kubeobject.customobject.client.CustomObjectsApi")
+def test_custom_object_to_yaml_roundtrip(_):
+    Dummy = CustomObject.define(
+        "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+    )
+
+    with mock.patch(
+        "kubeobject.customobject.open",
+        mock.mock_open(read_data=json.dumps(manifest)),
+        create=True,
+    ):
+        obj = next(CustomObject.iter_yaml("dummies.json", classes=[Dummy]))
+
+    assert obj.name == "my-dummy"
+    assert yaml.safe_load(obj.to_yaml()) == manifest
+
+
+@mock.patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_kubeobject_to_yaml(_):
+    obj = KubeObject("dummy.com", "v1", "dummies").read_from_dict(manifest)
+
+    stream = io.StringIO()
+    obj.to_yaml(stream)
+    assert yaml.safe_load(stream.getvalue()) == manifest
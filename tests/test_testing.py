@@ -0,0 +1,273 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from kubernetes import client, watch
+from kubernetes.client.rest import ApiException
+
+from kubeobject import CustomObject
+from kubeobject.discovery import crd_cache
+from kubeobject.flowcontrol import FlowControlledApiClient
+from kubeobject.testing import FakeApiServer
+
+
+def test_crds(server, api_client):
+    crds = client.ApiextensionsV1beta1Api(api_client).list_custom_resource_definition()
+    assert [crd.spec.names.plural for crd in crds.items] == ["dummies"]
+    assert crds.items[0].spec.version == "v1"
+
+    crd = client.ApiextensionsV1Api(api_client).read_custom_resource_definition(
+        "dummies.dummy.com"
+    )
+    assert crd.spec.names.kind == "Dummy"
+    assert crd.spec.scope == "Namespaced"
+
+
+def test_crd_discovery(server, api_client, namespace):
+    crd_cache.invalidate()
+    try:
+        obj = CustomObject(
+            "my-dummy", namespace, kind="Dummy", group="dummy.com", version="v1", api_client=api_client
+        )
+    finally:
+        crd_cache.invalidate()
+
+    assert obj.plural == "dummies"
+
+
+def test_crud(Dummy, namespace):
+    obj = Dummy("my-dummy", namespace)
+    obj["spec"] = {"attr": "value"}
+    obj.create()
+
+    assert obj["metadata"]["resourceVersion"]
+    assert obj["metadata"]["uid"]
+    assert obj["metadata"]["generation"] == 1
+
+    obj["spec"]["attr"] = "other value"
+    obj.update()
+    assert obj["metadata"]["generation"] == 2
+
+    assert Dummy("my-dummy", namespace).load()["spec"] == {"attr": "other value"}
+
+    with pytest.raises(ApiException) as e:
+        Dummy("my-dummy", namespace).create()
+    assert e.value.status == 409
+
+    obj.delete()
+    with pytest.raises(ApiException) as e:
+        Dummy("my-dummy", namespace).load()
+    assert e.value.status == 404
+
+
+def test_apply(Dummy, namespace):
+    obj = Dummy("my-dummy", namespace)
+    obj["spec"] = {"attr": "value"}
+    obj.apply()
+
+    obj["spec"]["other"] = "value"
+    obj.apply()
+
+    assert Dummy("my-dummy", namespace).load()["spec"] == {"attr": "value", "other": "value"}
+
+
+def test_merge_patch_metadata(api_client, Dummy, namespace):
+    obj = Dummy("my-dummy", namespace)
+    obj["metadata"]["labels"] = {"a": "1", "c": "3"}
+    obj["metadata"]["annotations"] = {"note": "kept"}
+    obj.create()
+
+    api = client.CustomObjectsApi(api_client)
+    api.patch_namespaced_custom_object(
+        "dummy.com",
+        "v1",
+        namespace,
+        "dummies",
+        "my-dummy",
+        {"metadata": {"labels": {"b": "2", "c": None}}},
+    )
+
+    metadata = Dummy("my-dummy", namespace).load()["metadata"]
+    assert metadata["labels"] == {"a": "1", "b": "2"}
+    assert metadata["annotations"] == {"note": "kept"}
+
+
+def test_conflicts(Dummy, namespace):
+    Dummy("my-dummy", namespace).create()
+
+    obj = Dummy("my-dummy", namespace).load()
+    other = Dummy("my-dummy", namespace).load()
+    other["spec"] = {"other": "value"}
+    other.update()
+
+    obj["spec"] = {"attr": "value"}
+    obj.update(retry_on_conflict=1)
+
+    assert obj["spec"] == {"attr": "value", "other": "value"}
+
+
+def test_iter_all_pages(server, Dummy, namespace):
+    for i in range(5):
+        obj = Dummy("dummy-{}".format(i), namespace)
+        obj["metadata"]["labels"] = {"even": str(i % 2 == 0).lower()}
+        obj.create()
+
+    server.requests.clear()
+    names = [obj.name for obj in Dummy.iter_all(namespace=namespace, page_size=2)]
+
+    assert names == ["dummy-{}".format(i) for i in range(5)]
+    assert len(server.requests) == 3
+
+    names = [
+        obj.name for obj in Dummy.iter_all(namespace=namespace, label_selector="even=true")
+    ]
+    assert names == ["dummy-0", "dummy-2", "dummy-4"]
+
+
+def test_status_subresource(api_client, Dummy, namespace):
+    obj = Dummy("my-dummy", namespace)
+    obj["status"] = {"phase": "Ignored"}
+    obj.create()
+    assert "status" not in obj.backing_obj
+
+    api = client.CustomObjectsApi(api_client)
+    api.patch_namespaced_custom_object_status(
+        "dummy.com", "v1", namespace, "dummies", "my-dummy", {"status": {"phase": "Running"}}
+    )
+
+    obj.reload()
+    assert obj["status"] == {"phase": "Running"}
+    assert obj["metadata"]["generation"] == 1
+
+
+def test_watch(api_client, Dummy, namespace):
+    Dummy("existing", namespace).create()
+
+    def change():
+        time.sleep(0.1)
+        obj = Dummy("existing", namespace).load()
+        obj["spec"] = {"attr": "value"}
+        obj.update()
+        Dummy("new", namespace).create()
+
+    threading.Thread(target=change).start()
+
+    api = client.CustomObjectsApi(api_client)
+    events = []
+    for event in watch.Watch().stream(
+        api.list_namespaced_custom_object,
+        "dummy.com",
+        "v1",
+        namespace,
+        "dummies",
+        timeout_seconds=5,
+    ):
+        events.append((event["type"], event["object"]["metadata"]["name"]))
+        if len(events) == 3:
+            break
+
+    assert events == [("ADDED", "existing"), ("MODIFIED", "existing"), ("ADDED", "new")]
+
+
+def test_delete_event_resource_version(server, api_client, Dummy, namespace):
+    obj = Dummy("my-dummy", namespace)
+    obj.create()
+    created = obj["metadata"]["resourceVersion"]
+    obj.delete()
+
+    api = client.CustomObjectsApi(api_client)
+    events = []
+    for event in watch.Watch().stream(
+        api.list_namespaced_custom_object,
+        "dummy.com",
+        "v1",
+        namespace,
+        "dummies",
+        resource_version=created,
+        timeout_seconds=1,
+    ):
+        events.append(event)
+        break
+
+    assert events[0]["type"] == "DELETED"
+    assert int(events[0]["object"]["metadata"]["resourceVersion"]) > int(created)
+
+
+def test_watch_too_old_resource_version(api_client, namespace):
+    server = FakeApiServer(event_history=2).start()
+    try:
+        server.add_crd("dummy.com", "v1", "dummies", "Dummy")
+        api = client.CustomObjectsApi(server.api_client())
+        for i in range(5):
+            api.create_namespaced_custom_object(
+                "dummy.com", "v1", namespace, "dummies", {"metadata": {"name": str(i)}}
+            )
+
+        with pytest.raises(ApiException) as e:
+            for _ in watch.Watch().stream(
+                api.list_namespaced_custom_object,
+                "dummy.com",
+                "v1",
+                namespace,
+                "dummies",
+                resource_version="1",
+                timeout_seconds=1,
+            ):
+                pass
+    finally:
+        server.stop()
+
+    assert e.value.status == 410
+
+
+def test_latency(server, Dummy, namespace):
+    server.latency = 0.05
+    try:
+        start = time.monotonic()
+        Dummy("my-dummy", namespace).create()
+        assert time.monotonic() - start >= 0.05
+    finally:
+        server.latency = 0
+
+
+def test_error_injection(server, Dummy, namespace):
+    server.fail_next(500, method="POST")
+
+    with pytest.raises(ApiException) as e:
+        Dummy("my-dummy", namespace).create()
+    assert e.value.status == 500
+
+    Dummy("my-dummy", namespace).create()
+
+
+@mock.patch("kubeobject.flowcontrol.time.sleep")
+def test_throttled_requests_are_retried(mocked_sleep, server, namespace):
+    api_client = FlowControlledApiClient(configuration=server.configuration())
+    server.fail_next(429, times=2, path="/namespaces/" + namespace, retry_after=3)
+
+    api = client.CustomObjectsApi(api_client)
+    api.create_namespaced_custom_object(
+        "dummy.com", "v1", namespace, "dummies", {"metadata": {"name": "my-dummy"}}
+    )
+
+    assert mocked_sleep.call_count == 2
+    assert all(call[0][0] >= 3 for call in mocked_sleep.call_args_list)
+
+
+def test_partial_object_metadata(api_client, Dummy, namespace):
+    obj = Dummy("my-dummy", namespace)
+    obj["spec"] = {"attr": "value"}
+    obj.create()
+
+    partial = api_client.call_api(
+        "/apis/dummy.com/v1/namespaces/{}/dummies/my-dummy".format(namespace),
+        "GET",
+        header_params={"Accept": "application/json;as=PartialObjectMetadata;g=meta.k8s.io;v=v1"},
+        response_type="object",
+        _return_http_data_only=True,
+    )
+
+    assert partial["kind"] == "PartialObjectMetadata"
+    assert partial["metadata"]["name"] == "my-dummy"
+    assert "spec" not in partial
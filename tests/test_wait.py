@@ -0,0 +1,120 @@
+from datetime import timedelta
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+
+from kubeobject import CustomObject, KubeObject
+from kubeobject.exceptions import WaitTimeoutException
+
+
+def dummy(resource_version, phase=None):
+    obj = {
+        "metadata": {
+            "name": "my-dummy",
+            "namespace": "default",
+            "resourceVersion": resource_version,
+        },
+        "spec": {},
+    }
+    if phase is not None:
+        obj["status"] = {"phase": phase}
+
+    return obj
+
+
+class FakeWatch:
+    """Streams `events` and returns, as if the watch had timed out."""
+
+    events = []
+    calls = []
+
+    def stream(self, fn, *args, **kwargs):
+        FakeWatch.calls.append(kwargs)
+        yield from FakeWatch.events
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def Dummy():
+    with mock.patch("kubeobject.customobject.client.CustomObjectsApi") as mocked_client:
+        mocked_client.return_value.get_namespaced_custom_object.return_value = dummy(
+            "1"
+        )
+        yield CustomObject.define(
+            "Dummy", kind="Dummy", plural="dummies", group="dummy.com", version="v1"
+        )
+
+
+@mock.patch("kubeobject.wait.watch.Watch", FakeWatch)
+def test_wait_for_returns_on_watch_event(Dummy):
+    FakeWatch.calls = []
+    FakeWatch.events = [
+        {"type": "MODIFIED", "raw_object": dummy("2", "Pending")},
+        {"type": "MODIFIED", "raw_object": dummy("3", "Running")},
+        {"type": "MODIFIED", "raw_object": dummy("4", "Failed")},
+    ]
+
+    obj = Dummy("my-dummy", "default")
+    assert obj.wait_for(
+        lambda o: o.backing_obj.get("status", {}).get("phase") == "Running", timeout=5
+    )
+
+    assert obj["metadata"]["resourceVersion"] == "3"
+    obj.api.get_namespaced_custom_object.assert_called_once()
+
+    assert len(FakeWatch.calls) == 1
+    assert FakeWatch.calls[0]["field_selector"] == "metadata.name=my-dummy"
+    assert FakeWatch.calls[0]["resource_version"] == "1"
+    assert FakeWatch.calls[0]["timeout_seconds"] == 5
+
+
+@mock.patch("kubeobject.wait.watch.Watch", FakeWatch)
+def test_wait_for_deletion(Dummy):
+    FakeWatch.events = [{"type": "DELETED", "raw_object": dummy("2")}]
+
+    obj = Dummy("my-dummy", "default")
+    assert obj.wait_for(lambda o: not o.bound, timeout=5)
+
+
+@mock.patch("kubeobject.wait.watch.Watch", FakeWatch)
+def test_wait_for_times_out(Dummy):
+    FakeWatch.events = []
+
+    obj = Dummy("my-dummy", "default")
+    with pytest.raises(WaitTimeoutException):
+        obj.wait_for(lambda o: False, timeout=0.1)
+
+
+def test_wait_for_polling(Dummy):
+    obj = Dummy("my-dummy", "default")
+    obj.api.get_namespaced_custom_object.side_effect = [
+        dummy("1", "Pending"),
+        dummy("2", "Pending"),
+        dummy("3", "Running"),
+    ]
+    obj.auto_reload_period = timedelta(milliseconds=1)
+
+    assert obj.wait_for(
+        lambda o: o["status"]["phase"] == "Running", timeout=5, reload="poll"
+    )
+    assert obj.api.get_namespaced_custom_object.call_count == 3
+
+    with pytest.raises(ValueError):
+        obj.wait_for(lambda o: True, reload="sometimes")
+
+
+@mock.patch("kubeobject.wait.watch.Watch", FakeWatch)
+@mock.patch("kubeobject.kubeobject.CustomObjectsApi")
+def test_kubeobject_wait_for(patched_custom_objects_api):
+    api = MagicMock()
+    api.get_namespaced_custom_object.return_value = dummy("1")
+    patched_custom_objects_api.return_value = api
+    FakeWatch.events = [{"type": "MODIFIED", "raw_object": dummy("2", "Running")}]
+
+    k = KubeObject("dummy.com", "v1", "dummies").read("my-dummy", "default")
+
+    assert k.wait_for(lambda o: o.status.phase == "Running", timeout=5)
+    assert k.metadata.resourceVersion == "2"